@@ -1,8 +1,12 @@
 import os
 import sys
 import logging
+from datetime import datetime
+from pathlib import Path
 from time import sleep
-from porkbun_ddns import PorkbunDDNS
+from porkbun_ddns.api import PorkbunAPIClient
+from porkbun_ddns.breaker import CircuitBreakers
+from porkbun_ddns.cache import RecordCache
 from porkbun_ddns.config import (
     AppConfig,
     Credentials,
@@ -10,8 +14,16 @@ from porkbun_ddns.config import (
     RetryPolicy,
     WebhookConfig,
 )
+from porkbun_ddns.daemon import MultiDomainUpdater, parse_domains
 from porkbun_ddns.errors import PorkbunDDNS_Error
-from porkbun_ddns.helpers import parse_log_level, resolve_fritzbox_public_ips
+from porkbun_ddns.helpers import parse_log_level
+from porkbun_ddns.lock import DomainLock
+from porkbun_ddns.netwatch import AddressWatcher
+from porkbun_ddns.ratelimit import TokenBucket
+from porkbun_ddns.resolver import PublicIPResolver
+from porkbun_ddns.scheduler import AdaptiveScheduler
+from porkbun_ddns.sources import build_chain
+from porkbun_ddns.transport import HTTPConnectionPool
 from porkbun_ddns.webhook import fire_webhook
 
 logger = logging.getLogger('porkbun_ddns')
@@ -29,7 +41,14 @@ consoleHandler.setFormatter(logFormatter)
 logger.addHandler(consoleHandler)
 
 sleep_time = int(os.getenv('SLEEP', 300))
-domain = os.getenv('DOMAIN', None)
+max_parallel = int(os.getenv('MAX_PARALLEL', 4))
+
+# DOMAINS="example.com:@,www;example.org" manages several domains from one
+# process; DOMAIN + SUBDOMAINS is the single-domain shorthand.
+domains = parse_domains(os.getenv('DOMAINS', ''))
+if not domains and os.getenv('DOMAIN'):
+    domains = parse_domains(
+        os.getenv('DOMAIN') + ':' + os.getenv('SUBDOMAINS', ''))
 
 if os.getenv('IPV4_ONLY', None) or os.getenv('IPV6_ONLY', None):
     raise PorkbunDDNS_Error('IPV4_ONLY and IPV6_ONLY are DEPRECATED and have been removed since v1.1.0')
@@ -44,10 +63,6 @@ if os.getenv('IPV4', 'True').lower() in ('true', '1', 't'):
 if os.getenv('IPV6', 'False').lower() in ('true', '1', 't'):
     ipv6 = True
 
-if not public_ips and os.getenv('FRITZBOX', None):
-    public_ips = resolve_fritzbox_public_ips(
-        os.getenv('FRITZBOX'), ipv4=ipv4, ipv6=ipv6)
-
 app = AppConfig(
     credentials=Credentials(
         apikey=os.getenv('APIKEY'),
@@ -57,6 +72,9 @@ app = AppConfig(
     retry=RetryPolicy(
         retry_count=int(os.getenv('RETRY_COUNT', '3')),
         retry_delay=int(os.getenv('RETRY_DELAY', '5')),
+        retry_max_delay=int(os.getenv('RETRY_MAX_DELAY', '60')),
+        retry_deadline=int(os.getenv('RETRY_DEADLINE', '0')),
+        retry_jitter=float(os.getenv('RETRY_JITTER', '0.5')),
     ),
     webhook=WebhookConfig(
         webhook_url=os.getenv('WEBHOOK_URL') or '',
@@ -65,7 +83,7 @@ app = AppConfig(
     ),
 )
 
-if not all([os.getenv('DOMAIN'), os.getenv('SECRETAPIKEY'), os.getenv('APIKEY')]):
+if not all([domains, os.getenv('SECRETAPIKEY'), os.getenv('APIKEY')]):
     logger.info('Please set DOMAIN, SECRETAPIKEY and APIKEY')
     sys.exit(1)
 
@@ -73,19 +91,135 @@ if not any([ipv4, ipv6]):
     logger.info('No Protocol selected! Please set IPV4 and/or IPV6 TRUE')
     sys.exit(1)
 
-porkbun_ddns = PorkbunDDNS(app.credentials, app.retry, domain, public_ips=public_ips,
-                           ipv4=ipv4, ipv6=ipv6)
+# One breaker per host (Porkbun API and IP-echo providers): after
+# CIRCUIT_FAILURES consecutive failures a host is skipped for CIRCUIT_RESET
+# seconds, so an outage cannot stretch every cycle to the full retry budget.
+breakers = None
+circuit_failures = int(os.getenv('CIRCUIT_FAILURES', 5))
+if circuit_failures > 0:
+    breakers = CircuitBreakers(failure_threshold=circuit_failures,
+                               reset_timeout=int(os.getenv('CIRCUIT_RESET', 300)))
+
+# Keep-alive connections outlive the SLEEP between passes, so each pass
+# reuses the previous pass's connections instead of reconnecting. One the
+# server closed in the meantime is retried on a fresh connection.
+transport = HTTPConnectionPool(idle_timeout=sleep_time + 60)
+
+# IP_SOURCES is the ordered chain of IP sources, e.g. "interface,dns:2,http"
+# (an optional timeout in seconds per source); by default the sources
+# configured below, then http. IP_BUDGET caps the seconds per address family.
+# IPV6_INTERFACE=TRUE (any interface) or a comma separated list of
+# interfaces takes the IPv6 address from the host (needs network_mode: host).
+# FRITZBOX asks the Fritz!Box every cycle (over a kept-alive connection).
+# DNS_LOOKUP=opendns|google asks a DNS server, IP_COMMAND runs a command.
+ipv6_interface = os.getenv('IPV6_INTERFACE', '')
+use_interface = bool(ipv6_interface) and ipv6_interface.lower() not in ('false', '0', 'f')
+race = os.getenv('PARALLEL_IP_LOOKUP', 'False').lower() in ('true', '1', 't')
+source_options = {
+    'http': {'race': race, 'quorum': int(os.getenv('IP_QUORUM', 1)), 'breakers': breakers},
+    'interface': {
+        'interfaces': [] if ipv6_interface.lower() in ('', 'true', '1', 't')
+        else [x.strip() for x in ipv6_interface.split(',')],
+        'prefixes': [x.strip() for x in os.getenv('IPV6_PREFIX', '').split(',') if x.strip()],
+    },
+    'dns': {'provider': os.getenv('DNS_LOOKUP', 'opendns').lower()},
+}
+if os.getenv('FRITZBOX'):
+    source_options['fritzbox'] = {'host': os.getenv('FRITZBOX'), 'ipv4': ipv4, 'ipv6': ipv6,
+                                  'transport': transport}
+if os.getenv('IP_COMMAND'):
+    source_options['command'] = {'command': os.getenv('IP_COMMAND')}
+ip_sources = os.getenv('IP_SOURCES') or ','.join(
+    [name for name, enabled in (('interface', use_interface),
+                                ('fritzbox', os.getenv('FRITZBOX')),
+                                ('dns', os.getenv('DNS_LOOKUP')),
+                                ('command', os.getenv('IP_COMMAND'))) if enabled]
+    + ['http'])
+
+resolver = PublicIPResolver(
+    ipv4=ipv4, ipv6=ipv6, race=race,
+    sources=build_chain(ip_sources, source_options),
+    budget=float(os.getenv('IP_BUDGET', 0)))
+
+# CACHE_MAX_AGE > 0 skips the API while the IPs stay unchanged, forcing a
+# full resync at least every CACHE_MAX_AGE seconds.
+cache = None
+cache_max_age = int(os.getenv('CACHE_MAX_AGE', 0))
+if cache_max_age > 0:
+    cache_file = os.getenv('CACHE_FILE', None)
+    cache = RecordCache(max_age=cache_max_age,
+                        path=Path(cache_file) if cache_file else None)
+
+# RATE_LIMIT > 0 caps the API requests per second of all domains together.
+rate_limiter = None
+rate_limit = float(os.getenv('RATE_LIMIT', 0))
+if rate_limit > 0:
+    rate_limiter = TokenBucket(rate_limit, int(os.getenv('RATE_BURST', 1)))
+
+# LOCK_DIR on a volume shared by containers on one host makes them take
+# turns per domain; RECHECK_WRITES re-reads each record before writing it.
+lock = DomainLock(Path(os.getenv('LOCK_DIR'))) if os.getenv('LOCK_DIR') else None
+
+updater = MultiDomainUpdater(app.credentials, app.retry, domains,
+                             public_ips=public_ips, ipv4=ipv4, ipv6=ipv6,
+                             max_workers=max_parallel,
+                             client=PorkbunAPIClient(app.credentials, app.retry,
+                                                     transport=transport,
+                                                     rate_limiter=rate_limiter,
+                                                     breakers=breakers),
+                             resolver=resolver,
+                             cache=cache,
+                             max_targeted_fqdns=int(os.getenv('TARGETED_RETRIEVE', 0)),
+                             apply_workers=int(os.getenv('APPLY_WORKERS', 1)),
+                             lock=lock,
+                             recheck_writes=os.getenv('RECHECK_WRITES', 'False').lower() in ('true', '1', 't'))
+
+# WATCH_NETLINK=TRUE updates as soon as a host address changes (needs
+# network_mode: host); SLEEP is then only the safety poll interval.
+watcher = None
+if os.getenv('WATCH_NETLINK', 'False').lower() in ('true', '1', 't'):
+    try:
+        watcher = AddressWatcher(ipv4=ipv4, ipv6=ipv6)
+    except OSError as err:
+        logger.warning('Address watcher unavailable, polling instead: {}'.format(err))
+
+# MIN_SLEEP < SLEEP polls every MIN_SLEEP seconds after a change or a failed
+# pass (which then no longer exits, even if every domain failed) and backs
+# off by SLEEP_BACKOFF up to SLEEP while nothing changes. SLEEP_JITTER spreads the interval (+/-).
+scheduler = AdaptiveScheduler(
+    min_interval=float(os.getenv('MIN_SLEEP', sleep_time)),
+    max_interval=sleep_time,
+    backoff=float(os.getenv('SLEEP_BACKOFF', 2)),
+    jitter=float(os.getenv('SLEEP_JITTER', 0.1)))
 
 while True:
-    subdomains = os.getenv('SUBDOMAINS', '')
-    if subdomains:
-        for subdomain in subdomains.replace(' ', '').split(','):
-            porkbun_ddns.set_subdomain(subdomain)
-            porkbun_ddns.update_records()
+    scheduler.start_pass()
+    changed = failed = False
+    try:
+        changes, errors = updater.run_cycle()
+    except PorkbunDDNS_Error as err:
+        if not scheduler.adaptive:
+            raise
+        logger.error('Update failed: {}'.format(err))
+        changes, errors, failed = {}, {}, True
+    # The healthy domains' changes are reported even when others failed;
+    # those are logged by run_cycle and retried next pass.
+    for domain, domain_changes in changes.items():
+        changed = True
+        fire_webhook(app.webhook, domain_changes, domain)
+    if errors:
+        failed = True
+        # Without MIN_SLEEP a pass where every domain failed still exits.
+        if len(errors) == len(domains) and not scheduler.adaptive:
+            raise next(iter(errors.values()))
+    delay = scheduler.finish_pass(changed=changed, failed=failed)
+    logger.debug('Pass took {:.3g}s, next pass at {}.'.format(
+        scheduler.pass_duration,
+        datetime.fromtimestamp(scheduler.next_run_at).isoformat(timespec='seconds')))
+    if watcher:
+        logger.info('Waiting for an address change (at most {:.3g}s)...'.format(delay))
+        if watcher.wait(delay):
+            logger.info('Address change detected, updating now.')
     else:
-        porkbun_ddns.update_records()
-    if porkbun_ddns.changes:
-        fire_webhook(app.webhook, porkbun_ddns.changes, porkbun_ddns.domain)
-        porkbun_ddns.changes = []
-    logger.info('Sleeping... {}s'.format(sleep_time))
-    sleep(sleep_time)
+        logger.info('Sleeping... {:.3g}s'.format(delay))
+        sleep(delay)
@@ -87,7 +87,7 @@ for _ in $(seq 1 15); do
     sleep 2
 done
 
-echo "Docker e2e - scenario 1: IP change deletes + recreates, then stays idempotent"
+echo "Docker e2e - scenario 1: IP change edits the record, then stays idempotent"
 
 # Seed a stale A record so the container must change it.
 RESP=$(curl -s -X POST "http://127.0.0.1:${MOCK_PORT}/api/json/v3/dns/create/example.com" \
@@ -119,10 +119,10 @@ done
 [[ ${SLEEPS} -ge 2 ]] || fail "scenario 1: container never completed a second loop pass"
 
 LOG1=$(docker logs ${APP_CONTAINER} 2>&1)
+UPDATES=$(grep -c "Updating A-Record for example.com" <<< "${LOG1}" || true)
 CREATES=$(grep -c "Creating A-Record for example.com" <<< "${LOG1}" || true)
-DELETES=$(grep -c "Deleting A-Record for example.com" <<< "${LOG1}" || true)
-[[ ${CREATES} -eq 1 ]] || fail "scenario 1: expected exactly 1 create, got ${CREATES} (idempotency broken)"
-[[ ${DELETES} -eq 1 ]] || fail "scenario 1: expected exactly 1 delete, got ${DELETES} (idempotency broken)"
+[[ ${UPDATES} -eq 1 ]] || fail "scenario 1: expected exactly 1 update, got ${UPDATES} (idempotency broken)"
+[[ ${CREATES} -eq 0 ]] || fail "scenario 1: expected no create, got ${CREATES} (record was not edited in place)"
 grep -q "A-Record of example.com is up to date!" <<< "${LOG1}" \
     || fail "scenario 1: missing 'is up to date!' on unchanged pass"
 
@@ -235,8 +235,9 @@ echo "Docker e2e - scenario 6: RETRY_COUNT and RETRY_DELAY drive the retry loop"
 stop_app
 
 # Point at a closed port on the mock so every attempt fails fast with a
-# connection error; the container must retry RETRY_COUNT times, sleeping
-# RETRY_DELAY seconds between attempts, then exit non-zero.
+# connection error; the container must retry RETRY_COUNT times, backing off
+# from RETRY_DELAY seconds between attempts, then exit non-zero. Jitter is
+# off so the waits are exact.
 START=$(date +%s)
 if docker run --rm --name ${APP_CONTAINER} \
     --platform ${PLATFORM} \
@@ -249,6 +250,7 @@ if docker run --rm --name ${APP_CONTAINER} \
     -e IPV6=FALSE \
     -e RETRY_COUNT=3 \
     -e RETRY_DELAY=1 \
+    -e RETRY_JITTER=0 \
     "${IMAGE}" > "${LOG_DIR}/retry.log" 2>&1; then
     fail "scenario 6: container should exit non-zero after exhausting retries"
 fi
@@ -261,8 +263,24 @@ grep -q "attempt 2/3" "${LOG_DIR}/retry.log" \
 grep -q "Error reaching" "${LOG_DIR}/retry.log" \
     || fail "scenario 6: missing connection error in log"
 
+# Backoff waits RETRY_DELAY=1s, then 2s: at least 3s in total.
 ELAPSED=$((END - START))
-[[ ${ELAPSED} -ge 2 ]] \
-    || fail "scenario 6: expected >=2s wall time for RETRY_DELAY=1 x 2 sleeps, got ${ELAPSED}s"
+[[ ${ELAPSED} -ge 3 ]] \
+    || fail "scenario 6: expected >=3s wall time for RETRY_DELAY=1 with backoff, got ${ELAPSED}s"
 
-echo "Docker e2e PASSED: ${IMAGE} (ip-change, ipv6, validation, subdomains, log-levels, retry)"
+echo "Docker e2e - scenario 7: DOMAINS manages several domains from one container"
+
+run_app "" -e DOMAINS="multi-a.com:@,www;multi-b.com" -e PUBLIC_IPS=${PINNED_IP} -e IPV6=FALSE -e SLEEP=301 "${IMAGE}"
+
+for _ in $(seq 1 60); do
+    COUNT_A=$(mock_api /api/json/v3/dns/retrieve/multi-a.com \
+        | jq -r '.records | length' 2>/dev/null || echo 0)
+    COUNT_B=$(mock_api /api/json/v3/dns/retrieve/multi-b.com \
+        | jq -r '.records | length' 2>/dev/null || echo 0)
+    [[ ${COUNT_A} -ge 2 && ${COUNT_B} -ge 1 ]] && break
+    sleep 2
+done
+[[ ${COUNT_A} -ge 2 ]] || fail "scenario 7: expected 2 records for multi-a.com, got ${COUNT_A}"
+[[ ${COUNT_B} -ge 1 ]] || fail "scenario 7: expected 1 record for multi-b.com, got ${COUNT_B}"
+
+echo "Docker e2e PASSED: ${IMAGE} (ip-change, ipv6, validation, subdomains, log-levels, retry, multi-domain)"
@@ -2,14 +2,21 @@
 
 from __future__ import annotations
 
+import asyncio
+import datetime
+import email.utils
 import json
 import logging
+import random
 import time
-import urllib.request
+from collections.abc import Callable
 from urllib.error import HTTPError, URLError
 
+from porkbun_ddns.breaker import OPEN, CircuitBreakers
 from porkbun_ddns.config import Credentials, RetryPolicy
 from porkbun_ddns.errors import PorkbunDDNS_Error
+from porkbun_ddns.ratelimit import TokenBucket
+from porkbun_ddns.transport import HTTPConnectionPool
 
 logger = logging.getLogger("porkbun_ddns")
 
@@ -17,28 +24,51 @@ logger = logging.getLogger("porkbun_ddns")
 class PorkbunAPIClient:
     """Typed transport for the Porkbun JSON API v3.
 
-    Owns authentication, HTTP transport and the retry loop. ``retrieve_records``
-    raises on non-SUCCESS responses; ``create_record`` and ``delete_record``
-    return the status string for logging without raising.
+    Owns authentication, HTTP transport and the retry loop.
+    ``retrieve_records`` raises on non-SUCCESS responses; the write methods
+    (create, edit, delete) return the status string for logging without
+    raising. Requests go through a keep-alive :class:`HTTPConnectionPool`,
+    which may be shared between clients. An optional :class:`TokenBucket` is
+    consulted before every request, retries included, and optional
+    :class:`CircuitBreakers` skip the endpoint host while it is down.
+    ``_clock``, ``_sleep`` and ``_random`` are internal seams for tests.
     """
 
-    def __init__(self, credentials: Credentials, retry: RetryPolicy) -> None:
+    def __init__(self, credentials: Credentials, retry: RetryPolicy,
+                 transport: HTTPConnectionPool | None = None,
+                 rate_limiter: TokenBucket | None = None,
+                 breakers: CircuitBreakers | None = None,
+                 _clock: Callable[[], float] = time.monotonic,
+                 _sleep: Callable[[float], None] = time.sleep,
+                 _random: Callable[[], float] = random.random) -> None:
         self.credentials = credentials
         self.retry = retry
+        self.transport = transport or HTTPConnectionPool()
+        self.rate_limiter = rate_limiter
+        self.breakers = breakers
+        self._clock = _clock
+        self._sleep = _sleep
+        self._random = _random
 
     def retrieve_records(self, domain: str) -> list[dict]:
         """Retrieve the DNS records for the given domain.
 
         Raises ``PorkbunDDNS_Error`` when the API does not report SUCCESS.
         """
-        response = self._post("/dns/retrieve/" + domain, self._auth_body())
-        if response["status"] != "SUCCESS":
-            raise PorkbunDDNS_Error(
-                "Failed to get records.\n" +
-                f"Make sure you specified the correct domain ({domain}),\n" +
-                "and that API access has been enabled for this domain.",
-            )
-        return response["records"]
+        return self._records(
+            domain, self._post("/dns/retrieve/" + domain, self._auth_body()))
+
+    def retrieve_by_name_type(self, domain: str, record_type: str,
+                              subdomain: str) -> list[dict]:
+        """Retrieve only the records of one subdomain and type.
+
+        ``subdomain`` ``"@"`` addresses the domain itself. Raises
+        ``PorkbunDDNS_Error`` when the API does not report SUCCESS.
+        """
+        target = "/dns/retrieveByNameType/" + domain + "/" + record_type
+        if subdomain != "@":
+            target += "/" + subdomain
+        return self._records(domain, self._post(target, self._auth_body()))
 
     def create_record(self, domain: str, name: str, record_type: str,
                       content: str, ttl: int = 600) -> str:
@@ -48,6 +78,28 @@ class PorkbunAPIClient:
                      "content": content, "ttl": ttl})
         return self._post("/dns/create/" + domain, body)["status"]
 
+    def edit_record(self, domain: str, record_id: str, name: str,
+                    record_type: str, content: str, ttl: int = 600) -> str:
+        """Edit a DNS record in place by id; returns the status string."""
+        body = self._auth_body()
+        body.update({"name": name, "type": record_type,
+                     "content": content, "ttl": ttl})
+        return self._post(
+            "/dns/edit/" + domain + "/" + record_id, body)["status"]
+
+    def edit_by_name_type(self, domain: str, record_type: str, subdomain: str,
+                          content: str, ttl: int = 600) -> str:
+        """Edit every record matching subdomain and type; returns the status.
+
+        ``subdomain`` ``"@"`` addresses the domain itself.
+        """
+        body = self._auth_body()
+        body.update({"content": content, "ttl": ttl})
+        target = "/dns/editByNameType/" + domain + "/" + record_type
+        if subdomain != "@":
+            target += "/" + subdomain
+        return self._post(target, body)["status"]
+
     def delete_record(self, domain: str, record_id: str) -> str:
         """Delete a DNS record; returns the status string for logging."""
         return self._post(
@@ -56,33 +108,186 @@ class PorkbunAPIClient:
     def _auth_body(self) -> dict:
         return self.credentials._asdict()
 
+    @staticmethod
+    def _records(domain: str, response: dict) -> list[dict]:
+        if response["status"] != "SUCCESS":
+            raise PorkbunDDNS_Error(
+                "Failed to get records.\n" +
+                f"Make sure you specified the correct domain ({domain}),\n" +
+                "and that API access has been enabled for this domain.",
+            )
+        return response["records"]
+
     def _post(self, target: str, data: dict) -> dict:
         """Send a POST request, retrying transient failures.
 
-        Transient failures (unreachable endpoint, timeouts, HTTP 5xx) are
-        retried up to ``retry.retry_count`` times, waiting ``retry.retry_delay``
-        seconds between attempts, before a ``PorkbunDDNS_Error`` is raised.
-        HTTP 400 is treated as invalid API keys and raises immediately.
+        Transient failures (unreachable endpoint, timeouts, HTTP 5xx and 429)
+        are retried up to ``retry.retry_count`` times with the backoff of the
+        :class:`RetryPolicy`, before a ``PorkbunDDNS_Error`` is raised. The
+        call gives up early rather than overrun ``retry.retry_deadline``, and
+        fails at once while the host's circuit breaker is open. HTTP 400 raises
+        immediately: with the API's error message for writes, as invalid API
+        keys otherwise.
         """
-        req = urllib.request.Request(self.credentials.endpoint + target)
-        req.data = json.dumps(data).encode("utf8")
+        url = self.credentials.endpoint + target
+        body = json.dumps(data).encode("utf8")
+        breaker = self.breakers.for_url(url) if self.breakers else None
+        deadline = None
+        if self.retry.retry_deadline > 0:
+            deadline = self._clock() + self.retry.retry_deadline
         for attempt in range(self.retry.retry_count):
+            if breaker and not breaker.allow():
+                raise PorkbunDDNS_Error(
+                    f"Circuit for {breaker.name} is open, not calling {url}!")
+            timeout = 30.0
+            if deadline is not None:
+                timeout = min(timeout, max(deadline - self._clock(), 0.1))
+            retry_after = None
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
             try:
-                response = urllib.request.urlopen(req, timeout=30).read()
-                return json.loads(response.decode("utf-8"))
+                response = self.transport.post(url, body, timeout=timeout)
             except HTTPError as err:
+                # Any answer but a 5xx shows the host is up.
+                if breaker and err.code >= 500:
+                    breaker.record_failure()
+                elif breaker:
+                    breaker.record_success()
                 if err.code == 400:
+                    # Writes also get a 400 for bad input (e.g. an unknown
+                    # record id), so show what the API said.
+                    message = (None if target.startswith("/dns/retrieve")
+                               else _error_message(err))
+                    if message:
+                        raise PorkbunDDNS_Error(f"Porkbun rejected {url}: {message}")
                     raise PorkbunDDNS_Error("Invalid API Keys!")
-                if err.code < 500:
+                if err.code < 500 and err.code != 429:
                     raise
-                error_message = f"Error reaching {req.get_full_url()}! - HTTP {err.code}"
+                error_message = f"Error reaching {url}! - HTTP {err.code}"
+                retry_after = _retry_after(err.headers)
             except URLError as err:
-                error_message = f"Error reaching {req.get_full_url()}! - {err.reason}"
-            if attempt < self.retry.retry_count - 1:
-                logger.warning(
-                    "%s Retrying in %s seconds (attempt %s/%s).",
-                    error_message, self.retry.retry_delay, attempt + 1,
-                    self.retry.retry_count)
-                time.sleep(self.retry.retry_delay)
+                if breaker:
+                    breaker.record_failure()
+                error_message = f"Error reaching {url}! - {err.reason}"
             else:
+                if breaker:
+                    breaker.record_success()
+                return json.loads(response.decode("utf-8"))
+            if breaker and breaker.state == OPEN:
+                raise PorkbunDDNS_Error(error_message)
+            if attempt == self.retry.retry_count - 1:
                 raise PorkbunDDNS_Error(error_message)
+            delay = self._backoff(attempt, retry_after)
+            if deadline is not None and self._clock() + delay >= deadline:
+                raise PorkbunDDNS_Error(
+                    f"{error_message} Giving up, retrying would exceed the "
+                    f"{self.retry.retry_deadline}s deadline.")
+            logger.warning(
+                "%s Retrying in %s seconds (attempt %s/%s).",
+                error_message, f"{delay:.3g}", attempt + 1, self.retry.retry_count)
+            self._sleep(delay)
+        raise PorkbunDDNS_Error(f"Error reaching {url}! - no attempts configured")
+
+    def _backoff(self, attempt: int, retry_after: float | None) -> float:
+        """Seconds to wait before retry ``attempt`` (counted from 0).
+
+        A ``Retry-After`` is honored up to ``retry_max_delay``, so a bogus
+        one cannot stall the pass.
+        """
+        delay = min(self.retry.retry_delay * self.retry.retry_backoff ** attempt,
+                    self.retry.retry_max_delay)
+        delay -= delay * self.retry.retry_jitter * self._random()
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.retry.retry_max_delay))
+        return delay
+
+
+def _error_message(err: HTTPError) -> str | None:
+    """The ``message`` of a JSON error body, if there is one."""
+    try:
+        message = json.loads(err.read().decode("utf-8")).get("message")
+    except (OSError, ValueError, AttributeError):
+        return None
+    return message if isinstance(message, str) and message else None
+
+
+def _retry_after(headers) -> float | None:
+    """Parse a ``Retry-After`` header (seconds or HTTP-date) into seconds."""
+    value = headers.get("Retry-After") if headers else None
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    return max((when - datetime.datetime.now(datetime.timezone.utc)).total_seconds(), 0.0)
+
+
+class AsyncPorkbunAPIClient:
+    """Asyncio mirror of :class:`PorkbunAPIClient`.
+
+    The standard library ships no asyncio HTTP client, so every call runs the
+    blocking client's request, with its ``RetryPolicy`` and keep-alive pool,
+    on a worker thread and never blocks the event loop; so does waiting for
+    the ``rate_limiter``. At most ``max_concurrency`` calls are in flight at
+    once; share one instance to bound concurrency across several domains.
+    """
+
+    def __init__(self, credentials: Credentials | None = None,
+                 retry: RetryPolicy | None = None,
+                 transport: HTTPConnectionPool | None = None,
+                 max_concurrency: int = 8,
+                 client: PorkbunAPIClient | None = None,
+                 rate_limiter: TokenBucket | None = None) -> None:
+        if client is None:
+            if credentials is None:
+                raise ValueError("Either credentials or client is required")
+            client = PorkbunAPIClient(credentials, retry or RetryPolicy(), transport,
+                                      rate_limiter=rate_limiter)
+        self.client = client
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def retrieve_records(self, domain: str) -> list[dict]:
+        """Asyncio variant of :meth:`PorkbunAPIClient.retrieve_records`."""
+        return await self._call(self.client.retrieve_records, domain)
+
+    async def retrieve_by_name_type(self, domain: str, record_type: str,
+                                    subdomain: str) -> list[dict]:
+        """Asyncio variant of :meth:`PorkbunAPIClient.retrieve_by_name_type`."""
+        return await self._call(
+            self.client.retrieve_by_name_type, domain, record_type, subdomain)
+
+    async def create_record(self, domain: str, name: str, record_type: str,
+                            content: str, ttl: int = 600) -> str:
+        """Asyncio variant of :meth:`PorkbunAPIClient.create_record`."""
+        return await self._call(
+            self.client.create_record, domain, name, record_type, content, ttl)
+
+    async def edit_record(self, domain: str, record_id: str, name: str,
+                          record_type: str, content: str, ttl: int = 600) -> str:
+        """Asyncio variant of :meth:`PorkbunAPIClient.edit_record`."""
+        return await self._call(
+            self.client.edit_record, domain, record_id, name, record_type,
+            content, ttl)
+
+    async def edit_by_name_type(self, domain: str, record_type: str,
+                                subdomain: str, content: str,
+                                ttl: int = 600) -> str:
+        """Asyncio variant of :meth:`PorkbunAPIClient.edit_by_name_type`."""
+        return await self._call(
+            self.client.edit_by_name_type, domain, record_type, subdomain,
+            content, ttl)
+
+    async def delete_record(self, domain: str, record_id: str) -> str:
+        """Asyncio variant of :meth:`PorkbunAPIClient.delete_record`."""
+        return await self._call(self.client.delete_record, domain, record_id)
+
+    async def _call(self, func, *args):
+        async with self._semaphore:
+            return await asyncio.to_thread(func, *args)
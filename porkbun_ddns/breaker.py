@@ -0,0 +1,118 @@
+"""Per-host circuit breakers for the Porkbun API and the IP-echo providers."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from urllib.parse import urlsplit
+
+logger = logging.getLogger("porkbun_ddns")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker for one endpoint host.
+
+    ``failure_threshold`` consecutive failures open the circuit: calls are
+    refused for ``reset_timeout`` seconds instead of waiting on a host that
+    is down. After that a single probe call is let through (half-open); its
+    success closes the circuit, its failure opens it again. ``_clock`` is an
+    internal seam for tests.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            failure_threshold: int = 5,
+            reset_timeout: float = 300,
+            _clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = _clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self._reset_due():
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may be made now; claims the probe when half-open."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                if not self._reset_due():
+                    return False
+                self._state = HALF_OPEN
+                self._probing = False
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info("Circuit for %s closed again.", self.name)
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == HALF_OPEN or (
+                    self._state == CLOSED
+                    and self._failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = self._clock()
+                logger.warning(
+                    "Circuit for %s opened after %s failures, skipping it "
+                    "for %ss.", self.name, self._failures, self.reset_timeout)
+
+    def _reset_due(self) -> bool:
+        return self._clock() - self._opened_at >= self.reset_timeout
+
+
+class CircuitBreakers:
+    """One :class:`CircuitBreaker` per endpoint host, created on first use.
+
+    Share an instance between the API client and the resolver so every
+    component sees the same view of which hosts are down.
+    """
+
+    def __init__(
+            self,
+            failure_threshold: int = 5,
+            reset_timeout: float = 300,
+            _clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = _clock
+        self._lock = threading.Lock()
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def for_url(self, url: str) -> CircuitBreaker:
+        """The breaker guarding the host of ``url``."""
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(
+                    host, self.failure_threshold, self.reset_timeout, self._clock)
+            return self._breakers[host]
@@ -0,0 +1,114 @@
+"""Sync state cache used to skip passes whose public IPs are unchanged."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Callable, Iterable
+from ipaddress import IPv4Address, IPv6Address
+from pathlib import Path
+
+logger = logging.getLogger("porkbun_ddns")
+
+
+class RecordCache:
+    """Last sync of each domain.
+
+    An entry remembers the fqdns that were reconciled, the public IPs they
+    were reconciled to and when that happened. It is only stored after a
+    pass that found nothing to change, so a later pass for the same fqdns
+    and IPs can skip the API entirely while the entry is younger than
+    ``max_age`` seconds. Once it expires the next pass does a full resync,
+    picking up records edited outside this client.
+
+    With a ``path`` the cache is loaded from and atomically written to that
+    JSON file, so it survives restarts and can be shared by separate runs
+    (e.g. cron jobs for different domains): only the changed domain's entry
+    is merged into the file. ``_clock`` is an internal seam for tests.
+    """
+
+    def __init__(
+            self,
+            max_age: float = 3600,
+            path: Path | None = None,
+            _clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_age = max_age
+        self.path = path
+        self._clock = _clock
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict] = self._load() if path else {}
+
+    def is_in_sync(self, domain: str, fqdns: Iterable[str],
+                   ips: Iterable[IPv4Address | IPv6Address]) -> bool:
+        """Whether a fresh entry already covers ``fqdns`` at ``ips``."""
+        with self._lock:
+            entry = self._fresh_entry(domain)
+            return (entry is not None
+                    and set(entry["ips"]) == {ip.exploded for ip in ips}
+                    and set(fqdns) <= set(entry["fqdns"]))
+
+    def store(self, domain: str, fqdns: Iterable[str],
+              ips: Iterable[IPv4Address | IPv6Address]) -> None:
+        """Remember that ``fqdns`` are in sync with ``ips`` as of now."""
+        with self._lock:
+            self._entries[domain] = {
+                "synced_at": self._clock(),
+                "ips": sorted(ip.exploded for ip in ips),
+                "fqdns": sorted(set(fqdns)),
+            }
+            self._save(domain)
+
+    def invalidate(self, domain: str) -> None:
+        """Forget ``domain`` so its next pass fetches fresh records."""
+        with self._lock:
+            if self._entries.pop(domain, None) is not None:
+                self._save(domain)
+
+    def _fresh_entry(self, domain: str) -> dict | None:
+        entry = self._entries.get(domain)
+        if entry and self._clock() - entry["synced_at"] < self.max_age:
+            return entry
+        return None
+
+    def _load(self) -> dict[str, dict]:
+        try:
+            with self.path.open() as cache_file:
+                entries = json.load(cache_file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as err:
+            logger.warning("Ignoring unreadable cache file %s: %s", self.path, err)
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def _save(self, domain: str) -> None:
+        """Merge ``domain``'s entry into the file and write it atomically.
+
+        A concurrent reader never sees a partial file, and entries other runs
+        wrote for other domains are kept.
+        """
+        if not self.path:
+            return
+        entries = self._load()
+        if domain in self._entries:
+            entries[domain] = self._entries[domain]
+        else:
+            entries.pop(domain, None)
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(
+                dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as tmp_file:
+                    json.dump(entries, tmp_file)
+                os.replace(tmp, self.path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except OSError as err:
+            logger.warning("Failed to write cache file %s: %s", self.path, err)
@@ -1,16 +1,26 @@
 import argparse
+import json
 import logging
 import sys
 import traceback
+from pathlib import Path
 
 from porkbun_ddns import PorkbunDDNS
+from porkbun_ddns.api import PorkbunAPIClient
+from porkbun_ddns.cache import RecordCache
 from porkbun_ddns.config import (
     create_default_config_file,
     extract_config,
     get_config_file_default,
+    get_lock_dir_default,
+    get_state_file_default,
 )
 from porkbun_ddns.errors import PorkbunDDNS_Error
 from porkbun_ddns.helpers import parse_log_level
+from porkbun_ddns.lock import DomainLock
+from porkbun_ddns.ratelimit import TokenBucket
+from porkbun_ddns.resolver import PublicIPResolver
+from porkbun_ddns.sources import DNS_PROVIDERS, build_chain
 from porkbun_ddns.webhook import fire_webhook
 
 logger = logging.getLogger("porkbun_ddns")
@@ -36,7 +46,14 @@ def main(argv=sys.argv[1:]):
     parser.add_argument("--retry-count",
                         help="Number of attempts for transient API failures")
     parser.add_argument("--retry-delay",
-                        help="Seconds to wait between retry attempts")
+                        help="Seconds to wait before the first retry, doubled "
+                             "for every further one")
+    parser.add_argument("--retry-max-delay",
+                        help="Upper bound in seconds for the wait between "
+                             "retry attempts")
+    parser.add_argument("--retry-deadline",
+                        help="Seconds one API call may take including its "
+                             "retries (default: 0, no deadline)")
 
     parser.add_argument("--webhook-url",
                         help="Webhook URL to notify when IPs change")
@@ -64,6 +81,80 @@ def main(argv=sys.argv[1:]):
     ip.add_argument("-6", "--ipv6-only", action="store_true",
                     help="Only set/update IPv6 AAAA Records")
 
+    parser.add_argument("--parallel-ip-lookup", action="store_true",
+                        help="Query all public IP providers at once and use "
+                             "the first answer")
+    parser.add_argument("--ip-quorum", type=int, default=1,
+                        help="Number of public IP providers that must agree "
+                             "on an address (default: 1)")
+
+    parser.add_argument("--ipv6-interface", nargs="*", metavar="IFACE",
+                        help="Take the IPv6 address from the host's own "
+                             "interfaces (optionally only these) instead of "
+                             "asking an external service")
+    parser.add_argument("--ipv6-prefix", nargs="*", default=[],
+                        help="Only use local IPv6 addresses within these "
+                             "prefixes, e.g. 2a01:db8::/32")
+    parser.add_argument("--dns-lookup", nargs="?", const="opendns",
+                        choices=sorted(DNS_PROVIDERS), metavar="PROVIDER",
+                        help="Ask a DNS server for the public IPs (one UDP "
+                             "packet) before the HTTP providers: opendns "
+                             "(default) or google")
+    parser.add_argument("--ip-command", metavar="CMD",
+                        help="Run CMD and take the public IPs from its output "
+                             "before the HTTP providers")
+    parser.add_argument("--ip-sources", metavar="SPEC",
+                        help="Ordered, comma separated IP sources to ask, "
+                             "each optionally with a timeout in seconds, e.g. "
+                             "natpmp:1,upnp,http (sources: http, interface, "
+                             "dns, command, natpmp, upnp; default: the ones "
+                             "configured above, then http)")
+    parser.add_argument("--ip-budget", type=float, default=0, metavar="SECONDS",
+                        help="Give up on an address family after SECONDS in "
+                             "the IP sources (default: 0, no limit)")
+
+    parser.add_argument("--state-file", nargs="?", const=get_state_file_default(),
+                        help="Remember the last synced IPs and skip the API "
+                             "while they are unchanged (default path: "
+                             f"{get_state_file_default()})")
+    parser.add_argument("--state-max-age", type=int, default=86400,
+                        help="Seconds after which a full resync is forced "
+                             "despite unchanged IPs (default: 86400)")
+
+    parser.add_argument("--targeted-retrieve", type=int, default=0, metavar="N",
+                        help="Fetch only the updated subdomains' records "
+                             "instead of the whole zone when updating at most "
+                             "N subdomains (default: 0, always the whole zone)")
+
+    parser.add_argument("--apply-workers", type=int, default=1, metavar="N",
+                        help="Update up to N subdomains' records concurrently "
+                             "(default: 1, one after another)")
+
+    parser.add_argument("--lock", nargs="?", const=get_lock_dir_default(),
+                        metavar="DIR",
+                        help="Let only one run at a time update the domain on "
+                             "this host, using a lockfile in DIR (default: "
+                             "$XDG_RUNTIME_DIR or the temp dir)")
+    parser.add_argument("--recheck", action="store_true",
+                        help="Re-read each record right before writing it and "
+                             "skip it when another run already updated it")
+
+    plan = parser.add_mutually_exclusive_group()
+    plan.add_argument("--plan", nargs="?", const="-", metavar="FILE",
+                      help="Only compute the changes and write them as a JSON "
+                           "plan to FILE (default: stdout), without updating "
+                           "any record")
+    plan.add_argument("--apply-plan", metavar="FILE",
+                      help="Apply a plan written by --plan instead of "
+                           "resolving the IPs and comparing the records again")
+
+    parser.add_argument("--rate-limit", type=float, default=0, metavar="RATE",
+                        help="Send at most RATE API requests per second "
+                             "(default: 0, unlimited)")
+    parser.add_argument("--rate-burst", type=int, default=1, metavar="N",
+                        help="Number of API requests that may be sent back "
+                             "to back before --rate-limit applies (default: 1)")
+
     verbose = parser.add_mutually_exclusive_group()
     verbose.add_argument("-v", "--verbose", action="store_true",
                     help="Show Debug Output")
@@ -76,6 +167,7 @@ def main(argv=sys.argv[1:]):
     if not argv:
         parser.print_help()
         sys.exit(1)
+    redirected: dict[logging.StreamHandler, object] = {}
     try:
         args = parser.parse_args(argv)
 
@@ -94,21 +186,74 @@ def main(argv=sys.argv[1:]):
             for handler in logger.handlers:
                 handler.setLevel(logging.DEBUG)
 
+        if args.plan == "-":
+            # Keep stdout clean for the plan; restored below.
+            for stream_handler in logger.handlers:
+                if isinstance(stream_handler, logging.StreamHandler):
+                    redirected[stream_handler] = stream_handler.stream
+                    stream_handler.setStream(sys.stderr)
+
         app = extract_config(args)
         ipv4 = args.ipv4_only
         ipv6 = args.ipv6_only
         if not any([ipv4, ipv6]):
             ipv4 = ipv6 = True
 
+        spec = args.ip_sources or ",".join(
+            [name for name, enabled in (("interface", args.ipv6_interface is not None),
+                                        ("dns", args.dns_lookup),
+                                        ("command", args.ip_command)) if enabled]
+            + ["http"])
+        options = {
+            "http": {"race": args.parallel_ip_lookup, "quorum": args.ip_quorum},
+            "interface": {"interfaces": args.ipv6_interface or [],
+                          "prefixes": args.ipv6_prefix},
+            "dns": {"provider": args.dns_lookup or "opendns"},
+        }
+        if args.ip_command:
+            options["command"] = {"command": args.ip_command}
+        try:
+            sources = build_chain(spec, options)
+        except ValueError as err:
+            parser.error(str(err))
+        resolver = PublicIPResolver(ipv4=ipv4, ipv6=ipv6,
+                                    race=args.parallel_ip_lookup,
+                                    sources=sources, budget=args.ip_budget)
+        cache = None
+        if args.state_file:
+            cache = RecordCache(max_age=args.state_max_age,
+                                path=Path(args.state_file))
+        rate_limiter = None
+        if args.rate_limit > 0:
+            rate_limiter = TokenBucket(args.rate_limit, args.rate_burst)
+        client = PorkbunAPIClient(app.credentials, app.retry,
+                                  rate_limiter=rate_limiter)
         porkbun_ddns = PorkbunDDNS(app.credentials, app.retry, domain=args.domain,
                                    public_ips=args.public_ips,
-                                   ipv4=ipv4, ipv6=ipv6)
-        if args.subdomains:
-            for s in args.subdomains:
-                porkbun_ddns.set_subdomain(s)
-                porkbun_ddns.update_records()
+                                   ipv4=ipv4, ipv6=ipv6, client=client,
+                                   resolver=resolver,
+                                   cache=cache,
+                                   max_targeted_fqdns=args.targeted_retrieve,
+                                   apply_workers=args.apply_workers,
+                                   lock=DomainLock(Path(args.lock)) if args.lock else None,
+                                   recheck_writes=args.recheck)
+        if args.plan:
+            plan = porkbun_ddns.plan_many(args.subdomains)
+            if args.plan == "-":
+                json.dump(plan, sys.stdout, indent=2)
+                sys.stdout.write("\n")
+            else:
+                Path(args.plan).write_text(json.dumps(plan, indent=2) + "\n")
+            return
+        if args.apply_plan:
+            try:
+                plan = json.loads(Path(args.apply_plan).read_text())
+            except (OSError, ValueError) as err:
+                raise PorkbunDDNS_Error(
+                    f"Could not read the plan {args.apply_plan}: {err}") from err
+            porkbun_ddns.apply_plan(plan)
         else:
-            porkbun_ddns.update_records()
+            porkbun_ddns.update_many(args.subdomains)
         if porkbun_ddns.changes:
             fire_webhook(app.webhook, porkbun_ddns.changes, porkbun_ddns.domain)
             porkbun_ddns.changes = []
@@ -120,6 +265,9 @@ def main(argv=sys.argv[1:]):
         logger.error("Error: " + str(e))
         logger.error(traceback.format_exc())
         sys.exit(1)
+    finally:
+        for stream_handler, stream in redirected.items():
+            stream_handler.setStream(stream)
 
 
 if __name__ == "__main__":
@@ -2,6 +2,7 @@ import argparse
 import json
 import logging
 import os
+import tempfile
 from pathlib import Path
 from typing import Final, NamedTuple
 
@@ -25,6 +26,12 @@ config_file_default_content: Final = \
 def get_config_file_default() -> Path:
     return xdg.xdg_config_home() / "porkbun-ddns-config.json"
 
+def get_state_file_default() -> Path:
+    return xdg.xdg_state_home() / "porkbun-ddns-state.json"
+
+def get_lock_dir_default() -> Path:
+    return xdg.xdg_runtime_dir() or Path(tempfile.gettempdir())
+
 def create_default_config_file():
     if not xdg.xdg_config_home().is_dir():
         os.makedirs(xdg.xdg_config_home())
@@ -57,8 +64,22 @@ class Credentials(NamedTuple):
 
 
 class RetryPolicy(NamedTuple):
+    """How the API client retries transient failures.
+
+    The wait before retry ``n`` (from 0) is ``retry_delay * retry_backoff**n``
+    capped at ``retry_max_delay`` and shortened by a random share of up to
+    ``retry_jitter``, so clients failing together do not retry in lockstep.
+    A ``Retry-After`` header asks for a longer wait, up to ``retry_max_delay``.
+    ``retry_deadline`` bounds the total seconds one API call may take,
+    retries included (0: no deadline).
+    """
+
     retry_count: int = 3
     retry_delay: int = 5
+    retry_max_delay: int = 60
+    retry_deadline: int = 0
+    retry_backoff: float = 2.0
+    retry_jitter: float = 0.5
 
 
 class WebhookConfig(NamedTuple):
@@ -75,7 +96,7 @@ class AppConfig(NamedTuple):
 
 _LEAF_FIELDS: Final = (
     "apikey", "secretapikey", "endpoint",
-    "retry_count", "retry_delay",
+    "retry_count", "retry_delay", "retry_max_delay", "retry_deadline",
     "webhook_url", "webhook_template", "webhook_template_file",
 )
 
@@ -83,6 +104,8 @@ _LEAF_DEFAULTS: Final = {
     "endpoint": DEFAULT_ENDPOINT,
     "retry_count": "3",
     "retry_delay": "5",
+    "retry_max_delay": "60",
+    "retry_deadline": "0",
     "webhook_url": "",
     "webhook_template": "",
     "webhook_template_file": "",
@@ -113,6 +136,8 @@ class _Config:
             retry=RetryPolicy(
                 retry_count=int(self.options["retry_count"]),
                 retry_delay=int(self.options["retry_delay"]),
+                retry_max_delay=int(self.options["retry_max_delay"]),
+                retry_deadline=int(self.options["retry_deadline"]),
             ),
             webhook=WebhookConfig(
                 webhook_url=self.options["webhook_url"],
@@ -159,6 +184,8 @@ def extract_config(extract_from: argparse.Namespace | Path) -> AppConfig:
                 retry=RetryPolicy(
                     retry_count=int(content.get("retry_count", 3)),
                     retry_delay=int(content.get("retry_delay", 5)),
+                    retry_max_delay=int(content.get("retry_max_delay", 60)),
+                    retry_deadline=int(content.get("retry_deadline", 0)),
                 ),
                 webhook=WebhookConfig(
                     webhook_url=content.get("webhook_url", ""),
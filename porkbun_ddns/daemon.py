@@ -0,0 +1,106 @@
+"""Multi-domain update cycle for long-running entry points."""
+
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from porkbun_ddns.api import PorkbunAPIClient
+from porkbun_ddns.cache import RecordCache
+from porkbun_ddns.config import Credentials, RetryPolicy
+from porkbun_ddns.lock import DomainLock
+from porkbun_ddns.porkbun_ddns import PorkbunDDNS
+from porkbun_ddns.resolver import PublicIPResolver
+
+logger = logging.getLogger("porkbun_ddns")
+
+
+def parse_domains(spec: str) -> dict[str, list[str]]:
+    """Parse a domain list into ``{domain: subdomains}``.
+
+    Domains are separated by ``;``, each optionally followed by ``:`` and a
+    comma separated list of subdomains, e.g. ``example.com:@,www;example.org``.
+    A domain without subdomains updates its root only. Whitespace is ignored.
+    """
+    domains: dict[str, list[str]] = {}
+    for entry in spec.replace(" ", "").split(";"):
+        if not entry:
+            continue
+        domain, _, subdomains = entry.partition(":")
+        domains.setdefault(domain.lower(), []).extend(
+            s for s in subdomains.split(",") if s)
+    return {domain: subdomains or ["@"] for domain, subdomains in domains.items()}
+
+
+class MultiDomainUpdater:
+    """Updates several domains per cycle from a single process.
+
+    All domains share one :class:`PorkbunAPIClient` (and so one keep-alive
+    connection pool) and one :class:`PublicIPResolver`; the public IPs are
+    resolved once per cycle. Up to ``max_workers`` domains are updated in
+    parallel. An optional :class:`RecordCache` and :class:`DomainLock` are
+    shared by all domains, and ``max_targeted_fqdns``, ``apply_workers`` and
+    ``recheck_writes`` are passed on to every :class:`PorkbunDDNS`.
+    """
+
+    def __init__(
+            self,
+            credentials: Credentials,
+            retry: RetryPolicy,
+            domains: dict[str, list[str]],
+            public_ips: list | None = None,
+            ipv4: bool = True,
+            ipv6: bool = True,
+            max_workers: int = 4,
+            client: PorkbunAPIClient | None = None,
+            resolver: PublicIPResolver | None = None,
+            cache: RecordCache | None = None,
+            max_targeted_fqdns: int = 0,
+            apply_workers: int = 1,
+            lock: DomainLock | None = None,
+            recheck_writes: bool = False,
+    ) -> None:
+        self.client = client or PorkbunAPIClient(credentials, retry)
+        self.resolver = resolver or PublicIPResolver(ipv4=ipv4, ipv6=ipv6)
+        self.static_ips = public_ips
+        self.max_workers = max_workers
+        self.domains = domains
+        self.instances = {
+            domain: PorkbunDDNS(credentials, retry, domain, public_ips=public_ips,
+                                ipv4=ipv4, ipv6=ipv6, client=self.client,
+                                resolver=self.resolver, cache=cache,
+                                max_targeted_fqdns=max_targeted_fqdns,
+                                apply_workers=apply_workers, lock=lock,
+                                recheck_writes=recheck_writes)
+            for domain in domains
+        }
+
+    def run_cycle(self) -> tuple[dict[str, list[dict]], dict[str, Exception]]:
+        """Run one update pass over every domain.
+
+        Returns the recorded changes per domain (domains without changes are
+        omitted) and the error of every domain that failed, and resets each
+        domain's changelog. A failing domain does not stop the others, and
+        the changes it made before failing are returned too, so they can be
+        reported. Only a failure to resolve the public IPs raises.
+        """
+        ips = self.resolver.resolve(self.static_ips)
+        errors: dict[str, Exception] = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                domain: pool.submit(
+                    self.instances[domain].update_many, subdomains, ips)
+                for domain, subdomains in self.domains.items()
+            }
+            for domain, future in futures.items():
+                try:
+                    future.result()
+                except Exception as err:  # noqa: BLE001 - returned to the caller
+                    logger.error("Updating %s failed: %s", domain, err)
+                    errors[domain] = err
+        changes = {}
+        for domain, instance in self.instances.items():
+            if instance.changes:
+                changes[domain] = instance.changes
+                instance.changes = []
+        return changes, errors
@@ -0,0 +1,56 @@
+"""Bounded concurrent execution of a reconciliation plan."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class PlanExecutor:
+    """Runs the intents of a plan on up to ``max_workers`` threads.
+
+    The plan is a list of groups, one per fqdn. The intents of a group run
+    one after another in plan order, so whatever ordering the plan relies on
+    within a record holds; independent groups run concurrently. A failing
+    intent skips the rest of its group while the other groups finish.
+    Results come back in plan order whatever the completion order, so the
+    changelog built from them is deterministic. With ``max_workers`` 1 the
+    plan runs on the calling thread.
+    """
+
+    def __init__(self, max_workers: int = 4) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.max_workers = max_workers
+
+    def run(
+            self,
+            groups: Sequence[Sequence[T]],
+            apply: Callable[[T], R],
+    ) -> tuple[list[R], list[Exception]]:
+        """Apply every intent; the results of the applied ones and the errors.
+
+        Both lists are in plan order.
+        """
+        def run_group(group: Sequence[T]) -> tuple[list[R], Exception | None]:
+            results = []
+            for intent in group:
+                try:
+                    results.append(apply(intent))
+                except Exception as err:  # noqa: BLE001 - handed back to the caller
+                    return results, err
+            return results, None
+
+        groups = [group for group in groups if group]
+        workers = min(self.max_workers, len(groups))
+        if workers <= 1:
+            outcomes = [run_group(group) for group in groups]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                outcomes = list(pool.map(run_group, groups))
+        return ([result for results, _ in outcomes for result in results],
+                [err for _, err in outcomes if err is not None])
@@ -1,6 +1,6 @@
 import logging
-import urllib.request
-import xml.etree.ElementTree as ET
+
+from porkbun_ddns.sources import FritzboxSource
 
 
 def parse_log_level(level: str | None, *, default: int = logging.INFO) -> int:
@@ -62,42 +62,20 @@ def get_ips_from_fritzbox(fritzbox_ip, ip_version=4):
     ------
         urllib.error.URLError: If there is a problem opening the URL.
 
-        ValueError: If the provided `fritzbox_ip` is not a valid IP address.
-
-        AttributeError: If the requested field is not found in the XML response.
+        ValueError: If the response holds no address.
     """
 
-    schema = "GetExternalIPAddress"
-    field = "NewExternalIPAddress"
-
-    if ip_version == 6:
-        schema = "X_AVM_DE_GetExternalIPv6Address"
-        field = "NewExternalIPv6Address"
-
-    req = urllib.request.Request(
-        "http://" + fritzbox_ip + ":49000/igdupnp/control/WANIPConn1")
-    req.add_header("Content-Type", 'text/xml; charset="utf-8"')
-    req.add_header(
-        "SOAPAction", "urn:schemas-upnp-org:service:WANIPConnection:1#" + schema)
-    data = '<?xml version="1.0" encoding="utf-8"?>' + \
-        '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/" s:encodingStyle="http://schemas.xmlsoap.org/soap/encoding/">' + \
-        "<s:Body>" + \
-        '<u:GetExternalIPAddress xmlns:u="urn:schemas-upnp-org:service:WANIPConnection:1" />' + \
-        "</s:Body>" + \
-        "</s:Envelope>"
-    req.data = data.encode("utf8")
-    return ET.fromstring(urllib.request.urlopen(req).read()).find(".//" + field).text
+    return FritzboxSource(fritzbox_ip).external_ip(ip_version)
 
 
 def resolve_fritzbox_public_ips(fritzbox_ip: str, ipv4: bool, ipv6: bool) -> list[str]:
     """Return the Fritzbox external IPs for the enabled address families.
 
+    Both families are asked in parallel over one kept-alive connection.
     Always returns a list; the caller combines it with other IP sources
     rather than appending to a possibly-``None`` value.
     """
-    ips: list[str] = []
-    if ipv4:
-        ips.append(get_ips_from_fritzbox(fritzbox_ip, ip_version=4))
-    if ipv6:
-        ips.append(get_ips_from_fritzbox(fritzbox_ip, ip_version=6))
-    return ips
+    versions = [version for version, enabled in ((4, ipv4), (6, ipv6)) if enabled]
+    if not versions:
+        return []
+    return FritzboxSource(fritzbox_ip).external_ips(versions)
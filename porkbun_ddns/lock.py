@@ -0,0 +1,89 @@
+"""Same-host coordination of concurrent runs through per-domain lockfiles."""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from porkbun_ddns.errors import PorkbunDDNS_Error
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger("porkbun_ddns")
+
+
+class DomainLock:
+    """Lets one run at a time update a domain's records on this host.
+
+    Each domain gets an ``flock`` on ``porkbun-ddns-<domain>.lock`` in
+    ``directory``, so runs for different domains never wait on each other
+    and a lock is released by the kernel even if its holder is killed.
+    Waiting for it gives up with ``PorkbunDDNS_Error`` after ``timeout``
+    seconds. Where ``flock`` is unavailable the lock does nothing. One
+    instance may be shared by the threads updating different domains.
+    ``_clock`` and ``_sleep`` are internal seams for tests.
+    """
+
+    def __init__(
+            self,
+            directory: Path,
+            timeout: float = 60,
+            _clock: Callable[[], float] = time.monotonic,
+            _sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.directory = directory
+        self.timeout = timeout
+        self._clock = _clock
+        self._sleep = _sleep
+        self._guard = threading.Lock()
+        self._held: dict[str, int] = {}
+
+    def path_for(self, domain: str) -> Path:
+        return self.directory / f"porkbun-ddns-{domain}.lock"
+
+    def acquire(self, domain: str) -> None:
+        """Block until this process holds the lock of ``domain``."""
+        if fcntl is None:
+            return
+        path = self.path_for(domain)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        deadline = self._clock() + self.timeout
+        waiting = False
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if self._clock() >= deadline:
+                    os.close(fd)
+                    raise PorkbunDDNS_Error(
+                        f"Another run still holds {path} after {self.timeout}s.")
+                if not waiting:
+                    logger.info("Waiting for another run updating %s.", domain)
+                    waiting = True
+                self._sleep(0.1)
+        with self._guard:
+            self._held[domain] = fd
+
+    def release(self, domain: str) -> None:
+        with self._guard:
+            fd = self._held.pop(domain, None)
+        if fd is not None:
+            os.close(fd)  # drops the flock
+
+    @contextmanager
+    def hold(self, domain: str) -> Iterator[None]:
+        self.acquire(domain)
+        try:
+            yield
+        finally:
+            self.release(domain)
@@ -0,0 +1,99 @@
+"""Wake the update loop on local address changes (Linux rtnetlink)."""
+
+from __future__ import annotations
+
+import logging
+import select
+import socket
+import struct
+import time
+from collections.abc import Callable
+
+logger = logging.getLogger("porkbun_ddns")
+
+# From <linux/rtnetlink.h>.
+RTM_NEWADDR = 20
+RTM_DELADDR = 21
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV6_IFADDR = 0x100
+
+_NLMSGHDR = struct.Struct("=IHHII")  # length, type, flags, seq, pid
+
+
+class AddressWatcher:
+    """Blocks until an interface address is added or removed.
+
+    Subscribes to the rtnetlink IPv4/IPv6 address groups, so it only sees
+    the host's addresses when the container runs with ``network_mode:
+    host``. Raises ``OSError`` where netlink is unavailable (non-Linux).
+    ``_sock`` and ``_clock`` are internal seams for tests.
+    """
+
+    def __init__(
+            self,
+            ipv4: bool = True,
+            ipv6: bool = True,
+            settle: float = 1.0,
+            _sock: socket.socket | None = None,
+            _clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.settle = settle
+        self._clock = _clock
+        if _sock is None:
+            if not hasattr(socket, "AF_NETLINK"):
+                raise OSError("netlink is not supported on this platform")
+            groups = ((RTMGRP_IPV4_IFADDR if ipv4 else 0)
+                      | (RTMGRP_IPV6_IFADDR if ipv6 else 0))
+            _sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW,
+                                  socket.NETLINK_ROUTE)
+            _sock.bind((0, groups))
+        self._sock = _sock
+
+    def wait(self, timeout: float) -> bool:
+        """Wait up to ``timeout`` seconds for an address change.
+
+        Returns True on a change, after letting the burst of events that
+        usually accompanies it settle for ``settle`` seconds, so one
+        reconnect triggers one update. Returns False on timeout.
+        """
+        deadline = self._clock() + timeout
+        while not self._drain(deadline - self._clock()):
+            if self._clock() >= deadline:
+                return False
+        settled = self._clock() + self.settle
+        while self._clock() < settled:
+            self._drain(settled - self._clock())
+        return True
+
+    def close(self) -> None:
+        self._sock.close()
+
+    def _drain(self, timeout: float) -> bool:
+        """Read one datagram; whether it held an address event.
+
+        A failing read (e.g. ENOBUFS when a burst overflowed the socket
+        buffer, losing events) counts as a change, so nothing is missed.
+        """
+        readable, _, _ = select.select([self._sock], [], [], max(timeout, 0))
+        if not readable:
+            return False
+        try:
+            data = self._sock.recv(65536)
+        except OSError as err:
+            logger.warning("Reading address changes failed: %s", err)
+            return True
+        return bool(parse_address_events(data))
+
+
+def parse_address_events(data: bytes) -> list[int]:
+    """The RTM_NEWADDR/RTM_DELADDR message types in a netlink datagram."""
+    events = []
+    offset = 0
+    while offset + _NLMSGHDR.size <= len(data):
+        length, msg_type, _, _, _ = _NLMSGHDR.unpack_from(data, offset)
+        if length < _NLMSGHDR.size:
+            break
+        if msg_type in (RTM_NEWADDR, RTM_DELADDR):
+            events.append(msg_type)
+        offset += (length + 3) & ~3  # NLMSG_ALIGN
+    return events
@@ -1,15 +1,23 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import json
 import logging
 
-from porkbun_ddns.api import PorkbunAPIClient
+from porkbun_ddns.api import AsyncPorkbunAPIClient, PorkbunAPIClient
+from porkbun_ddns.cache import RecordCache
 from porkbun_ddns.config import Credentials, RetryPolicy
-from porkbun_ddns.reconcile import Ensure, reconcile
+from porkbun_ddns.errors import PorkbunDDNS_Error
+from porkbun_ddns.executor import PlanExecutor
+from porkbun_ddns.lock import DomainLock
+from porkbun_ddns.reconcile import Ensure, reconcile_many, record_type_for
 from porkbun_ddns.resolver import PublicIPResolver
 
 logger = logging.getLogger("porkbun_ddns")
 
+PLAN_VERSION = 1
+
 
 class PorkbunDDNS:
     """A class for updating dynamic DNS records for a Porkbun domain.
@@ -25,6 +33,12 @@ class PorkbunDDNS:
             ipv6: bool = True,
             client: PorkbunAPIClient | None = None,
             resolver: PublicIPResolver | None = None,
+            cache: RecordCache | None = None,
+            max_targeted_fqdns: int = 0,
+            apply_workers: int = 1,
+            write_attempts: int = 2,
+            lock: DomainLock | None = None,
+            recheck_writes: bool = False,
     ) -> None:
 
         self.credentials = credentials
@@ -35,16 +49,25 @@ class PorkbunDDNS:
         self.ipv4 = ipv4
         self.ipv6 = ipv6
         self.resolver = resolver or PublicIPResolver(ipv4=ipv4, ipv6=ipv6)
+        self.cache = cache
+        self.max_targeted_fqdns = max_targeted_fqdns
+        self.executor = PlanExecutor(apply_workers)
+        self.write_attempts = max(write_attempts, 1)
+        self.lock = lock
+        self.recheck_writes = recheck_writes
         self.fqdn = self.domain
         self.subdomain = "@"
         self.changes: list = []
+        self.journal: list[dict] = []
 
     def set_subdomain(self, subdomain: str) -> None:
         self.subdomain = subdomain.lower()
-        if self.subdomain == "@":
-            self.fqdn = self.domain
-        else:
-            self.fqdn = f"{self.subdomain}.{self.domain}"
+        self.fqdn = self._fqdn_for(self.subdomain)
+
+    def _fqdn_for(self, subdomain: str) -> str:
+        if subdomain == "@":
+            return self.domain
+        return f"{subdomain}.{self.domain}"
 
     def get_public_ips(self) -> list:
         """Retrieve the public IP addresses of the network.
@@ -57,63 +80,411 @@ class PorkbunDDNS:
         return self.client.retrieve_records(self.domain)
 
     def update_records(self):
-        """Update DNS records for the specified domain.
-
-        Fetches the current records once, derives the reconciliation plan
-        purely with :func:`reconcile`, then executes the ``Ensure`` intents.
-        """
-        records = self.client.retrieve_records(self.domain)
-        ips = self.get_public_ips()
-        actions: list[Ensure] = reconcile(records, ips, self.fqdn)
-        for action in actions:
-            if action.replacing_id is not None:
-                old = next(
-                    r for r in records if r["id"] == action.replacing_id)
-                logger.debug("Update existing entry, with:\n%s", json.dumps(
-                    {"name": self.fqdn, "type": action.record_type,
-                     "content": action.content}))
-                status = self.client.delete_record(
-                    self.domain, action.replacing_id)
-                logger.info(
-                    f"Deleting {old['type']}-Record for {old['name']} with "
-                    f"content: {old['content']}, Status: {status}")
-                status = self.client.create_record(
-                    self.domain, self.subdomain,
-                    action.record_type, action.content)
-                logger.info(
-                    f"Creating {action.record_type}-Record for {self.fqdn} "
-                    f"with content: {action.content}, Status: {status}")
-                self._record_change(
-                    action.record_type, old["content"], action.content)
-            else:
-                logger.debug("Create new record, with:\n%s", json.dumps(
-                    {"name": self.fqdn, "type": action.record_type,
-                     "content": action.content}))
-                status = self.client.create_record(
-                    self.domain, self.subdomain,
-                    action.record_type, action.content)
-                logger.info(
-                    f"Creating {action.record_type}-Record for {self.fqdn} "
-                    f"with content: {action.content}, Status: {status}")
-                self._record_change(action.record_type, None, action.content)
+        """Update DNS records for the current subdomain.
+
+        Equivalent to ``update_many([self.subdomain])``.
+        """
+        self.update_many([self.subdomain])
+
+    def update_many(self, subdomains: list[str] | None = None,
+                    ips: list | None = None) -> None:
+        """Update DNS records for several subdomains in one pass.
+
+        Resolves the public IPs and fetches the current records once, derives
+        the reconciliation plan for every fqdn purely with :func:`reconcile_many`
+        against that single snapshot, then executes the ``Ensure`` intents.
+        ``None`` or an empty list updates the current subdomain only. Pass
+        already resolved ``ips`` to share one resolution between domains.
+        With a ``cache``, a pass whose fqdns were already in sync with the
+        same IPs makes no API call at all. See :meth:`_retrieve` for how the
+        snapshot is fetched. The intents are run by a :class:`PlanExecutor`
+        with ``apply_workers`` threads, one fqdn's intents in plan order;
+        ``changes`` is extended in plan order and the first error is raised
+        once every fqdn has been handled. Every write of the pass is recorded
+        in ``journal``; see :meth:`_apply`. With a ``lock`` the snapshot is
+        fetched and applied while holding the domain's lock, so concurrent
+        runs on this host take turns and the later one finds the records
+        already fixed.
+        """
+        names = self._names(subdomains)
+        self.journal = []
+        if ips is None:
+            ips = self.get_public_ips()
+        if self._is_cached(names, ips):
+            return
+        with self._locked():
+            records = self._retrieve(names, ips)
+            plan = self._plan(records, ips, names)
+            self._update_cache(ips, plan)
+            changes, errors = self.executor.run(
+                [[(subdomain, action) for action in actions] for subdomain, actions in plan],
+                lambda intent: self._apply(records, intent[1], intent[0]))
+        self.changes.extend(change for change in changes if change)
+        if errors:
+            raise errors[0]
+
+    async def update_many_async(
+            self,
+            subdomains: list[str] | None = None,
+            client: AsyncPorkbunAPIClient | None = None,
+            ips: list | None = None,
+    ) -> None:
+        """Asyncio variant of :meth:`update_many`.
+
+        Subdomains are reconciled concurrently; the intents of one fqdn still
+        run in plan order, and ``changes`` is extended in plan order. Pass a
+        shared ``client`` to bound the number of in-flight API calls across
+        several domains updated in one event loop.
+        """
+        client = client or AsyncPorkbunAPIClient(client=self.client)
+        names = self._names(subdomains)
+        self.journal = []
+        if ips is None:
+            ips = await asyncio.to_thread(self.get_public_ips)
+        if self._is_cached(names, ips):
+            return
+
+        async def apply_all(subdomain: str, actions: list[Ensure]):
+            changes = []
+            for action in actions:
+                try:
+                    changes.append(await self._apply_async(
+                        client, records, action, subdomain))
+                except Exception as err:  # noqa: BLE001 - re-raised below
+                    return changes, err
+            return changes, None
+
+        if self.lock:
+            await asyncio.to_thread(self.lock.acquire, self.domain)
+        try:
+            records = await self._retrieve_async(client, names, ips)
+            plan = self._plan(records, ips, names)
+            self._update_cache(ips, plan)
+            outcomes = await asyncio.gather(*(
+                apply_all(subdomain, actions) for subdomain, actions in plan))
+        finally:
+            if self.lock:
+                self.lock.release(self.domain)
+        self.changes.extend(change for changes, _ in outcomes
+                            for change in changes if change)
+        errors = [err for _, err in outcomes if err is not None]
+        if errors:
+            raise errors[0]
+
+    def plan_many(self, subdomains: list[str] | None = None,
+                  ips: list | None = None) -> dict:
+        """The plan :meth:`update_many` would execute, without writing.
+
+        Resolves the public IPs (unless ``ips`` are given), fetches the
+        snapshot as :meth:`_retrieve` does and reconciles it, bypassing the
+        cache. Returns a JSON-serializable dict that :meth:`apply_plan` runs
+        later without recomputing: every intent carries the subdomain it
+        belongs to and the type and content of the record it replaces.
+        """
+        names = self._names(subdomains)
+        if ips is None:
+            ips = self.get_public_ips()
+        records = self._retrieve(names, ips)
+        by_id = {record["id"]: record for record in records}
+        intents = []
+        for subdomain, actions in self._plan(records, ips, names):
+            for action in actions:
+                old = by_id.get(action.replacing_id, {})
+                intents.append({"subdomain": subdomain, **action._asdict(),
+                                "old_type": old.get("type"),
+                                "old_content": old.get("content")})
+        return {"version": PLAN_VERSION, "domain": self.domain,
+                "ips": [str(ip) for ip in ips], "intents": intents}
+
+    def apply_plan(self, plan: dict) -> None:
+        """Execute a plan produced by :meth:`plan_many`.
+
+        The intents are applied as recorded, like :meth:`update_many` does
+        (same executor, changelog and error handling); a record replaced
+        since the plan was made fails its edit rather than being recomputed.
+        """
+        if plan.get("version") != PLAN_VERSION or plan.get("domain") != self.domain:
+            raise PorkbunDDNS_Error(
+                f"The plan is not a version {PLAN_VERSION} plan for {self.domain}.")
+        self.journal = []
+        groups: dict[str, list[tuple[str, Ensure]]] = {}
+        records = []
+        try:
+            for intent in plan["intents"]:
+                action = Ensure(intent["record_type"], intent["fqdn"],
+                                intent["content"], intent["replacing_id"])
+                groups.setdefault(intent["subdomain"], []).append(
+                    (intent["subdomain"], action))
+                if action.replacing_id is not None:
+                    records.append({"id": action.replacing_id, "name": action.fqdn,
+                                    "type": intent["old_type"],
+                                    "content": intent["old_content"]})
+        except (KeyError, TypeError) as err:
+            raise PorkbunDDNS_Error(f"Invalid plan intent: {err!r}") from err
+        if groups and self.cache:
+            self.cache.invalidate(self.domain)
+        with self._locked():
+            changes, errors = self.executor.run(
+                list(groups.values()),
+                lambda intent: self._apply(records, intent[1], intent[0]))
+        self.changes.extend(change for change in changes if change)
+        if errors:
+            raise errors[0]
+
+    def _locked(self) -> contextlib.AbstractContextManager:
+        return self.lock.hold(self.domain) if self.lock else contextlib.nullcontext()
+
+    def _retrieve(self, names: list[str], ips: list) -> list[dict]:
+        """Fetch the snapshot the plan is reconciled against.
+
+        Passes over at most ``max_targeted_fqdns`` subdomains fetch only
+        their own records with retrieveByNameType, so a large zone is never
+        downloaded for a few names; larger passes take one full retrieve.
+        """
+        if len(names) > self.max_targeted_fqdns:
+            return self.client.retrieve_records(self.domain)
+        records = []
+        for subdomain in names:
+            for types in self._lookup_rounds(ips):
+                found = [record for record_type in types
+                         for record in self.client.retrieve_by_name_type(
+                             self.domain, record_type, subdomain)]
+                records.extend(found)
+                if found:
+                    break
+        return records
+
+    async def _retrieve_async(self, client: AsyncPorkbunAPIClient,
+                              names: list[str], ips: list) -> list[dict]:
+        """Asyncio variant of :meth:`_retrieve`; subdomains are fetched
+        concurrently.
+        """
+        if len(names) > self.max_targeted_fqdns:
+            return await client.retrieve_records(self.domain)
+
+        async def retrieve_one(subdomain: str) -> list[dict]:
+            for types in self._lookup_rounds(ips):
+                found = [record for records in await asyncio.gather(*(
+                    client.retrieve_by_name_type(self.domain, record_type, subdomain)
+                    for record_type in types)) for record in records]
+                if found:
+                    return found
+            return []
+
+        return [record for records in await asyncio.gather(*(
+            retrieve_one(subdomain) for subdomain in names)) for record in records]
+
+    @staticmethod
+    def _lookup_rounds(ips: list) -> list[list[str]]:
+        # An fqdn holding an address record cannot also hold a CNAME or
+        # ALIAS, so those are only looked up when no address record exists.
+        return [list(dict.fromkeys(record_type_for(ip) for ip in ips)),
+                ["ALIAS", "CNAME"]]
+
+    def _names(self, subdomains: list[str] | None) -> list[str]:
+        return list(dict.fromkeys(
+            s.lower() for s in subdomains or [self.subdomain]))
+
+    def _is_cached(self, names: list[str], ips: list) -> bool:
+        """Whether the cache shows every fqdn already in sync with ``ips``.
+        """
+        fqdns = [self._fqdn_for(name) for name in names]
+        if not self.cache or not self.cache.is_in_sync(self.domain, fqdns, ips):
+            return False
+        logger.debug("IPs unchanged since the last sync of %s, skipping the API.",
+                     self.domain)
+        for fqdn in fqdns:
+            self._log_up_to_date(fqdn, ips, [])
+        return True
+
+    def _update_cache(self, ips: list,
+                      plan: list[tuple[str, list[Ensure]]]) -> None:
+        """Remember a no-op pass; forget the domain before any write.
+
+        Called before the plan is applied, so a pass that fails partway
+        never leaves the domain marked as in sync with the old IPs.
+        """
+        if not self.cache:
+            return
+        if any(actions for _, actions in plan):
+            self.cache.invalidate(self.domain)
+        else:
+            self.cache.store(self.domain,
+                             [self._fqdn_for(name) for name, _ in plan], ips)
+
+    def _plan(self, records: list[dict], ips: list,
+              names: list[str]) -> list[tuple[str, list[Ensure]]]:
+        """Reconcile every subdomain against the snapshot, indexed once.
+
+        Logs the records that are already up to date and returns the
+        ``(subdomain, intents)`` pairs left to execute.
+        """
+        fqdns = {name: self._fqdn_for(name) for name in names}
+        by_fqdn: dict[str, list[Ensure]] = {fqdn: [] for fqdn in fqdns.values()}
+        for action in reconcile_many(records, dict.fromkeys(by_fqdn, ips)):
+            by_fqdn[action.fqdn].append(action)
+        for fqdn, actions in by_fqdn.items():
+            self._log_up_to_date(fqdn, ips, actions)
+        return [(name, by_fqdn[fqdn]) for name, fqdn in fqdns.items()]
+
+    @staticmethod
+    def _log_up_to_date(fqdn: str, ips: list, actions: list[Ensure]) -> None:
         # Up-to-date log derived from the gap: desired (record_type, content)
         # pairs that produced no Ensure are already correct.
         ensured = {(action.record_type, action.content) for action in actions}
         for ip in ips:
-            record_type = "A" if ip.version == 4 else "AAAA"
+            record_type = record_type_for(ip)
             content = ip.exploded
             if (record_type, content) not in ensured:
-                logger.info(f"{record_type}-Record of {self.fqdn} is up to date!")
+                logger.info(f"{record_type}-Record of {fqdn} is up to date!")
+
+    def _apply(self, records: list[dict], action: Ensure,
+               subdomain: str) -> dict | None:
+        """Execute one ``Ensure`` intent against the API; the change made.
 
-    def _record_change(self, record_type: str, old_ip: str | None, new_ip: str) -> None:
-        """Record a DNS change for the aggregated webhook changelog.
+        A replacement edits the existing record in place, so the name never
+        goes without an address record, and a failed edit leaves the old
+        one untouched. The outcome of every write is checked and journaled;
+        a write that does not report SUCCESS, or raises ``PorkbunDDNS_Error``
+        (the API answers most failures with an HTTP error), is retried up to
+        ``write_attempts`` times in total before ``PorkbunDDNS_Error`` is
+        raised. A create is only retried after re-reading the name shows
+        the first attempt did not land after all. With ``recheck_writes``
+        the target is re-read before the first attempt too, and the intent
+        is skipped (returning ``None``) when another run already wrote it.
         """
-        self.changes.append({
+        old = self._begin(records, action)
+        if self.recheck_writes and self._landed(action, self.client.retrieve_by_name_type(
+                self.domain, action.record_type, subdomain)):
+            return self._skip(action)
+        for attempt in range(1, self.write_attempts + 1):
+            status, error = None, None
+            try:
+                if old is not None:
+                    status = self.client.edit_record(
+                        self.domain, action.replacing_id, subdomain,
+                        action.record_type, action.content)
+                    self._log_edit(old, action, status)
+                elif attempt > 1 and self._landed(action, self.client.retrieve_by_name_type(
+                        self.domain, action.record_type, subdomain)):
+                    status = "SUCCESS"
+                else:
+                    status = self.client.create_record(
+                        self.domain, subdomain, action.record_type, action.content)
+                    self._log_create(action, status)
+            except PorkbunDDNS_Error as err:
+                error = err
+            if self._verify(action, attempt, status, error):
+                return self._change(action.record_type, action.fqdn,
+                                    old["content"] if old else None, action.content)
+        raise self._write_failed(action, status, error) from error
+
+    async def _apply_async(self, client: AsyncPorkbunAPIClient,
+                           records: list[dict], action: Ensure,
+                           subdomain: str) -> dict | None:
+        """Asyncio variant of :meth:`_apply`.
+        """
+        old = self._begin(records, action)
+        if self.recheck_writes and self._landed(action, await client.retrieve_by_name_type(
+                self.domain, action.record_type, subdomain)):
+            return self._skip(action)
+        for attempt in range(1, self.write_attempts + 1):
+            status, error = None, None
+            try:
+                if old is not None:
+                    status = await client.edit_record(
+                        self.domain, action.replacing_id, subdomain,
+                        action.record_type, action.content)
+                    self._log_edit(old, action, status)
+                elif attempt > 1 and self._landed(action, await client.retrieve_by_name_type(
+                        self.domain, action.record_type, subdomain)):
+                    status = "SUCCESS"
+                else:
+                    status = await client.create_record(
+                        self.domain, subdomain, action.record_type, action.content)
+                    self._log_create(action, status)
+            except PorkbunDDNS_Error as err:
+                error = err
+            if self._verify(action, attempt, status, error):
+                return self._change(action.record_type, action.fqdn,
+                                    old["content"] if old else None, action.content)
+        raise self._write_failed(action, status, error) from error
+
+    def _verify(self, action: Ensure, attempt: int, status: str | None,
+                error: PorkbunDDNS_Error | None = None) -> bool:
+        """Journal one write attempt; whether it succeeded.
+        """
+        self.journal.append({
+            "step": "create" if action.replacing_id is None else "edit",
+            **action._asdict(),
+            "attempt": attempt,
+            "status": status,
+            "error": str(error) if error else None,
+        })
+        if status == "SUCCESS":
+            return True
+        if attempt < self.write_attempts:
+            logger.warning(
+                "Writing the %s-Record for %s failed with %s, retrying "
+                "(attempt %s/%s).", action.record_type, action.fqdn,
+                f"error: {error}" if error else f"status {status}",
+                attempt, self.write_attempts)
+        return False
+
+    def _skip(self, action: Ensure) -> None:
+        self.journal.append({"step": "skip", **action._asdict(),
+                             "attempt": 0, "status": None, "error": None})
+        logger.info(f"{action.record_type}-Record of {action.fqdn} was already "
+                    "updated by another run!")
+
+    @staticmethod
+    def _landed(action: Ensure, records: list[dict]) -> bool:
+        return any(record.get("content") == action.content for record in records)
+
+    @staticmethod
+    def _write_failed(action: Ensure, status: str | None,
+                      error: PorkbunDDNS_Error | None) -> PorkbunDDNS_Error:
+        reason = f"Error: {error}" if error else f"Status: {status}"
+        return PorkbunDDNS_Error(
+            f"Failed to write the {action.record_type}-Record for {action.fqdn}, "
+            f"{reason}")
+
+    @staticmethod
+    def _begin(records: list[dict], action: Ensure) -> dict | None:
+        """Log the intent and return the record it replaces, if any.
+        """
+        entry = json.dumps({"name": action.fqdn, "type": action.record_type,
+                            "content": action.content})
+        if action.replacing_id is None:
+            logger.debug("Create new record, with:\n%s", entry)
+            return None
+        logger.debug("Update existing entry, with:\n%s", entry)
+        return next(r for r in records if r["id"] == action.replacing_id)
+
+    @staticmethod
+    def _log_edit(old: dict, action: Ensure, status: str) -> None:
+        logger.info(
+            f"Updating {old['type']}-Record for {old['name']} with "
+            f"content: {old['content']} to {action.record_type}-Record "
+            f"with content: {action.content}, Status: {status}")
+
+    @staticmethod
+    def _log_create(action: Ensure, status: str) -> None:
+        logger.info(
+            f"Creating {action.record_type}-Record for {action.fqdn} "
+            f"with content: {action.content}, Status: {status}")
+
+    @staticmethod
+    def _change(record_type: str, fqdn: str,
+                old_ip: str | None, new_ip: str) -> dict:
+        """A DNS change entry for the aggregated webhook changelog.
+        """
+        return {
             "record_type": record_type,
-            "fqdn": self.fqdn,
+            "fqdn": fqdn,
             "old_ip": old_ip,
             "new_ip": new_ip,
-        })
+        }
 
     def delete_records(self):
             """Delete A and AAAA DNS record for set record.
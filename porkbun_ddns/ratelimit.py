@@ -0,0 +1,54 @@
+"""Client-side rate limiting for the Porkbun API."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+
+
+class TokenBucket:
+    """Token-bucket limiter allowing ``rate`` requests/s with bursts of ``burst``.
+
+    The bucket starts full. Every :meth:`acquire` takes one token, waiting
+    until one has accrued when the bucket is empty. Waiting callers reserve
+    their token up front, so concurrent threads are served in call order
+    without busy-waiting. One instance can be shared by every client and
+    thread of a process; :class:`AsyncPorkbunAPIClient` waits for it on its
+    worker threads. ``_clock`` and ``_sleep`` are internal seams for tests.
+    """
+
+    def __init__(
+            self,
+            rate: float,
+            burst: int = 1,
+            _clock: Callable[[], float] = time.monotonic,
+            _sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.rate = rate
+        self.burst = burst
+        self._clock = _clock
+        self._sleep = _sleep
+        self._tokens = float(burst)
+        self._updated = _clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return the seconds to wait before using it."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(-self._tokens / self.rate, 0.0)
+
+    def acquire(self) -> None:
+        """Block the calling thread until a request may be sent."""
+        wait = self.reserve()
+        if wait > 0:
+            self._sleep(wait)
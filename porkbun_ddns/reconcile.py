@@ -7,17 +7,19 @@ replaced) so the DNS records for an fqdn match the desired IPs. The
 
 from __future__ import annotations
 
+import heapq
 from ipaddress import IPv4Address, IPv6Address
+from operator import itemgetter
 from typing import NamedTuple
 
-__all__ = ["Ensure", "reconcile"]
+__all__ = ["Ensure", "RecordIndex", "reconcile", "reconcile_many", "record_type_for"]
 
 
 class Ensure(NamedTuple):
     """An intent to ensure one DNS record for ``fqdn``.
 
     ``replacing_id`` is ``None`` when the record should be created fresh and
-    set to the id of an existing record that should be deleted and recreated.
+    set to the id of an existing record that should be replaced in place.
     """
 
     record_type: str  # "A" | "AAAA"
@@ -26,6 +28,33 @@ class Ensure(NamedTuple):
     replacing_id: str | None  # None = create-new, set = replace-existing-by-id
 
 
+def record_type_for(ip: IPv4Address | IPv6Address) -> str:
+    """The address record type (``"A"`` or ``"AAAA"``) that holds ``ip``."""
+    return "A" if ip.version == 4 else "AAAA"
+
+
+class RecordIndex:
+    """A snapshot's records keyed by ``(name, type)``, built once per pass.
+
+    Lookups return records in snapshot order, so reconciling against the
+    index decides exactly what a scan of the full list would, while only
+    touching the records of the fqdn at hand.
+    """
+
+    def __init__(self, records: list[dict]) -> None:
+        self._by_key: dict[tuple, list[tuple[int, dict]]] = {}
+        for position, record in enumerate(records):
+            key = (record.get("name"), record.get("type"))
+            self._by_key.setdefault(key, []).append((position, record))
+
+    def lookup(self, fqdn: str, types: tuple[str, ...]) -> list[dict]:
+        """Records of ``fqdn`` with one of ``types``, in snapshot order."""
+        groups = [self._by_key[(fqdn, t)] for t in types if (fqdn, t) in self._by_key]
+        if len(groups) == 1:
+            return [record for _, record in groups[0]]
+        return [record for _, record in heapq.merge(*groups, key=itemgetter(0))]
+
+
 def reconcile(
     existing_records: list[dict],
     desired_ips: list[IPv4Address | IPv6Address],
@@ -37,22 +66,40 @@ def reconcile(
     snapshot is used for every desired ip (frozen semantics), so each ip is
     reconciled against the same starting point.
     """
+    return _reconcile_indexed(RecordIndex(existing_records), desired_ips, fqdn)
+
+
+def reconcile_many(
+    snapshot: list[dict],
+    desired: dict[str, list[IPv4Address | IPv6Address]],
+) -> list[Ensure]:
+    """:func:`reconcile` every ``{fqdn: desired_ips}`` against one snapshot.
+
+    The snapshot is indexed once, so a pass costs O(records + fqdns) instead
+    of O(records x fqdns). Intents are returned grouped by fqdn, in the
+    order of ``desired``.
+    """
+    index = RecordIndex(snapshot)
+    return [action for fqdn, ips in desired.items()
+            for action in _reconcile_indexed(index, ips, fqdn)]
+
+
+def _reconcile_indexed(
+    index: RecordIndex,
+    desired_ips: list[IPv4Address | IPv6Address],
+    fqdn: str,
+) -> list[Ensure]:
     actions: list[Ensure] = []
     replaced_ids: set[str] = set()
     for ip in desired_ips:
-        record_type = "A" if ip.version == 4 else "AAAA"
+        record_type = record_type_for(ip)
         content = ip.exploded
         ensured = False
-        for record in existing_records:
-            if record.get("name") != fqdn:
-                continue
+        for record in index.lookup(fqdn, ("ALIAS", "CNAME", record_type)):
             rid = record.get("id")
             if rid in replaced_ids:
                 continue
-            rtype = record.get("type")
-            if rtype in ("ALIAS", "CNAME") or (
-                rtype == record_type and record.get("content") != content
-            ):
+            if record.get("type") != record_type or record.get("content") != content:
                 # Replace existing: overwrite ALIAS/CNAME or update a stale
                 # record of the same type. A matching same-type record with
                 # equal content is up-to-date and deliberately NOT replaced.
@@ -65,9 +112,8 @@ def reconcile(
         # type exists for the fqdn (ALIAS/CNAME does not count), and no
         # replace already ensured this ip.
         has_type = any(
-            r.get("name") == fqdn and r.get("type") == record_type
-            and r.get("id") not in replaced_ids
-            for r in existing_records
+            r.get("id") not in replaced_ids
+            for r in index.lookup(fqdn, (record_type,))
         )
         if not has_type and not ensured:
             actions.append(Ensure(record_type, fqdn, content, None))
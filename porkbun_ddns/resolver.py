@@ -1,12 +1,19 @@
 from __future__ import annotations
 
 import logging
+import queue
+import threading
+import time
 import urllib.request
 from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from ipaddress import IPv4Address, IPv6Address, ip_address
-from urllib.error import URLError
 
+from porkbun_ddns.breaker import CircuitBreakers
 from porkbun_ddns.errors import PorkbunDDNS_Error
+from porkbun_ddns.sources import PUBLIC_HTTP_PROVIDERS, HttpSource, ProviderHealth
+
+__all__ = ["PUBLIC_HTTP_PROVIDERS", "ProviderHealth", "PublicIPResolver"]
 
 logger = logging.getLogger("porkbun_ddns")
 
@@ -14,20 +21,46 @@ logger = logging.getLogger("porkbun_ddns")
 class PublicIPResolver:
     """Resolves the public IP addresses of the network.
 
-    Two sources: an explicit static override, or public-HTTP discovery. The
-    ``_urlopen`` argument is an internal seam for tests (leading underscore =
-    private, not part of the documented interface).
+    Either an explicit static override, or the chain of ``sources`` (see
+    :mod:`porkbun_ddns.sources`): per IP version the sources are asked in
+    order and the first answer wins, so later sources are never asked once
+    an earlier one knows the address. The resolver waits at most a source's
+    ``timeout`` for it, and with a ``budget`` at most that many seconds for
+    the whole chain of a family; a source that overruns is abandoned.
+    Without ``sources`` the chain is a single :class:`HttpSource` built from
+    ``race``, ``quorum``, ``breakers`` and ``_urlopen``. With ``race`` both
+    families are resolved in parallel. The ``_urlopen`` and ``_clock``
+    arguments are internal seams for tests
+    (leading underscore = private, not part of the documented interface).
     """
 
     def __init__(
             self,
             ipv4: bool = True,
             ipv6: bool = True,
+            race: bool = False,
+            quorum: int = 1,
+            breakers: CircuitBreakers | None = None,
+            sources: list | None = None,
+            budget: float = 0,
             _urlopen: Callable = urllib.request.urlopen,
+            _clock: Callable[[], float] = time.monotonic,
     ) -> None:
         self.ipv4 = ipv4
         self.ipv6 = ipv6
-        self._urlopen = _urlopen
+        self.race = race
+        if sources is None:
+            sources = [HttpSource(race=race, quorum=quorum, breakers=breakers,
+                                  _urlopen=_urlopen, _clock=_clock)]
+        self.sources = sources
+        self.budget = budget
+        self._clock = _clock
+
+    @property
+    def health(self) -> dict[str, ProviderHealth]:
+        """Provider health of the first :class:`HttpSource` in the chain."""
+        return next((source.health for source in self.sources
+                     if isinstance(source, HttpSource)), {})
 
     def resolve(
             self,
@@ -42,7 +75,7 @@ class PublicIPResolver:
         if static_ips:
             public_ips = [x.strip() for x in static_ips]
         else:
-            public_ips = self._from_public_http()
+            public_ips = self._from_sources()
 
         public_ips = list(dict.fromkeys(public_ips))
 
@@ -51,29 +84,58 @@ class PublicIPResolver:
 
         return [ip_address(x) for x in public_ips if not ip_address(x).is_unspecified]
 
-    def _from_public_http(self) -> list[str]:
-        ips = []
-        if self.ipv4:
-            ips.append(self._fetch_first_working(
-                ["https://v4.ident.me",
-                 "https://api.ipify.org",
-                 "https://ipv4.icanhazip.com"]))
-        if self.ipv6:
-            ips.append(self._fetch_first_working(
-                ["https://v6.ident.me",
-                 "https://api6.ipify.org",
-                 "https://ipv6.icanhazip.com"]))
+    def _from_sources(self) -> list[str]:
+        versions = [version for version, enabled
+                    in ((4, self.ipv4), (6, self.ipv6)) if enabled]
+        deadline = self._clock() + self.budget if self.budget > 0 else None
+        if self.race and len(versions) > 1:
+            with ThreadPoolExecutor(max_workers=len(versions)) as pool:
+                ips = list(pool.map(self._fetch_family, versions,
+                                    [deadline] * len(versions)))
+        else:
+            ips = [self._fetch_family(version, deadline) for version in versions]
         return [ip for ip in ips if ip]
 
-    def _fetch_first_working(self, urls: list[str]) -> str | None:
-        for url in urls:
+    def _fetch_family(self, ip_version: int, deadline: float | None = None) -> str | None:
+        for source in self.sources:
+            limit = source.timeout
+            if deadline is not None:
+                remaining = deadline - self._clock()
+                if remaining <= 0:
+                    logger.warning("IP lookup budget of %ss used up before the "
+                                   "%s source.", self.budget, source.name)
+                    return None
+                limit = remaining if limit is None else min(limit, remaining)
+            if ip := self._lookup(source, ip_version, limit):
+                logger.debug("IPv%s Address %s from the %s source.",
+                             ip_version, ip, source.name)
+                return ip
+        return None
+
+    @staticmethod
+    def _lookup(source, ip_version: int, limit: float | None) -> str | None:
+        """Ask ``source``, giving up on it after ``limit`` seconds.
+
+        A limited lookup runs on a daemon thread that is abandoned when it
+        overruns, like the stragglers of a raced HTTP lookup. A source that
+        fails is logged and skipped either way, so the chain falls through
+        to the next one.
+        """
+        def lookup() -> str | None:
             try:
-                response = self._urlopen(url, timeout=30)
-                if response.getcode() == 200:
-                    return response.read().decode("utf-8").strip()
-                logger.warning(
-                    "Failed to retrieve IP Address from %s! HTTP status code: %s",
-                    url, response.getcode())
-            except URLError as err:
-                logger.warning("Error reaching %s! - %s", url, err.reason)
-        return None
\ No newline at end of file
+                return source.lookup(ip_version)
+            except Exception as err:  # noqa: BLE001 - any source failure falls through
+                logger.warning("The %s source failed for IPv%s: %s",
+                               source.name, ip_version, err)
+                return None
+
+        if limit is None:
+            return lookup()
+        result: queue.Queue[str | None] = queue.Queue()
+        threading.Thread(target=lambda: result.put(lookup()), daemon=True).start()
+        try:
+            return result.get(timeout=limit)
+        except queue.Empty:
+            logger.warning("The %s source gave no IPv%s Address within %ss.",
+                           source.name, ip_version, f"{limit:.3g}")
+            return None
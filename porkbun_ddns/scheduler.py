@@ -0,0 +1,77 @@
+"""Adaptive poll interval for the long-running update loop."""
+
+from __future__ import annotations
+
+import random
+import time
+from collections.abc import Callable
+
+
+class AdaptiveScheduler:
+    """Picks the delay before the next update pass.
+
+    Starts at ``min_interval``. Every quiet pass multiplies the interval by
+    ``backoff`` up to ``max_interval``; a pass that changed records or
+    failed drops it back to ``min_interval``, since more changes (a router
+    reconnecting twice) or a recovery are likely to follow soon. The
+    interval is spread by ``jitter`` (a fraction, +/-) so a fleet started
+    together drifts apart, and the duration of the pass is subtracted so
+    the period between pass starts holds steady. ``pass_duration`` and
+    ``next_run`` (on ``_clock``) / ``next_run_at`` (epoch seconds) are kept
+    for monitoring. ``_clock`` and ``_random`` are internal seams for tests.
+    """
+
+    def __init__(
+            self,
+            min_interval: float,
+            max_interval: float,
+            backoff: float = 2.0,
+            jitter: float = 0.1,
+            _clock: Callable[[], float] = time.monotonic,
+            _random: Callable[[], float] = random.random,
+    ) -> None:
+        if not 0 < min_interval <= max_interval:
+            raise ValueError("intervals must satisfy 0 < min_interval <= max_interval")
+        if backoff < 1:
+            raise ValueError("backoff must be at least 1")
+        if not 0 <= jitter < 1:
+            raise ValueError("jitter must be between 0 and 1")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.interval = min_interval
+        self.pass_duration = 0.0
+        self.next_run: float | None = None
+        self._clock = _clock
+        self._random = _random
+        self._started: float | None = None
+
+    @property
+    def adaptive(self) -> bool:
+        """Whether the interval can change at all."""
+        return self.min_interval < self.max_interval
+
+    @property
+    def next_run_at(self) -> float | None:
+        """``next_run`` as a Unix timestamp."""
+        if self.next_run is None:
+            return None
+        return time.time() + self.next_run - self._clock()
+
+    def start_pass(self) -> None:
+        self._started = self._clock()
+
+    def finish_pass(self, changed: bool = False, failed: bool = False) -> float:
+        """Record the outcome of the pass; the seconds to wait before the next."""
+        now = self._clock()
+        self.pass_duration = now - self._started if self._started is not None else 0.0
+        self._started = None
+        if changed or failed:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+        spread = self.interval * self.jitter * (2 * self._random() - 1)
+        delay = max(self.interval + spread - self.pass_duration, 0.0)
+        self.next_run = now + delay
+        return delay
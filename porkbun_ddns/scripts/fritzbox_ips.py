@@ -9,7 +9,7 @@ from __future__ import annotations
 import argparse
 import sys
 
-from porkbun_ddns.helpers import get_ips_from_fritzbox
+from porkbun_ddns.sources import FritzboxSource
 
 
 def main(argv: list[str] | None = None) -> int:
@@ -26,12 +26,9 @@ def main(argv: list[str] | None = None) -> int:
     v4 = not args.v6  # default both; --v6 disables v4
     v6 = not args.v4  # default both; --v4 disables v6
 
-    ips: list[str] = []
+    versions = [version for version, enabled in ((4, v4), (6, v6)) if enabled]
     try:
-        if v4:
-            ips.append(get_ips_from_fritzbox(args.fritzbox_ip, ip_version=4))
-        if v6:
-            ips.append(get_ips_from_fritzbox(args.fritzbox_ip, ip_version=6))
+        ips = FritzboxSource(args.fritzbox_ip).external_ips(versions)
     except Exception as exc:  # noqa: BLE001 - script entry point, catch-all is intentional
         print(f"Failed to obtain IP from Fritz!Box: {exc}", file=sys.stderr)
         return 1
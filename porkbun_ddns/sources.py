@@ -0,0 +1,819 @@
+"""Public IP sources, asked in order by :class:`PublicIPResolver`.
+
+A source has a ``name``, a ``timeout`` (seconds the resolver waits for its
+``lookup``, None for no limit of its own) and ``lookup(ip_version)``,
+returning the address to publish for that IP version or None when it has
+none. :data:`SOURCES` registers them by name for :func:`build_chain`.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import random
+import shlex
+import socket
+import struct
+import subprocess
+import threading
+import time
+import urllib.request
+import xml.etree.ElementTree as ET
+from collections import Counter
+from collections.abc import Callable, Iterable, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from ipaddress import IPv6Address, IPv6Network, ip_address
+from pathlib import Path
+from typing import Final
+from urllib.error import URLError
+from urllib.parse import urljoin
+
+from porkbun_ddns.breaker import CircuitBreakers
+from porkbun_ddns.transport import HTTPConnectionPool
+
+logger = logging.getLogger("porkbun_ddns")
+
+PUBLIC_HTTP_PROVIDERS: Final = {
+    4: ["https://v4.ident.me",
+        "https://api.ipify.org",
+        "https://ipv4.icanhazip.com"],
+    6: ["https://v6.ident.me",
+        "https://api6.ipify.org",
+        "https://ipv6.icanhazip.com"],
+}
+
+IF_INET6_PATH = Path("/proc/net/if_inet6")
+ROUTE_PATH = Path("/proc/net/route")
+
+SSDP_ADDRESS: Final = ("239.255.255.250", 1900)
+NATPMP_PORT: Final = 5351
+
+# WAN connection services of an Internet Gateway Device, preferred first.
+IGD_SERVICES: Final = (
+    "urn:schemas-upnp-org:service:WANIPConnection:2",
+    "urn:schemas-upnp-org:service:WANIPConnection:1",
+    "urn:schemas-upnp-org:service:WANPPPConnection:1",
+)
+
+# ifa_flags from <linux/if_addr.h> that make an address unfit for DNS.
+_IFA_F_TEMPORARY = 0x01
+_IFA_F_DADFAILED = 0x08
+_IFA_F_DEPRECATED = 0x20
+_IFA_F_TENTATIVE = 0x40
+_UNFIT_FLAGS = _IFA_F_TEMPORARY | _IFA_F_DADFAILED | _IFA_F_DEPRECATED | _IFA_F_TENTATIVE
+
+_SCOPE_GLOBAL = 0x00
+
+# DNS record types and the resolvers that answer with the asker's address.
+# The family of the answer is the family of the transport, so every entry
+# names one server per IP version.
+TYPE_A, TYPE_AAAA, TYPE_TXT = 1, 28, 16
+
+DNS_PROVIDERS: Final = {
+    "opendns": {
+        4: ("208.67.222.222", "myip.opendns.com", TYPE_A),
+        6: ("2620:119:35::35", "myip.opendns.com", TYPE_AAAA),
+    },
+    "google": {
+        4: ("216.239.32.10", "o-o.myaddr.l.google.com", TYPE_TXT),
+        6: ("2001:4860:4802:32::a", "o-o.myaddr.l.google.com", TYPE_TXT),
+    },
+}
+
+_DNS_HEADER = struct.Struct("!HHHHHH")  # id, flags, qd, an, ns, ar counts
+_DNS_FLAG_QR = 0x8000
+_DNS_FLAG_TC = 0x0200
+_DNS_FLAG_RD = 0x0100
+
+
+class ProviderHealth:
+    """Rolling health of one IP-echo provider.
+
+    Keeps exponentially weighted moving averages of the response latency and
+    the error rate. ``score`` is the expected cost of asking the provider in
+    seconds, counting an error as a full ``timeout``; lower is better and a
+    provider that has never been asked scores 0 so it gets measured.
+    """
+
+    def __init__(self, alpha: float = 0.3, timeout: float = 30) -> None:
+        self.alpha = alpha
+        self.timeout = timeout
+        self.latency = 0.0
+        self.error_rate = 0.0
+        self.samples = 0
+
+    def record(self, ok: bool, latency: float) -> None:
+        """Fold one answer (or failure) into the averages."""
+        if self.samples == 0:
+            self.latency = latency
+            self.error_rate = 0.0 if ok else 1.0
+        else:
+            self.latency += self.alpha * (latency - self.latency)
+            self.error_rate += self.alpha * ((0.0 if ok else 1.0) - self.error_rate)
+        self.samples += 1
+
+    @property
+    def score(self) -> float:
+        return self.latency + self.error_rate * self.timeout
+
+    @property
+    def healthy(self) -> bool:
+        return self.error_rate < 0.5
+
+
+class HttpSource:
+    """Public-HTTP discovery through the IP-echo services in ``providers``.
+
+    By default the providers of a family are tried one after another; with
+    ``race`` all of them are queried concurrently and the first valid answer
+    wins. With ``quorum`` > 1 an address is only accepted once that many
+    providers agree on it, so a single provider answering with e.g. a proxy
+    address cannot cause record churn. Every answer updates the provider's
+    :class:`ProviderHealth` in ``health``; providers are asked fastest and
+    healthiest first, and unhealthy ones only after all healthy ones.
+    Providers whose host has an open circuit in the optional ``breakers``
+    are skipped without a request. The ``_urlopen`` and ``_clock`` arguments
+    are internal seams for tests.
+    """
+
+    name = "http"
+
+    def __init__(
+            self,
+            providers: Mapping[int, list[str]] = PUBLIC_HTTP_PROVIDERS,
+            race: bool = False,
+            quorum: int = 1,
+            breakers: CircuitBreakers | None = None,
+            timeout: float | None = None,
+            _urlopen: Callable = urllib.request.urlopen,
+            _clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not 1 <= quorum <= min(len(urls) for urls in providers.values()):
+            raise ValueError(f"quorum must be between 1 and the number of providers, got {quorum}")
+        self.providers = providers
+        self.race = race
+        self.quorum = quorum
+        self.breakers = breakers
+        self.timeout = timeout
+        self.health: dict[str, ProviderHealth] = {}
+        self._health_lock = threading.Lock()
+        self._urlopen = _urlopen
+        self._clock = _clock
+
+    def lookup(self, ip_version: int) -> str | None:
+        """The address to publish for ``ip_version``, or None."""
+        urls = self._ranked(self.providers[ip_version])
+        if self.race:
+            answers = self._ask_concurrently(urls, ip_version)
+        else:
+            answers = (
+                (url, self._fetch(url, ip_version)) for url in urls)
+        votes: Counter[str] = Counter()
+        asked: dict[str, str | None] = {}
+        for url, ip in answers:
+            asked[url] = ip
+            if ip is None:
+                continue
+            votes[ip] += 1
+            if votes[ip] >= self.quorum:
+                self._penalize_dissenters(asked, ip)
+                return ip
+        if votes:
+            logger.warning(
+                "No quorum of %s providers for the IPv%s Address, got: %s",
+                self.quorum, ip_version, dict(votes))
+        return None
+
+    def _ranked(self, urls: list[str]) -> list[str]:
+        """Order providers healthy first, then by score (stable)."""
+        with self._health_lock:
+            health = {url: self.health.get(url) for url in urls}
+        return sorted(urls, key=lambda url: (
+            health[url] is not None and not health[url].healthy,
+            health[url].score if health[url] else 0.0))
+
+    def _penalize_dissenters(self, asked: dict[str, str | None], accepted: str) -> None:
+        """Count a provider that disagreed with the quorum as an error."""
+        if self.quorum == 1:
+            return
+        with self._health_lock:
+            for url, ip in asked.items():
+                if ip is not None and ip != accepted:
+                    self.health[url].record(False, self.health[url].latency)
+
+    def _ask_concurrently(self, urls: list[str], ip_version: int):
+        """Query every provider concurrently, yielding answers as they arrive.
+
+        Providers run on daemon threads; once the caller stops consuming, the
+        stragglers are abandoned and their results discarded, so a blackholed
+        provider neither delays the pass nor the interpreter exit.
+        """
+        results: queue.Queue[tuple[str, str | None]] = queue.Queue()
+
+        def fetch(url: str) -> None:
+            ip = None
+            try:
+                ip = self._fetch(url, ip_version)
+            finally:
+                results.put((url, ip))
+
+        for url in urls:
+            threading.Thread(target=fetch, args=(url,), daemon=True).start()
+        for _ in urls:
+            yield results.get()
+
+    def _fetch(self, url: str, ip_version: int) -> str | None:
+        """Ask one provider and record its health."""
+        breaker = self.breakers.for_url(url) if self.breakers else None
+        if breaker and not breaker.allow():
+            logger.debug("Circuit for %s is open, skipping it.", breaker.name)
+            return None
+        start = self._clock()
+        ip = self._ask(url, ip_version)
+        if breaker:
+            if ip is None:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+        with self._health_lock:
+            self.health.setdefault(url, ProviderHealth()).record(
+                ip is not None, self._clock() - start)
+        return ip
+
+    def _ask(self, url: str, ip_version: int) -> str | None:
+        """Returns the provider's answer if it is an IP of ``ip_version``."""
+        try:
+            response = self._urlopen(url, timeout=30)
+            if response.getcode() != 200:
+                logger.warning(
+                    "Failed to retrieve IP Address from %s! HTTP status code: %s",
+                    url, response.getcode())
+                return None
+            text = response.read().decode("utf-8").strip()
+        except URLError as err:
+            logger.warning("Error reaching %s! - %s", url, err.reason)
+            return None
+        except OSError as err:  # e.g. a read timeout after the connect succeeded
+            logger.warning("Error reaching %s! - %s", url, err)
+            return None
+        try:
+            if ip_address(text).version == ip_version:
+                return text
+        except ValueError:
+            pass
+        logger.warning("Invalid IPv%s Address from %s: %r", ip_version, url, text)
+        return None
+
+
+class InterfaceSource:
+    """The global IPv6 address the host itself owns, read locally.
+
+    Lists the addresses in ``/proc/net/if_inet6`` (Linux) and keeps the
+    globally routable ones that are neither temporary (privacy extensions),
+    deprecated, tentative nor failed duplicate detection. ``interfaces`` and
+    ``prefixes`` optionally narrow the choice; the first remaining address
+    wins. IPv4 is never answered: hosts rarely own their public IPv4
+    address, so that family is left to the next source. In Docker this
+    needs ``network_mode: host`` to see the host's interfaces. ``_path`` is
+    an internal seam for tests.
+    """
+
+    name = "interface"
+
+    def __init__(
+            self,
+            interfaces: Iterable[str] = (),
+            prefixes: Iterable[str] = (),
+            timeout: float | None = None,
+            _path: Path = IF_INET6_PATH,
+    ) -> None:
+        self.interfaces = list(interfaces)
+        self.prefixes = [IPv6Network(prefix, strict=False) for prefix in prefixes]
+        self.timeout = timeout
+        self._path = _path
+
+    def lookup(self, ip_version: int) -> str | None:
+        """The address to publish for ``ip_version``, or None."""
+        if ip_version != 6:
+            return None
+        addresses = self.addresses()
+        if not addresses:
+            logger.debug("No usable global IPv6 address on the local interfaces.")
+            return None
+        return str(addresses[0])
+
+    def addresses(self) -> list[IPv6Address]:
+        """Every usable address, ordered by ``interfaces`` then as listed."""
+        try:
+            lines = self._path.read_text().splitlines()
+        except OSError as err:
+            logger.warning("Cannot list local IPv6 addresses: %s", err)
+            return []
+        found: list[tuple[str, IPv6Address]] = []
+        for line in lines:
+            fields = line.split()
+            if len(fields) != 6:
+                continue
+            address_hex, _, _, scope, flags, interface = fields
+            try:
+                address = IPv6Address(bytes.fromhex(address_hex))
+                scope_value, flags_value = int(scope, 16), int(flags, 16)
+            except ValueError:
+                continue
+            if (scope_value != _SCOPE_GLOBAL or flags_value & _UNFIT_FLAGS
+                    or not address.is_global):
+                continue
+            if self.interfaces and interface not in self.interfaces:
+                continue
+            if self.prefixes and not any(address in p for p in self.prefixes):
+                continue
+            found.append((interface, address))
+        if self.interfaces:
+            found.sort(key=lambda entry: self.interfaces.index(entry[0]))
+        return [address for _, address in found]
+
+
+class DnsSource:
+    """The public address as seen by a DNS server, in one UDP round trip.
+
+    ``provider`` picks an entry of :data:`DNS_PROVIDERS`: OpenDNS answers
+    an A/AAAA query for ``myip.opendns.com``, Google's authoritative server
+    a TXT query for ``o-o.myaddr.l.google.com``. ``servers`` overrides the
+    server per IP version with a ``(host, port)`` pair. A lost packet,
+    an error reply or an unparsable answer yields None, so the next source
+    is asked. ``_random`` is an internal seam for tests.
+    """
+
+    name = "dns"
+
+    def __init__(
+            self,
+            provider: str = "opendns",
+            servers: Mapping[int, tuple[str, int]] | None = None,
+            timeout: float = 2.0,
+            _random: Callable[[int], int] = random.getrandbits,
+    ) -> None:
+        if provider not in DNS_PROVIDERS:
+            raise ValueError(f"Unknown DNS provider {provider!r}, "
+                             f"expected one of {', '.join(DNS_PROVIDERS)}")
+        self.provider = provider
+        self.servers = {version: (host, 53)
+                        for version, (host, _, _) in DNS_PROVIDERS[provider].items()}
+        self.servers.update(servers or {})
+        self.timeout = timeout
+        self._random = _random
+
+    def lookup(self, ip_version: int) -> str | None:
+        """The address to publish for ``ip_version``, or None."""
+        _, qname, qtype = DNS_PROVIDERS[self.provider][ip_version]
+        server = self.servers[ip_version]
+        qid = self._random(16)
+        family = socket.AF_INET if ip_version == 4 else socket.AF_INET6
+        try:
+            with socket.socket(family, socket.SOCK_DGRAM) as sock:
+                sock.settimeout(self.timeout)
+                sock.connect(server)
+                sock.send(build_query(qid, qname, qtype))
+                while True:  # drop stray datagrams with another id
+                    data = sock.recv(4096)
+                    if len(data) >= 2 and struct.unpack_from("!H", data)[0] == qid:
+                        break
+            answers = parse_answers(data, qtype)
+        except (OSError, ValueError) as err:
+            logger.warning("DNS lookup of %s at %s failed: %s", qname, server[0], err)
+            return None
+        for answer in answers:
+            try:
+                ip = ip_address(answer)
+            except ValueError:
+                continue  # e.g. Google's "edns0-client-subnet ..." TXT
+            if ip.version == ip_version:
+                return str(ip)
+        logger.warning("DNS lookup of %s at %s returned no IPv%s Address.",
+                       qname, server[0], ip_version)
+        return None
+
+
+def build_query(qid: int, qname: str, qtype: int) -> bytes:
+    """A recursive DNS query for ``qname``/``qtype`` (class IN)."""
+    question = b"".join(bytes([len(label)]) + label
+                        for label in qname.encode("ascii").split(b"."))
+    return (_DNS_HEADER.pack(qid, _DNS_FLAG_RD, 1, 0, 0, 0)
+            + question + b"\0" + struct.pack("!HH", qtype, 1))
+
+
+def parse_answers(data: bytes, qtype: int) -> list[str]:
+    """The ``qtype`` answers of a DNS response, as text.
+
+    A and AAAA records become addresses, TXT records their strings.
+    Raises ``ValueError`` on a malformed, truncated or error response.
+    """
+    try:
+        _, flags, qdcount, ancount, _, _ = _DNS_HEADER.unpack_from(data)
+        if not flags & _DNS_FLAG_QR:
+            raise ValueError("not a DNS response")
+        if flags & _DNS_FLAG_TC:
+            raise ValueError("DNS response truncated")
+        if rcode := flags & 0xF:
+            raise ValueError(f"DNS error code {rcode}")
+        offset = _DNS_HEADER.size
+        for _ in range(qdcount):
+            offset = _skip_name(data, offset) + 4
+        answers = []
+        for _ in range(ancount):
+            offset = _skip_name(data, offset)
+            rtype, _, _, rdlength = struct.unpack_from("!HHIH", data, offset)
+            offset += 10
+            rdata = data[offset:offset + rdlength]
+            if len(rdata) != rdlength:
+                raise ValueError("DNS record truncated")
+            offset += rdlength
+            if rtype != qtype:
+                continue  # e.g. a CNAME in front of the answer
+            if rtype in (TYPE_A, TYPE_AAAA):
+                answers.append(str(ip_address(rdata)))
+            elif rtype == TYPE_TXT:
+                answers.append(_txt_strings(rdata))
+        return answers
+    except (struct.error, IndexError) as err:
+        raise ValueError(f"malformed DNS response: {err}") from err
+
+
+def _skip_name(data: bytes, offset: int) -> int:
+    """The offset just past the (possibly compressed) name at ``offset``."""
+    while True:
+        length = data[offset]
+        if length & 0xC0 == 0xC0:  # pointer, ends the name
+            return offset + 2
+        if length == 0:
+            return offset + 1
+        offset += length + 1
+
+
+def _txt_strings(rdata: bytes) -> str:
+    """The concatenated character-strings of a TXT record."""
+    parts, offset = [], 0
+    while offset < len(rdata):
+        length = rdata[offset]
+        parts.append(rdata[offset + 1:offset + 1 + length])
+        offset += length + 1
+    return b"".join(parts).decode("ascii", "replace")
+
+
+class CommandSource:
+    """The first address of the family in the output of a command.
+
+    ``command`` is an argument list or a string split like a shell would;
+    it runs without a shell, once per lookup, and may print several
+    addresses separated by whitespace or commas, e.g. both families. A
+    non-zero exit status or ``timeout`` seconds without exiting yield None.
+    """
+
+    name = "command"
+
+    def __init__(self, command: str | list[str], timeout: float | None = 10) -> None:
+        self.command = shlex.split(command) if isinstance(command, str) else list(command)
+        self.timeout = timeout
+
+    def lookup(self, ip_version: int) -> str | None:
+        """The address to publish for ``ip_version``, or None."""
+        try:
+            result = subprocess.run(self.command, capture_output=True, text=True,
+                                    timeout=self.timeout, check=False)
+        except (OSError, subprocess.SubprocessError) as err:
+            logger.warning("IP command %s failed: %s", self.command[0], err)
+            return None
+        if result.returncode != 0:
+            logger.warning("IP command %s exited with %s: %s", self.command[0],
+                           result.returncode, result.stderr.strip())
+            return None
+        for token in result.stdout.replace(",", " ").split():
+            try:
+                ip = ip_address(token)
+            except ValueError:
+                continue
+            if ip.version == ip_version:
+                return str(ip)
+        return None
+
+
+class FritzboxSource:
+    """The external addresses of a Fritz!Box, asked over its IGD SOAP API.
+
+    The requests go over a kept-alive connection of ``transport``, which is
+    reused across cycles as long as they are shorter than the pool's
+    ``idle_timeout``, and give up after ``timeout`` seconds. Both families are fetched in parallel on the
+    first lookup; the other family's answer is kept for ``_FRESH_FOR``
+    seconds so the resolver's next lookup in the same pass reuses it.
+    ``ipv4``/``ipv6`` say which families to fetch. ``_clock`` is an
+    internal seam for tests.
+    """
+
+    name = "fritzbox"
+
+    _CONTROL_PATH = "/igdupnp/control/WANIPConn1"
+    _SERVICE = "urn:schemas-upnp-org:service:WANIPConnection:1"
+    _ACTIONS: Final = {
+        4: ("GetExternalIPAddress", "NewExternalIPAddress"),
+        6: ("X_AVM_DE_GetExternalIPv6Address", "NewExternalIPv6Address"),
+    }
+    _FRESH_FOR = 10.0
+
+    def __init__(
+            self,
+            host: str,
+            port: int = 49000,
+            ipv4: bool = True,
+            ipv6: bool = True,
+            timeout: float | None = 5,
+            transport: HTTPConnectionPool | None = None,
+            _clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.versions = [version for version, enabled in ((4, ipv4), (6, ipv6)) if enabled]
+        self.timeout = timeout
+        self.transport = transport or HTTPConnectionPool()
+        self._clock = _clock
+        self._lock = threading.Lock()
+        self._fetched: dict[int, tuple[str | None, float]] = {}
+
+    @property
+    def control_url(self) -> str:
+        host = f"[{self.host}]" if ":" in self.host else self.host
+        return f"http://{host}:{self.port}{self._CONTROL_PATH}"
+
+    def lookup(self, ip_version: int) -> str | None:
+        """The address to publish for ``ip_version``, or None."""
+        with self._lock:
+            ip, fetched_at = self._fetched.pop(ip_version, (None, None))
+            if fetched_at is not None and self._clock() - fetched_at <= self._FRESH_FOR:
+                return ip
+            versions = sorted({ip_version, *self.versions})
+            now = self._clock()
+            answers = self._fetch_all(versions)
+            self._fetched = {version: (answers[version], now)
+                             for version in versions if version != ip_version}
+            return answers[ip_version]
+
+    def external_ip(self, ip_version: int = 4) -> str:
+        """Ask the Fritz!Box for its external address of ``ip_version``.
+
+        Raises:
+        ------
+            urllib.error.URLError: If the Fritz!Box cannot be reached.
+
+            ValueError: If the answer holds no address.
+        """
+        action, field = self._ACTIONS[ip_version]
+        answer = _soap_call(self.transport, self.control_url, self._SERVICE, action,
+                            timeout=self.timeout or 30)
+        if not answer.get(field):
+            raise ValueError(f"no {field} in the {action} response")
+        return answer[field]
+
+    def external_ips(self, versions: Iterable[int] = (4, 6)) -> list[str]:
+        """:meth:`external_ip` for each of ``versions``, asked in parallel."""
+        versions = list(versions)
+        with ThreadPoolExecutor(max_workers=max(len(versions), 1)) as pool:
+            return list(pool.map(self.external_ip, versions))
+
+    def _fetch_all(self, versions: list[int]) -> dict[int, str | None]:
+        def fetch(version: int) -> str | None:
+            try:
+                return self.external_ip(version)
+            except (OSError, ValueError, ET.ParseError) as err:
+                logger.warning("Failed to get the IPv%s Address from the "
+                               "Fritz!Box at %s: %s", version, self.host, err)
+                return None
+
+        with ThreadPoolExecutor(max_workers=len(versions)) as pool:
+            return dict(zip(versions, pool.map(fetch, versions)))
+
+
+def _soap_call(
+        transport: HTTPConnectionPool,
+        control_url: str,
+        service: str,
+        action: str,
+        timeout: float = 30,
+) -> dict[str, str]:
+    """Invoke a UPnP SOAP ``action`` without arguments; its out arguments by name."""
+    body = ('<?xml version="1.0" encoding="utf-8"?>'
+            '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/" '
+            's:encodingStyle="http://schemas.xmlsoap.org/soap/encoding/">'
+            f'<s:Body><u:{action} xmlns:u="{service}" /></s:Body>'
+            '</s:Envelope>')
+    data = transport.post(control_url, body.encode("utf-8"), timeout=timeout, headers={
+        "Content-Type": 'text/xml; charset="utf-8"',
+        "SOAPAction": f"{service}#{action}",
+    })
+    for element in ET.fromstring(data).iter():
+        if element.tag.rpartition("}")[2] == action + "Response":
+            return {child.tag.rpartition("}")[2]: (child.text or "").strip()
+                    for child in element}
+    raise ValueError(f"no {action}Response in the SOAP answer")
+
+
+class UpnpSource:
+    """The external IPv4 address of a UPnP Internet Gateway Device.
+
+    Finds the router with an SSDP search (or uses the description URL in
+    ``location``), reads its device description for the control URL of the
+    WAN connection service and asks ``GetExternalIPAddress`` over a
+    kept-alive connection of ``transport``. The control URL is cached
+    between cycles and only discovered again after a failed request. IGD
+    has no IPv6 equivalent, so IPv6 is left to the next source. In Docker
+    the SSDP multicast needs ``network_mode: host``. ``_ssdp_address`` is
+    an internal seam for tests.
+    """
+
+    name = "upnp"
+
+    def __init__(
+            self,
+            location: str | None = None,
+            timeout: float | None = 3,
+            transport: HTTPConnectionPool | None = None,
+            _ssdp_address: tuple[str, int] = SSDP_ADDRESS,
+    ) -> None:
+        self.location = location
+        self.timeout = timeout
+        self.transport = transport or HTTPConnectionPool()
+        self._ssdp_address = _ssdp_address
+        self._lock = threading.Lock()
+        self._control: tuple[str, str] | None = None
+
+    def lookup(self, ip_version: int) -> str | None:
+        """The address to publish for ``ip_version``, or None."""
+        if ip_version != 4:
+            return None
+        with self._lock:
+            cached = self._control is not None
+            for _ in range(2 if cached else 1):
+                try:
+                    if self._control is None:
+                        self._control = self._discover()
+                    control_url, service = self._control
+                    answer = _soap_call(self.transport, control_url, service,
+                                        "GetExternalIPAddress", timeout=self.timeout or 30)
+                    ip = ip_address(answer.get("NewExternalIPAddress", ""))
+                except (OSError, ValueError, ET.ParseError) as err:
+                    logger.warning("UPnP IGD lookup failed: %s", err)
+                    self._control = None  # discover again, once
+                    continue
+                if ip.version == 4 and not ip.is_unspecified:
+                    return str(ip)
+                logger.warning("UPnP IGD reported no external IPv4 Address: %s", ip)
+                return None
+        return None
+
+    def _discover(self) -> tuple[str, str]:
+        """The control URL and service type of the gateway's WAN connection."""
+        location = self.location or self._search()
+        with urllib.request.urlopen(location, timeout=self.timeout or 30) as response:
+            description = ET.fromstring(response.read())
+        base = location
+        services = {}
+        for element in description.iter():
+            tag = element.tag.rpartition("}")[2]
+            if tag == "URLBase" and element.text:
+                base = element.text.strip()
+            elif tag == "service":
+                fields = {child.tag.rpartition("}")[2]: (child.text or "").strip()
+                          for child in element}
+                services[fields.get("serviceType")] = fields.get("controlURL", "")
+        for service in IGD_SERVICES:
+            if services.get(service):
+                control_url = urljoin(base, services[service])
+                logger.debug("UPnP IGD control URL: %s (%s)", control_url, service)
+                return control_url, service
+        raise ValueError(f"no WAN connection service in {location}")
+
+    def _search(self) -> str:
+        """The description URL of the first IGD answering an SSDP search."""
+        request = ("M-SEARCH * HTTP/1.1\r\n"
+                   f"HOST: {SSDP_ADDRESS[0]}:{SSDP_ADDRESS[1]}\r\n"
+                   'MAN: "ssdp:discover"\r\n'
+                   "MX: 1\r\n"
+                   "ST: urn:schemas-upnp-org:device:InternetGatewayDevice:1\r\n"
+                   "\r\n").encode("ascii")
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 2)
+            sock.settimeout(self.timeout or 30)
+            sock.sendto(request, self._ssdp_address)
+            while True:  # until an answer with a location, or the timeout
+                data, _ = sock.recvfrom(4096)
+                for line in data.decode("latin-1").split("\r\n")[1:]:
+                    key, _, value = line.partition(":")
+                    if key.strip().lower() == "location" and value.strip():
+                        return value.strip()
+
+
+class NatPmpSource:
+    """The external IPv4 address from a NAT-PMP gateway, in one UDP round trip.
+
+    Asks ``gateway`` (by default the host's default route) for its public
+    address (RFC 6886, opcode 0). Routers without NAT-PMP do not answer,
+    so keep ``timeout`` short and put the next source after it. IPv6 is
+    left to the next source. ``_route_path`` is an internal seam for tests.
+    """
+
+    name = "natpmp"
+
+    def __init__(
+            self,
+            gateway: str | None = None,
+            port: int = NATPMP_PORT,
+            timeout: float | None = 1,
+            _route_path: Path = ROUTE_PATH,
+    ) -> None:
+        self.gateway = gateway
+        self.port = port
+        self.timeout = timeout
+        self._route_path = _route_path
+
+    def lookup(self, ip_version: int) -> str | None:
+        """The address to publish for ``ip_version``, or None."""
+        if ip_version != 4:
+            return None
+        gateway = self.gateway or default_gateway(self._route_path)
+        if gateway is None:
+            logger.warning("NAT-PMP: no default gateway found.")
+            return None
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+                sock.settimeout(self.timeout or 30)
+                sock.connect((gateway, self.port))
+                sock.send(b"\0\0")  # version 0, opcode 0: external address
+                data = sock.recv(16)
+        except OSError as err:
+            logger.warning("NAT-PMP request to %s failed: %s", gateway, err)
+            return None
+        if len(data) < 12 or data[:2] != b"\0\x80":
+            logger.warning("NAT-PMP: unexpected answer from %s: %r", gateway, data)
+            return None
+        result, = struct.unpack_from("!H", data, 2)
+        if result != 0:
+            logger.warning("NAT-PMP: %s answered with result code %s", gateway, result)
+            return None
+        ip = ip_address(data[8:12])
+        return None if ip.is_unspecified else str(ip)
+
+
+def default_gateway(route_path: Path = ROUTE_PATH) -> str | None:
+    """The IPv4 gateway of the default route, read from ``/proc/net/route``."""
+    try:
+        lines = route_path.read_text().splitlines()[1:]
+    except OSError:
+        return None
+    for line in lines:
+        fields = line.split()
+        try:
+            if len(fields) > 3 and fields[1] == "00000000" and int(fields[3], 16) & 0x2:
+                return str(ip_address(bytes.fromhex(fields[2])[::-1]))  # little endian
+        except ValueError:
+            continue
+    return None
+
+
+SOURCES: Final[dict[str, Callable]] = {
+    "http": HttpSource,
+    "interface": InterfaceSource,
+    "dns": DnsSource,
+    "command": CommandSource,
+    "fritzbox": FritzboxSource,
+    "upnp": UpnpSource,
+    "natpmp": NatPmpSource,
+}
+
+
+def build_chain(spec: str, options: Mapping[str, Mapping] | None = None) -> list:
+    """The sources of a chain ``spec`` such as ``"interface,dns:2,http"``.
+
+    Entries name a source in :data:`SOURCES`, optionally followed by a
+    timeout in seconds after a colon. ``options`` maps a source name to
+    the keyword arguments for its constructor.
+
+    Raises:
+    ------
+        ValueError: On an unknown or unconfigured source name, or an
+            invalid timeout.
+    """
+    options = options or {}
+    chain = []
+    for entry in spec.split(","):
+        name, _, timeout = entry.strip().partition(":")
+        name = name.lower()
+        if name not in SOURCES:
+            raise ValueError(f"Unknown IP source {name!r}, expected one of {', '.join(SOURCES)}")
+        try:
+            source = SOURCES[name](**options.get(name, {}))
+        except TypeError as err:  # e.g. "command" without a command
+            raise ValueError(f"IP source {name!r} is not configured: {err}") from err
+        if timeout:
+            source.timeout = float(timeout)
+            if source.timeout <= 0:
+                raise ValueError(f"IP source timeout must be positive, got {timeout}")
+        chain.append(source)
+    return chain
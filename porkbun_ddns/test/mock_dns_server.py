@@ -0,0 +1,90 @@
+"""A hermetic, stdlib-only UDP DNS server answering fixed records.
+
+Just enough of RFC 1035 to stand in for the "what is my IP" resolvers:
+every query for a name/type in ``records`` is answered with those values
+(A/AAAA as addresses, TXT as one string each), everything else with
+NXDOMAIN. Answers point back at the question with a compression pointer,
+like real servers do.
+"""
+
+from __future__ import annotations
+
+import socket
+import struct
+import threading
+from ipaddress import ip_address
+
+from porkbun_ddns.sources import TYPE_A, TYPE_AAAA, TYPE_TXT
+
+
+class DnsServerMock:
+    """In-process UDP DNS server on 127.0.0.1.
+
+    ``records`` maps ``(name, qtype)`` to a list of answer values.
+    ``queries`` records every ``(name, qtype)`` asked, ``drop_next`` drops
+    that many queries without an answer and ``rcode`` forces an error
+    reply.
+    """
+
+    def __init__(self) -> None:
+        self.records: dict[tuple[str, int], list[str]] = {}
+        self.queries: list[tuple[str, int]] = []
+        self.drop_next = 0
+        self.rcode = 0
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind(("127.0.0.1", 0))
+        self._sock.settimeout(0.05)
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def address(self) -> tuple[str, int]:
+        return self._sock.getsockname()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+        self._sock.close()
+
+    def _serve(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                query, client = self._sock.recvfrom(512)
+            except TimeoutError:
+                continue
+            if self.drop_next:
+                self.drop_next -= 1
+                continue
+            self._sock.sendto(self._answer(query), client)
+
+    def _answer(self, query: bytes) -> bytes:
+        qid, = struct.unpack_from("!H", query)
+        labels, offset = [], 12
+        while length := query[offset]:
+            labels.append(query[offset + 1:offset + 1 + length].decode())
+            offset += length + 1
+        question = query[12:offset + 5]
+        qtype, = struct.unpack_from("!H", query, offset + 1)
+        name = ".".join(labels)
+        self.queries.append((name, qtype))
+        values = [] if self.rcode else self.records.get((name, qtype), [])
+        rcode = self.rcode or (0 if values else 3)  # 3 = NXDOMAIN
+        answers = b"".join(
+            b"\xc0\x0c" + struct.pack("!HHIH", qtype, 1, 60, len(rdata)) + rdata
+            for rdata in (_rdata(qtype, value) for value in values))
+        header = struct.pack("!HHHHHH", qid, 0x8180 | rcode, 1, len(values), 0, 0)
+        return header + question + answers
+
+def _rdata(qtype: int, value: str) -> bytes:
+    if qtype in (TYPE_A, TYPE_AAAA):
+        return ip_address(value).packed
+    if qtype == TYPE_TXT:
+        data = value.encode()
+        return b"".join(bytes([len(data[i:i + 255])]) + data[i:i + 255]
+                        for i in range(0, len(data), 255))
+    raise ValueError(f"unsupported type {qtype}")
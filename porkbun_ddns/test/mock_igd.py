@@ -0,0 +1,166 @@
+"""A hermetic, stdlib-only fake of a router's UPnP IGD.
+
+Answers ``GetExternalIPAddress`` and AVM's ``X_AVM_DE_GetExternalIPv6Address``
+on a WANIPConnection control URL (a Fritz!Box's by default), serves the
+device description pointing at it and answers SSDP searches, with
+keep-alive connections and fault injection, so the UPnP sources can be
+exercised end-to-end without a router.
+"""
+
+from __future__ import annotations
+
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SERVICE = "urn:schemas-upnp-org:service:WANIPConnection:1"
+
+_ANSWERS = {
+    "GetExternalIPAddress": ("NewExternalIPAddress", 4),
+    "X_AVM_DE_GetExternalIPv6Address": ("NewExternalIPv6Address", 6),
+}
+
+
+def _make_handler(mock: IGDMock) -> type[BaseHTTPRequestHandler]:
+    """Build a request handler bound to a specific mock instance."""
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self) -> None:
+            mock._handle(self)
+
+        def do_GET(self) -> None:
+            mock._describe(self)
+
+        def log_message(self, *args) -> None:  # silence default request logging
+            pass
+
+    return Handler
+
+
+class IGDMock:
+    """In-process fake of a router's IGD control point.
+
+    ``external_ips`` maps an IP version to the address reported for it.
+    ``actions`` records the SOAP action of every request and
+    ``connections`` the client address of every TCP connection seen.
+    ``delay`` holds every answer back that many seconds and ``fail_next``
+    answers that many requests with a SOAP fault (HTTP 500). The device
+    description is served at ``/rootDesc.xml`` and every fetch of it is
+    counted in ``descriptions``; :meth:`start_ssdp` answers searches with
+    its location.
+    """
+
+    def __init__(self, control_path: str = "/igdupnp/control/WANIPConn1") -> None:
+        self.control_path = control_path
+        self.external_ips: dict[int, str] = {}
+        self.actions: list[str] = []
+        self.connections: set[tuple] = set()
+        self.delay = 0.0
+        self.fail_next = 0
+        self.descriptions = 0
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+        self._ssdp: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self) -> IGDMock:
+        """Serve on an ephemeral 127.0.0.1 port on a daemon thread."""
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(self))
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    @property
+    def location(self) -> str:
+        return f"http://127.0.0.1:{self.port}/rootDesc.xml"
+
+    def start_ssdp(self) -> tuple[str, int]:
+        """Answer SSDP searches on an ephemeral UDP port; its address."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(("127.0.0.1", 0))
+        sock.settimeout(0.05)
+        self._ssdp = threading.Thread(target=self._answer_searches, args=(sock,),
+                                      daemon=True)
+        self._ssdp.start()
+        return sock.getsockname()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._ssdp:
+            self._ssdp.join()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def _handle(self, handler: BaseHTTPRequestHandler) -> None:
+        handler.rfile.read(int(handler.headers.get("Content-Length", 0)))
+        action = handler.headers.get("SOAPAction", "").strip('"').rpartition("#")[2]
+        with self._lock:
+            self.actions.append(action)
+            self.connections.add(handler.client_address)
+            failing = self.fail_next > 0
+            self.fail_next -= failing
+        time.sleep(self.delay)
+        field, version = _ANSWERS.get(action, (None, None))
+        if failing or handler.path != self.control_path or field is None:
+            self._respond(handler, 500, "<s:Fault><faultstring>UPnPError</faultstring></s:Fault>")
+            return
+        self._respond(handler, 200, (
+            f'<u:{action}Response xmlns:u="{SERVICE}">'
+            f"<{field}>{self.external_ips.get(version, '')}</{field}>"
+            f"</u:{action}Response>"))
+
+    def _answer_searches(self, sock: socket.socket) -> None:
+        with sock:
+            while not self._stopped.is_set():
+                try:
+                    data, client = sock.recvfrom(4096)
+                except TimeoutError:
+                    continue
+                if data.startswith(b"M-SEARCH"):
+                    sock.sendto((
+                        "HTTP/1.1 200 OK\r\n"
+                        "ST: urn:schemas-upnp-org:device:InternetGatewayDevice:1\r\n"
+                        f"LOCATION: {self.location}\r\n\r\n").encode(), client)
+
+    def _describe(self, handler: BaseHTTPRequestHandler) -> None:
+        with self._lock:
+            self.descriptions += 1
+        data = (
+            '<?xml version="1.0"?>'
+            '<root xmlns="urn:schemas-upnp-org:device-1-0"><device>'
+            "<deviceType>urn:schemas-upnp-org:device:InternetGatewayDevice:1</deviceType>"
+            "<serviceList><service>"
+            "<serviceType>urn:schemas-upnp-org:service:Layer3Forwarding:1</serviceType>"
+            "<controlURL>/ctl/L3F</controlURL></service></serviceList>"
+            "<deviceList><device><deviceList><device><serviceList><service>"
+            f"<serviceType>{SERVICE}</serviceType>"
+            f"<controlURL>{self.control_path}</controlURL>"
+            "</service></serviceList></device></deviceList></device></deviceList>"
+            "</device></root>").encode()
+        handler.send_response(200 if handler.path == "/rootDesc.xml" else 404)
+        handler.send_header("Content-Type", "text/xml")
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    @staticmethod
+    def _respond(handler: BaseHTTPRequestHandler, status: int, body: str) -> None:
+        data = ('<?xml version="1.0"?>'
+                '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">'
+                f"<s:Body>{body}</s:Body></s:Envelope>").encode()
+        try:
+            handler.send_response(status)
+            handler.send_header("Content-Type", 'text/xml; charset="utf-8"')
+            handler.send_header("Content-Length", str(len(data)))
+            handler.end_headers()
+            handler.wfile.write(data)
+        except ConnectionError:  # the client timed out and hung up
+            handler.close_connection = True
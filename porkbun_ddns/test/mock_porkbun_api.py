@@ -1,9 +1,10 @@
 """A hermetic, stdlib-only fake of the Porkbun JSON API v3.
 
-Covers exactly the three DNS endpoints the client calls (retrieve, create,
-delete) plus the authentication and fault-injection behaviour needed to
-exercise the client's retry and error handling end-to-end. Response shapes
-follow the official OpenAPI spec at https://porkbun.com/api/json/v3/spec.
+Covers exactly the DNS endpoints the client calls (retrieve,
+retrieveByNameType, create, delete, edit, editByNameType) plus the
+authentication and fault-injection behaviour needed to exercise the
+client's retry and error handling end-to-end. Response shapes follow the
+official OpenAPI spec at https://porkbun.com/api/json/v3/spec.
 """
 
 from __future__ import annotations
@@ -17,6 +18,9 @@ from urllib.parse import unquote
 def _make_handler(mock: PorkbunAPIMock) -> type[BaseHTTPRequestHandler]:
     """Build a request handler bound to a specific mock instance."""
     class Handler(BaseHTTPRequestHandler):
+        # HTTP/1.1 keeps connections alive, like the real API.
+        protocol_version = "HTTP/1.1"
+
         def do_POST(self) -> None:
             mock._handle(self)
 
@@ -30,8 +34,11 @@ class PorkbunAPIMock:
     """In-process fake of the Porkbun JSON API v3.
 
     Records are stored per domain in ``records`` (domain -> list of record
-    dicts). ``fail_next`` makes the next request fail with HTTP 500, and
-    ``request_count`` counts every request received. Every request body is
+    dicts). ``fail_next`` makes the next request fail with HTTP
+    ``fail_status`` (500 by default, sent with a ``Retry-After`` header when
+    ``retry_after`` is set); every request to a path starting with
+    ``fail_path`` fails the same way. ``request_count`` counts every request received. ``connections`` holds
+    the client address of every TCP connection seen. Every request body is
     recorded in ``request_bodies`` and every response sent is recorded as
     ``(path, status, body)`` in ``responses``.
     """
@@ -41,7 +48,11 @@ class PorkbunAPIMock:
         self.secretapikey = secretapikey
         self.records: dict[str, list[dict]] = {}
         self.fail_next = 0
+        self.fail_status = 500
+        self.fail_path: str | None = None
+        self.retry_after: str | None = None
         self.request_count = 0
+        self.connections: set[tuple] = set()
         self.responses: list[tuple[str, int, dict | None]] = []
         self.request_bodies: list[dict] = []
         self._next_id = 1
@@ -80,16 +91,24 @@ class PorkbunAPIMock:
 
     def _handle(self, handler: BaseHTTPRequestHandler) -> None:
         self.request_count += 1
+        self.connections.add(handler.client_address)
+        # Always drain the body so a kept-alive connection stays in sync.
+        try:
+            length = int(handler.headers.get("Content-Length", 0))
+        except ValueError:
+            length = 0
+        raw = handler.rfile.read(length) if length else b""
         # Fault injection applies to any request, including auth checks.
-        if self.fail_next > 0:
-            self.fail_next -= 1
-            self._respond(handler, 500, b"")
+        failing_path = self.fail_path is not None and handler.path.startswith(self.fail_path)
+        if self.fail_next > 0 or failing_path:
+            if not failing_path:
+                self.fail_next -= 1
+            headers = {"Retry-After": self.retry_after} if self.retry_after else {}
+            self._respond(handler, self.fail_status, b"", headers)
             return
         try:
-            length = int(handler.headers.get("Content-Length", 0))
-            raw = handler.rfile.read(length) if length else b""
             body = json.loads(raw.decode("utf-8")) if raw else {}
-        except (ValueError, json.JSONDecodeError):
+        except (UnicodeDecodeError, json.JSONDecodeError):
             self._respond(handler, 400,
                           {"status": "ERROR", "message": "Invalid JSON"})
             return
@@ -99,36 +118,66 @@ class PorkbunAPIMock:
             self._respond(handler, 400,
                           {"status": "ERROR", "message": "Invalid API Keys"})
             return
-        action, domain, record_id = self._route(handler.path)
-        if action == "retrieve" and domain is not None and record_id is None:
+        action, domain, args = self._route(handler.path)
+        if domain is None:
+            self._respond(handler, 404,
+                          {"status": "ERROR", "message": "Not found"})
+        elif action == "retrieve" and not args:
             self._respond(handler, 200, {
                 "status": "SUCCESS",
                 "records": list(self.records.get(domain, [])),
             })
-        elif action == "create" and domain is not None and record_id is None:
+        elif action == "retrieveByNameType" and len(args) in (1, 2):
+            fqdn = self._fqdn(domain, args[1] if len(args) == 2 else "")
+            self._respond(handler, 200, {
+                "status": "SUCCESS",
+                "records": [r for r in self.records.get(domain, [])
+                            if r["name"] == fqdn and r["type"] == args[0]],
+            })
+        elif action == "create" and not args:
             record = self._create_record(domain, body)
             self._respond(handler, 200,
                           {"status": "SUCCESS", "id": record["id"]})
-        elif action == "delete" and domain is not None and record_id is not None:
-            self._delete_record(domain, record_id)
+        elif action == "delete" and len(args) == 1:
+            self._delete_record(domain, args[0])
+            self._respond(handler, 200, {"status": "SUCCESS"})
+        elif action == "edit" and len(args) == 1:
+            if self._edit_record(domain, args[0], body):
+                self._respond(handler, 200, {"status": "SUCCESS"})
+            else:
+                self._respond(handler, 400, {"status": "ERROR",
+                                             "message": "Invalid record ID."})
+        elif action == "editByNameType" and len(args) in (1, 2):
+            fqdn = self._fqdn(domain, args[1] if len(args) == 2 else "")
+            for record in self.records.get(domain, []):
+                if record["name"] == fqdn and record["type"] == args[0]:
+                    self._edit_record(domain, record["id"], {
+                        key: value for key, value in body.items()
+                        if key in ("content", "ttl", "prio", "notes")})
             self._respond(handler, 200, {"status": "SUCCESS"})
         else:
             self._respond(handler, 404,
                           {"status": "ERROR", "message": "Not found"})
 
     @staticmethod
-    def _route(path: str) -> tuple[str | None, str | None, str | None]:
-        """Split a request path into ``(action, domain, record_id)``.
+    def _route(path: str) -> tuple[str | None, str | None, list[str]]:
+        """Split a request path into ``(action, domain, args)``.
 
-        Expects ``/api/json/v3/dns/<action>/<domain>[/<id>]``.
+        Expects ``/api/json/v3/dns/<action>/<domain>[/<arg>...]``, e.g. a
+        record id for delete/edit or type and subdomain for the ByNameType
+        endpoints.
         """
         parts = path.split("?", 1)[0].strip("/").split("/")
         if len(parts) >= 5 and parts[:4] == ["api", "json", "v3", "dns"]:
             action = unquote(parts[4])
             domain = unquote(parts[5]) if len(parts) > 5 else None
-            record_id = unquote(parts[6]) if len(parts) > 6 else None
-            return action, domain, record_id
-        return None, None, None
+            return action, domain, [unquote(part) for part in parts[6:]]
+        return None, None, []
+
+    @staticmethod
+    def _fqdn(domain: str, name: str) -> str:
+        """Map a record ``name`` (``"@"``/empty = the domain) to the fqdn."""
+        return domain if name in ("@", "") else f"{name}.{domain}"
 
     def _create_record(self, domain: str, body: dict) -> dict:
         """Store a record, mapping the client's ``name`` to the fqdn.
@@ -138,8 +187,7 @@ class PorkbunAPIMock:
         joined to the domain. ``ttl`` is stored as a string, matching what
         the real API returns.
         """
-        name = body.get("name", "@")
-        fqdn = domain if name == "@" else f"{name}.{domain}"
+        fqdn = self._fqdn(domain, body.get("name", "@"))
         record = {
             key: value
             for key, value in body.items()
@@ -152,6 +200,20 @@ class PorkbunAPIMock:
         self.records.setdefault(domain, []).append(record)
         return record
 
+    def _edit_record(self, domain: str, record_id: str, body: dict) -> bool:
+        """Update a record in place, keeping its id; False if it is unknown."""
+        for record in self.records.get(domain, []):
+            if record["id"] == record_id:
+                for key, value in body.items():
+                    if key in ("apikey", "secretapikey", "endpoint"):
+                        continue
+                    if key == "name":
+                        record["name"] = self._fqdn(domain, value)
+                    else:
+                        record[key] = str(value) if key == "ttl" else value
+                return True
+        return False
+
     def _delete_record(self, domain: str, record_id: str) -> None:
         self.records[domain] = [
             record for record in self.records.get(domain, [])
@@ -159,7 +221,7 @@ class PorkbunAPIMock:
         ]
 
     def _respond(self, handler: BaseHTTPRequestHandler, status: int,
-                 payload: dict | bytes) -> None:
+                 payload: dict | bytes, headers: dict | None = None) -> None:
         if isinstance(payload, dict):
             body_bytes = json.dumps(payload).encode("utf-8")
             content_type = "application/json"
@@ -172,6 +234,8 @@ class PorkbunAPIMock:
         handler.send_response(status)
         if content_type:
             handler.send_header("Content-Type", content_type)
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
         handler.send_header("Content-Length", str(len(body_bytes)))
         handler.end_headers()
         handler.wfile.write(body_bytes)
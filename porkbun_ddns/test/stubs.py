@@ -1,4 +1,4 @@
-"""Hand-written test doubles for the Porkbun API client seam."""
+"""Hand-written test doubles for the Porkbun API client and clock seams."""
 
 from __future__ import annotations
 
@@ -8,18 +8,22 @@ from porkbun_ddns.errors import PorkbunDDNS_Error
 class StubPorkbunAPIClient:
     """Configurable stub of :class:`PorkbunAPIClient` for orchestrator tests.
 
-    ``retrieve_records`` returns the canned records list and records each
-    ``create_record``/``delete_record`` call for assertion; both return the
-    canned ``status`` string.
+    ``retrieve_records`` returns the canned records list; every call is
+    recorded for assertion and the writes return the canned ``status``
+    string.
     """
 
     def __init__(self, records: list | None = None, status: str = "SUCCESS") -> None:
         self.records = records if records is not None else []
         self.status = status
+        self.retrieved: list[str] = []
+        self.retrieved_by_name_type: list[tuple] = []
         self.created: list[tuple] = []
+        self.edited: list[tuple] = []
         self.deleted: list[tuple] = []
 
     def retrieve_records(self, domain: str) -> list:
+        self.retrieved.append(domain)
         if self.status != "SUCCESS":
             raise PorkbunDDNS_Error(
                 f"Failed to get records.\nMake sure you specified the correct "
@@ -28,11 +32,47 @@ class StubPorkbunAPIClient:
             )
         return self.records
 
+    def retrieve_by_name_type(self, domain: str, record_type: str,
+                              subdomain: str) -> list:
+        self.retrieved_by_name_type.append((domain, record_type, subdomain))
+        fqdn = domain if subdomain == "@" else f"{subdomain}.{domain}"
+        return [r for r in self.records
+                if r["name"] == fqdn and r["type"] == record_type]
+
     def create_record(self, domain: str, name: str, record_type: str,
                       content: str, ttl: int = 600) -> str:
         self.created.append((domain, name, record_type, content, ttl))
         return self.status
 
+    def edit_record(self, domain: str, record_id: str, name: str,
+                    record_type: str, content: str, ttl: int = 600) -> str:
+        self.edited.append((domain, record_id, name, record_type, content, ttl))
+        return self.status
+
+    def edit_by_name_type(self, domain: str, record_type: str, subdomain: str,
+                          content: str, ttl: int = 600) -> str:
+        self.edited.append((domain, record_type, subdomain, content, ttl))
+        return self.status
+
     def delete_record(self, domain: str, record_id: str) -> str:
         self.deleted.append((domain, record_id))
         return self.status
+
+
+class FakeClock:
+    """A ``_clock`` seam that only advances when told to or when slept on.
+
+    Tests move ``now`` by hand; passing ``sleep`` as a ``_sleep`` seam
+    records the sleeps and advances the clock by them instead of waiting.
+    """
+
+    def __init__(self, now: float = 0.0) -> None:
+        self.now = now
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
@@ -0,0 +1,138 @@
+import unittest
+from urllib.error import URLError
+
+from porkbun_ddns.api import PorkbunAPIClient
+from porkbun_ddns.breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitBreakers,
+)
+from porkbun_ddns.config import Credentials, RetryPolicy
+from porkbun_ddns.errors import PorkbunDDNS_Error
+from porkbun_ddns.resolver import PUBLIC_HTTP_PROVIDERS, PublicIPResolver
+from porkbun_ddns.test.mock_porkbun_api import PorkbunAPIMock
+from porkbun_ddns.test.stubs import FakeClock
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker("api.example", failure_threshold=2,
+                                      reset_timeout=60, _clock=self.clock)
+
+    def test_opens_after_threshold_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CLOSED)
+        with self.assertLogs("porkbun_ddns", level="WARNING") as cm:
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertFalse(self.breaker.allow())
+        self.assertIn("Circuit for api.example opened after 2 failures", cm.output[0])
+
+    def test_half_open_lets_one_probe_through(self):
+        with self.assertLogs("porkbun_ddns", level="WARNING"):
+            self.breaker.record_failure()
+            self.breaker.record_failure()
+        self.clock.now += 60
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+        with self.assertLogs("porkbun_ddns", level="INFO"):
+            self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertTrue(self.breaker.allow())
+
+    def test_failed_probe_reopens(self):
+        with self.assertLogs("porkbun_ddns", level="WARNING"):
+            self.breaker.record_failure()
+            self.breaker.record_failure()
+        self.clock.now += 60
+        self.assertTrue(self.breaker.allow())
+        with self.assertLogs("porkbun_ddns", level="WARNING"):
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, OPEN)
+        self.clock.now += 59
+        self.assertFalse(self.breaker.allow())
+
+    def test_registry_keeps_one_breaker_per_host(self):
+        breakers = CircuitBreakers()
+        self.assertIs(breakers.for_url("https://api.porkbun.com/api/json/v3/ping"),
+                      breakers.for_url("https://API.porkbun.com/x"))
+        self.assertIsNot(breakers.for_url("https://v4.ident.me"),
+                         breakers.for_url("https://api.ipify.org"))
+
+
+class TestClientCircuit(unittest.TestCase):
+
+    def setUp(self):
+        self.mock = PorkbunAPIMock(apikey="test-apikey", secretapikey="test-secret")
+        self.mock.start()
+        self.clock = FakeClock()
+        self.breakers = CircuitBreakers(failure_threshold=2, reset_timeout=60,
+                                        _clock=self.clock)
+        self.client = PorkbunAPIClient(
+            Credentials(apikey="test-apikey", secretapikey="test-secret",
+                        endpoint=f"{self.mock.url}/api/json/v3"),
+            RetryPolicy(retry_count=5, retry_delay=0),
+            breakers=self.breakers)
+
+    def tearDown(self):
+        self.mock.stop()
+
+    def test_open_circuit_stops_retries_and_fails_fast(self):
+        self.mock.fail_next = 5
+        with self.assertLogs("porkbun_ddns", level="WARNING"), \
+                self.assertRaises(PorkbunDDNS_Error) as context:
+            self.client.retrieve_records("example.com")
+        self.assertIn("HTTP 500", str(context.exception))
+        self.assertEqual(self.mock.request_count, 2)
+
+        with self.assertRaises(PorkbunDDNS_Error) as context:
+            self.client.retrieve_records("example.com")
+        self.assertIn("is open", str(context.exception))
+        self.assertEqual(self.mock.request_count, 2)
+
+    def test_probe_after_reset_timeout_closes_circuit(self):
+        self.mock.fail_next = 2
+        with self.assertLogs("porkbun_ddns", level="WARNING"), \
+                self.assertRaises(PorkbunDDNS_Error):
+            self.client.retrieve_records("example.com")
+        self.clock.now += 60
+        with self.assertLogs("porkbun_ddns", level="INFO"):
+            self.assertEqual(self.client.retrieve_records("example.com"), [])
+        self.assertEqual(self.mock.request_count, 3)
+
+    def test_client_errors_do_not_open_the_circuit(self):
+        for _ in range(3):
+            with self.assertRaises(PorkbunDDNS_Error):
+                self.client.edit_record("example.com", "404", "@", "A", "1.2.3.4")
+        self.assertEqual(self.mock.request_count, 3)
+
+
+class TestResolverCircuit(unittest.TestCase):
+
+    def test_dead_providers_are_skipped_once_open(self):
+        calls = []
+
+        def urlopen(url, timeout=30):
+            calls.append(url)
+            raise URLError("timed out")
+
+        breakers = CircuitBreakers(failure_threshold=2, _clock=FakeClock())
+        resolver = PublicIPResolver(ipv4=True, ipv6=False, breakers=breakers,
+                                    _urlopen=urlopen)
+        with self.assertLogs("porkbun_ddns", level="WARNING"):
+            for _ in range(4):
+                with self.assertRaises(PorkbunDDNS_Error):
+                    resolver.resolve()
+        # Every provider is asked twice, then skipped without a request.
+        self.assertEqual(sorted(calls), sorted(PUBLIC_HTTP_PROVIDERS[4] * 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import json
+import tempfile
+import unittest
+from ipaddress import IPv4Address
+from pathlib import Path
+
+from porkbun_ddns import PorkbunDDNS
+from porkbun_ddns.cache import RecordCache
+from porkbun_ddns.errors import PorkbunDDNS_Error
+from porkbun_ddns.test.stubs import FakeClock, StubPorkbunAPIClient
+from porkbun_ddns.test.test_porkbun_ddns import valid_config
+
+DOMAIN = "example.com"
+IPS = [IPv4Address("203.0.113.5")]
+RECORDS = [
+    {"id": "1", "name": "example.com", "type": "A", "content": "203.0.113.5"},
+    {"id": "2", "name": "example.com", "type": "MX", "content": "mail.example.com"},
+]
+
+
+class TestRecordCache(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock(1000.0)
+        self.cache = RecordCache(max_age=60, _clock=self.clock)
+
+    def test_in_sync_while_fresh(self):
+        self.cache.store(DOMAIN, ["example.com"], IPS)
+        self.assertTrue(self.cache.is_in_sync(DOMAIN, ["example.com"], IPS))
+        self.clock.now += 60
+        self.assertFalse(self.cache.is_in_sync(DOMAIN, ["example.com"], IPS))
+
+    def test_not_in_sync_for_other_ips_or_fqdns(self):
+        self.cache.store(DOMAIN, ["example.com"], IPS)
+        self.assertFalse(self.cache.is_in_sync(
+            DOMAIN, ["example.com"], [IPv4Address("203.0.113.6")]))
+        self.assertFalse(self.cache.is_in_sync(
+            DOMAIN, ["example.com", "www.example.com"], IPS))
+        self.assertFalse(self.cache.is_in_sync("example.org", ["example.org"], IPS))
+
+    def test_invalidate(self):
+        self.cache.store(DOMAIN, ["example.com"], IPS)
+        self.cache.invalidate(DOMAIN)
+        self.assertFalse(self.cache.is_in_sync(DOMAIN, ["example.com"], IPS))
+
+    def test_persisted_to_disk(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "state" / "cache.json"
+            RecordCache(max_age=60, path=path, _clock=self.clock).store(
+                DOMAIN, ["example.com"], IPS)
+            entry = json.loads(path.read_text())[DOMAIN]
+            self.assertEqual(entry["ips"], ["203.0.113.5"])
+            self.assertNotIn("records", entry)
+            self.assertEqual([p.name for p in path.parent.iterdir()], ["cache.json"])
+
+            reloaded = RecordCache(max_age=60, path=path, _clock=self.clock)
+            self.assertTrue(reloaded.is_in_sync(DOMAIN, ["example.com"], IPS))
+
+    def test_separate_runs_merge_their_domains(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "cache.json"
+            first = RecordCache(max_age=60, path=path, _clock=self.clock)
+            second = RecordCache(max_age=60, path=path, _clock=self.clock)
+            first.store(DOMAIN, ["example.com"], IPS)
+            second.store("example.org", ["example.org"], IPS)
+            self.assertEqual(sorted(json.loads(path.read_text())),
+                             ["example.com", "example.org"])
+            second.invalidate("example.org")
+            self.assertEqual(list(json.loads(path.read_text())), ["example.com"])
+
+    def test_unreadable_file_is_ignored(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "cache.json"
+            path.write_text("{not json")
+            with self.assertLogs("porkbun_ddns", level="WARNING"):
+                cache = RecordCache(path=path)
+            self.assertFalse(cache.is_in_sync(DOMAIN, ["example.com"], IPS))
+
+
+class TestPorkbunDDNSCache(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock(1000.0)
+        self.cache = RecordCache(max_age=60, _clock=self.clock)
+
+    def make(self, client, ips=("203.0.113.5",)):
+        return PorkbunDDNS(valid_config.credentials, valid_config.retry, DOMAIN,
+                           list(ips), client=client, cache=self.cache)
+
+    def test_unchanged_pass_skips_api(self):
+        client = StubPorkbunAPIClient(records=list(RECORDS))
+        self.make(client).update_many(["@"])
+        with self.assertLogs("porkbun_ddns", level="INFO") as cm:
+            self.make(client).update_many(["@"])
+        self.assertEqual(client.retrieved, [DOMAIN])
+        self.assertEqual(cm.output, ["INFO:porkbun_ddns:A-Record of example.com is up to date!"])
+
+    def test_expired_cache_forces_resync(self):
+        client = StubPorkbunAPIClient(records=list(RECORDS))
+        self.make(client).update_many(["@"])
+        self.clock.now += 61
+        self.make(client).update_many(["@"])
+        self.assertEqual(client.retrieved, [DOMAIN, DOMAIN])
+
+    def test_changed_ip_and_writes_bypass_cache(self):
+        client = StubPorkbunAPIClient(records=list(RECORDS))
+        self.make(client).update_many(["@"])
+        self.make(client, ips=["203.0.113.9"]).update_many(["@"])
+        self.assertEqual(len(client.edited), 1)
+        # The pass wrote, so the next one verifies against fresh records.
+        self.make(client, ips=["203.0.113.9"]).update_many(["@"])
+        self.assertEqual(client.retrieved, [DOMAIN, DOMAIN, DOMAIN])
+
+    def test_partly_failed_pass_clears_the_entry(self):
+        client = StubPorkbunAPIClient(records=[
+            *RECORDS,
+            {"id": "3", "name": "www.example.com", "type": "A", "content": "203.0.113.5"},
+        ])
+        self.make(client).update_many(["@", "www"])
+        edit = client.edit_record
+
+        def edit_record(domain, record_id, *args):
+            if record_id == "3":
+                raise PorkbunDDNS_Error("HTTP 500")
+            return edit(domain, record_id, *args)
+
+        client.edit_record = edit_record
+        with self.assertLogs("porkbun_ddns", level="INFO"), \
+                self.assertRaises(PorkbunDDNS_Error):
+            self.make(client, ips=["203.0.113.9"]).update_many(["@", "www"])
+        self.assertEqual(len(client.edited), 1)
+        # @ was moved to the new IP, so the old one is no longer in sync.
+        self.make(client).update_many(["@", "www"])
+        self.assertEqual(client.retrieved, [DOMAIN, DOMAIN, DOMAIN])
+
+
+if __name__ == "__main__":
+    unittest.main()
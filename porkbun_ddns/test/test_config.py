@@ -18,10 +18,10 @@ from porkbun_ddns.errors import PorkbunDDNS_Error
 from porkbun_ddns.test.test_porkbun_ddns import valid_config
 
 LEAF_FIELDS = ("apikey", "secretapikey", "endpoint",
-               "retry_count", "retry_delay",
+               "retry_count", "retry_delay", "retry_max_delay", "retry_deadline",
                "webhook_url", "webhook_template", "webhook_template_file")
 
-RETRY_FIELDS = ("retry_count", "retry_delay")
+RETRY_FIELDS = ("retry_count", "retry_delay", "retry_max_delay", "retry_deadline")
 
 # Retry fields are int; encode the source as a distinct value per source.
 RETRY_SOURCE_NUM = {"argparse_": 1, "environ_": 2, "file_": 3}
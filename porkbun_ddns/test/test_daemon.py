@@ -0,0 +1,99 @@
+import unittest
+from ipaddress import IPv4Address
+from unittest.mock import MagicMock
+
+from porkbun_ddns.config import Credentials, RetryPolicy
+from porkbun_ddns.daemon import MultiDomainUpdater, parse_domains
+from porkbun_ddns.errors import PorkbunDDNS_Error
+from porkbun_ddns.test.mock_porkbun_api import PorkbunAPIMock
+from porkbun_ddns.test.stubs import StubPorkbunAPIClient
+
+
+class TestParseDomains(unittest.TestCase):
+
+    def test_domains_with_and_without_subdomains(self):
+        self.assertEqual(
+            parse_domains("example.com:@, www ; Example.org;"),
+            {"example.com": ["@", "www"], "example.org": ["@"]})
+
+    def test_empty_spec(self):
+        self.assertEqual(parse_domains(""), {})
+
+    def test_empty_subdomain_list_means_root(self):
+        self.assertEqual(parse_domains("example.com:"), {"example.com": ["@"]})
+
+
+class TestMultiDomainUpdater(unittest.TestCase):
+
+    def setUp(self):
+        self.mock = PorkbunAPIMock(apikey="test-apikey", secretapikey="test-secret")
+        self.mock.start()
+        self.credentials = Credentials(
+            apikey="test-apikey",
+            secretapikey="test-secret",
+            endpoint=f"{self.mock.url}/api/json/v3",
+        )
+        self.retry = RetryPolicy(retry_count=3, retry_delay=0)
+
+    def tearDown(self):
+        self.mock.stop()
+
+    def test_run_cycle_updates_every_domain(self):
+        updater = MultiDomainUpdater(
+            self.credentials, self.retry,
+            {"example.com": ["@", "www"], "example.org": ["@"]},
+            public_ips=["203.0.113.5"], ipv6=False, max_workers=2)
+        changes, errors = updater.run_cycle()
+        self.assertEqual(errors, {})
+        self.assertEqual(sorted(changes), ["example.com", "example.org"])
+        self.assertEqual(len(changes["example.com"]), 2)
+        self.assertEqual(
+            sorted(r["name"] for r in self.mock.records["example.com"]),
+            ["example.com", "www.example.com"])
+        # One retrieve per domain plus one create per record.
+        self.assertEqual(self.mock.request_count, 5)
+
+        self.assertEqual(updater.run_cycle(), ({}, {}))
+        self.assertEqual(self.mock.request_count, 7)
+
+    def test_public_ips_resolved_once_per_cycle(self):
+        resolver = MagicMock()
+        resolver.resolve.return_value = [IPv4Address("203.0.113.5")]
+        updater = MultiDomainUpdater(
+            self.credentials, self.retry,
+            {"example.com": ["@"], "example.org": ["@"], "example.net": ["@"]},
+            client=StubPorkbunAPIClient(), resolver=resolver)
+        updater.run_cycle()
+        resolver.resolve.assert_called_once_with(None)
+
+    def test_failing_domain_does_not_hold_back_the_others(self):
+        client = StubPorkbunAPIClient()
+        original = client.retrieve_records
+
+        def retrieve_records(domain):
+            if domain == "broken.com":
+                raise PorkbunDDNS_Error("Failed to get records.")
+            return original(domain)
+
+        client.retrieve_records = retrieve_records
+        updater = MultiDomainUpdater(
+            self.credentials, self.retry,
+            {"broken.com": ["@"], "example.com": ["@"]},
+            public_ips=["203.0.113.5"], client=client)
+        with self.assertLogs("porkbun_ddns", level="ERROR") as cm:
+            changes, errors = updater.run_cycle()
+        self.assertEqual(cm.output, [
+            "ERROR:porkbun_ddns:Updating broken.com failed: Failed to get records."])
+        self.assertEqual(list(errors), ["broken.com"])
+        self.assertEqual([c["fqdn"] for c in changes["example.com"]], ["example.com"])
+        self.assertEqual(client.created, [("example.com", "@", "A", "203.0.113.5", 600)])
+
+        # The healthy domain's changes were handed out once, not piled up.
+        client.records = [{"id": "1", "name": "example.com", "type": "A",
+                           "content": "203.0.113.5"}]
+        with self.assertLogs("porkbun_ddns", level="ERROR"):
+            changes, errors = updater.run_cycle()
+        self.assertEqual((changes, list(errors)), ({}, ["broken.com"]))
+
+if __name__ == "__main__":
+    unittest.main()
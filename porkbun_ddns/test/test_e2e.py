@@ -149,8 +149,9 @@ def test_ipv4_creates_record_then_idempotent(mock_api):
     assert mock_api.records["example.com"][0]["content"] == "203.0.113.5"
 
 
-def test_ipv4_ip_change_triggers_delete_and_create(mock_api):
+def test_ipv4_ip_change_edits_record_in_place(mock_api):
     run_update(make_config(mock_api), ["203.0.113.5"], ipv4=True, ipv6=False)
+    record_id = mock_api.records["example.com"][0]["id"]
 
     updated = run_update(make_config(mock_api), ["203.0.113.9"],
                          ipv4=True, ipv6=False)
@@ -158,7 +159,11 @@ def test_ipv4_ip_change_triggers_delete_and_create(mock_api):
     change = updated.changes[0]
     assert change["old_ip"] == "203.0.113.5"
     assert change["new_ip"] == "203.0.113.9"
-    assert mock_api.records["example.com"][0]["content"] == "203.0.113.9"
+    records = mock_api.records["example.com"]
+    assert len(records) == 1
+    assert records[0]["id"] == record_id
+    assert records[0]["content"] == "203.0.113.9"
+    assert [b.get("content") for b in mock_api.request_bodies[-1:]] == ["203.0.113.9"]
 
 
 def test_ipv6_aaaa_with_pinned_public_ips(mock_api):
@@ -298,6 +303,122 @@ def test_cli_env_vars_plumb_retry_settings(mock_api, monkeypatch, caplog):
     assert "attempt 1/3" in caplog.text
 
 
+def test_cli_multiple_subdomains_single_retrieve(mock_api):
+    cli.main([
+        "example.com", "@", "www", "api", "--env_only",
+        "--endpoint", f"{mock_api.url}/api/json/v3",
+        "--apikey", "test-apikey",
+        "--secretapikey", "test-secret",
+        "--public-ips", "203.0.113.5",
+        "--ipv4-only",
+    ])
+    # One retrieve for the whole pass, then one create per subdomain.
+    assert mock_api.request_count == 4
+    assert sorted(r["name"] for r in mock_api.records["example.com"]) == [
+        "api.example.com", "example.com", "www.example.com"]
+
+
+def test_cli_targeted_retrieve_fetches_only_the_subdomain(mock_api):
+    mock_api.records["example.com"] = [
+        {"id": str(i), "name": f"host{i}.example.com", "type": "TXT",
+         "content": "filler", "ttl": "600"}
+        for i in range(100, 400)
+    ]
+    cli.main([
+        "example.com", "www", "--env_only",
+        "--endpoint", f"{mock_api.url}/api/json/v3",
+        "--apikey", "test-apikey",
+        "--secretapikey", "test-secret",
+        "--public-ips", "203.0.113.5", "2001:db8::1",
+        "--targeted-retrieve", "1",
+    ])
+    # A and AAAA lookups come back empty, so ALIAS and CNAME are checked too;
+    # none of the 300 filler records is ever sent.
+    retrieved = [body for path, _, body in mock_api.responses
+                 if "/dns/retrieve" in path]
+    assert len(retrieved) == 4
+    assert all(body["records"] == [] for body in retrieved)
+    assert sorted(r["type"] for r in mock_api.records["example.com"]
+                  if r["name"] == "www.example.com") == ["A", "AAAA"]
+
+
+def test_cli_state_file_skips_api_when_ip_unchanged(mock_api, tmp_path):
+    state_file = tmp_path / "state.json"
+    argv = [
+        "example.com", "www", "--env_only",
+        "--endpoint", f"{mock_api.url}/api/json/v3",
+        "--apikey", "test-apikey",
+        "--secretapikey", "test-secret",
+        "--public-ips", "203.0.113.5",
+        "--ipv4-only",
+        "--state-file", str(state_file),
+    ]
+    cli.main(argv)  # retrieve + create; the pass wrote, nothing cached yet
+    cli.main(argv)  # retrieve, nothing to change: cached
+    assert mock_api.request_count == 3
+    state = json.loads(state_file.read_text())["example.com"]
+    assert state["ips"] == ["203.0.113.5"]
+    assert state["fqdns"] == ["www.example.com"]
+
+    cli.main(argv)  # unchanged IP: zero API calls
+    assert mock_api.request_count == 3
+
+    cli.main([  # changed IP: full pass
+        "203.0.113.9" if arg == "203.0.113.5" else arg for arg in argv])
+    assert mock_api.request_count == 5
+    assert mock_api.records["example.com"][-1]["content"] == "203.0.113.9"
+
+
+def test_cli_plan_then_apply_plan(mock_api, tmp_path, capsys):
+    argv = [
+        "example.com", "@", "www", "--env_only",
+        "--endpoint", f"{mock_api.url}/api/json/v3",
+        "--apikey", "test-apikey",
+        "--secretapikey", "test-secret",
+    ]
+    stream = cli.handler.stream
+    cli.main([*argv, "--public-ips", "203.0.113.5", "--ipv4-only", "--plan"])
+    # One retrieve, no writes; stdout holds nothing but the plan.
+    assert mock_api.request_count == 1
+    assert cli.handler.stream is stream
+    plan = json.loads(capsys.readouterr().out)
+    assert [(i["fqdn"], i["content"]) for i in plan["intents"]] == [
+        ("example.com", "203.0.113.5"), ("www.example.com", "203.0.113.5")]
+
+    plan_file = tmp_path / "plan.json"
+    plan_file.write_text(json.dumps(plan))
+    cli.main(["example.com", *argv[3:], "--apply-plan", str(plan_file)])
+    # Applied without resolving or retrieving again: two creates.
+    assert mock_api.request_count == 3
+    assert sorted(r["name"] for r in mock_api.records["example.com"]) == [
+        "example.com", "www.example.com"]
+
+
+def test_cli_state_file_forgets_a_partly_failed_pass(mock_api, tmp_path):
+    argv = [
+        "example.com", "@", "www", "--env_only",
+        "--endpoint", f"{mock_api.url}/api/json/v3",
+        "--apikey", "test-apikey",
+        "--secretapikey", "test-secret",
+        "--ipv4-only",
+        "--retry-count", "1",
+        "--state-file", str(tmp_path / "state.json"),
+    ]
+    cli.main([*argv, "--public-ips", "203.0.113.5"])  # creates @ (1) and www (2)
+    cli.main([*argv, "--public-ips", "203.0.113.5"])  # in sync: cached
+    mock_api.fail_path = "/api/json/v3/dns/edit/example.com/2"
+    with pytest.raises(SystemExit):
+        cli.main([*argv, "--public-ips", "203.0.113.9"])  # edits @, www fails
+    mock_api.fail_path = None
+    assert mock_api.records["example.com"][0]["content"] == "203.0.113.9"
+
+    count = mock_api.request_count
+    cli.main([*argv, "--public-ips", "203.0.113.5"])
+    # Not skipped as in sync: @ is moved back.
+    assert mock_api.request_count == count + 2
+    assert mock_api.records["example.com"][0]["content"] == "203.0.113.5"
+
+
 def test_cli_retry_exhausted_exits_nonzero(mock_api, caplog):
     mock_api.fail_next = 5
     caplog.set_level(logging.WARNING)
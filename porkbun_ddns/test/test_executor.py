@@ -0,0 +1,71 @@
+import threading
+import time
+import unittest
+
+from porkbun_ddns.executor import PlanExecutor
+
+
+class TestPlanExecutor(unittest.TestCase):
+
+    def test_results_in_plan_order_despite_completion_order(self):
+        # Earlier groups finish last.
+        delays = {"a1": 0.1, "a2": 0.0, "b1": 0.05, "c1": 0.0}
+
+        def apply(intent):
+            time.sleep(delays[intent])
+            return intent.upper()
+
+        results, errors = PlanExecutor(3).run([["a1", "a2"], ["b1"], [], ["c1"]], apply)
+        self.assertEqual(results, ["A1", "A2", "B1", "C1"])
+        self.assertEqual(errors, [])
+
+    def test_group_runs_in_order_and_groups_run_concurrently(self):
+        lock = threading.Lock()
+        running, peak, order = 0, 0, []
+
+        def apply(intent):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+                order.append(intent)
+            time.sleep(0.05)
+            with lock:
+                running -= 1
+
+        groups = [[(group, step) for step in range(3)] for group in range(6)]
+        PlanExecutor(2).run(groups, apply)
+        self.assertEqual(peak, 2)
+        for group in range(6):
+            self.assertEqual([step for g, step in order if g == group], [0, 1, 2])
+
+    def test_failure_skips_the_rest_of_its_group_only(self):
+        applied = []
+
+        def apply(intent):
+            if intent == "a1":
+                raise ValueError("boom")
+            applied.append(intent)
+            return intent
+
+        for workers in (1, 4):
+            applied.clear()
+            with self.subTest(workers=workers):
+                results, errors = PlanExecutor(workers).run(
+                    [["a1", "a2"], ["b1", "b2"]], apply)
+                self.assertEqual(results, ["b1", "b2"])
+                self.assertEqual(sorted(applied), ["b1", "b2"])
+                self.assertEqual([str(err) for err in errors], ["boom"])
+
+    def test_single_worker_runs_on_the_calling_thread(self):
+        threads = set()
+        PlanExecutor(1).run([[1], [2]], lambda _: threads.add(threading.get_ident()))
+        self.assertEqual(threads, {threading.get_ident()})
+
+    def test_invalid_worker_count(self):
+        with self.assertRaises(ValueError):
+            PlanExecutor(0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,18 +2,31 @@ from __future__ import annotations
 
 import contextlib
 import io
+import time
 import unittest
-from unittest.mock import call, patch
+from unittest.mock import ANY, call, patch
 
 from porkbun_ddns import cli
 from porkbun_ddns.helpers import resolve_fritzbox_public_ips
 from porkbun_ddns.scripts import fritzbox_ips
+from porkbun_ddns.sources import FritzboxSource
+from porkbun_ddns.test.mock_igd import IGDMock
+from porkbun_ddns.test.stubs import FakeClock
+from porkbun_ddns.transport import HTTPConnectionPool
 
+EXTERNAL_IPS = {4: "1.2.3.4", 6: "2001:db8::1"}
 
-def run_script(argv: list[str], side_effect) -> tuple[int, str]:
-    """Run ``fritzbox_ips.main`` with a stubbed helper and captured stdout."""
-    with patch("porkbun_ddns.scripts.fritzbox_ips.get_ips_from_fritzbox",
-               side_effect=side_effect) as mock, \
+
+def patch_external_ip(**kwargs):
+    """Stub the SOAP call that every Fritz!Box code path goes through."""
+    kwargs.setdefault("side_effect", lambda self, ip_version=4: EXTERNAL_IPS[ip_version])
+    return patch("porkbun_ddns.sources.FritzboxSource.external_ip",
+                 autospec=True, **kwargs)
+
+
+def run_script(argv: list[str]) -> tuple[int, str]:
+    """Run ``fritzbox_ips.main`` with a stubbed SOAP call and captured stdout."""
+    with patch_external_ip() as mock, \
             contextlib.redirect_stdout(io.StringIO()) as out:
         code = fritzbox_ips.main(argv)
     return code, out.getvalue(), mock
@@ -22,31 +35,27 @@ def run_script(argv: list[str], side_effect) -> tuple[int, str]:
 class TestFritzboxIpsScript(unittest.TestCase):
 
     def test_default_queries_both_families(self):
-        code, output, mock = run_script(
-            ["192.168.1.1"], ["1.2.3.4", "2001:db8::1"])
+        code, output, mock = run_script(["192.168.1.1"])
         self.assertEqual(code, 0)
-        self.assertEqual(mock.call_args_list, [
-            call("192.168.1.1", ip_version=4),
-            call("192.168.1.1", ip_version=6),
-        ])
+        mock.assert_has_calls([call(ANY, 4), call(ANY, 6)], any_order=True)
+        self.assertEqual(mock.call_args.args[0].host, "192.168.1.1")
         self.assertEqual(output, "1.2.3.4\n2001:db8::1\n")
 
     def test_v4_flag_queries_only_ipv4(self):
-        code, output, mock = run_script(["192.168.1.1", "--v4"], ["1.2.3.4"])
+        code, output, mock = run_script(["192.168.1.1", "--v4"])
         self.assertEqual(code, 0)
-        mock.assert_called_once_with("192.168.1.1", ip_version=4)
+        mock.assert_called_once_with(ANY, 4)
         self.assertEqual(output, "1.2.3.4\n")
 
     def test_v6_flag_queries_only_ipv6(self):
-        code, output, mock = run_script(
-            ["192.168.1.1", "--v6"], ["2001:db8::1"])
+        code, output, mock = run_script(["192.168.1.1", "--v6"])
         self.assertEqual(code, 0)
-        mock.assert_called_once_with("192.168.1.1", ip_version=6)
+        mock.assert_called_once_with(ANY, 6)
         self.assertEqual(output, "2001:db8::1\n")
 
     def test_failure_returns_nonzero(self):
-        with patch("porkbun_ddns.scripts.fritzbox_ips.get_ips_from_fritzbox",
-                   side_effect=Exception("boom")):
+        with patch_external_ip(side_effect=OSError("boom")), \
+                contextlib.redirect_stderr(io.StringIO()):
             code = fritzbox_ips.main(["192.168.1.1"])
         self.assertEqual(code, 1)
 
@@ -58,28 +67,77 @@ class TestFritzboxIpsScript(unittest.TestCase):
 class TestResolveFritzboxPublicIps(unittest.TestCase):
 
     def test_ipv6_only_queries_only_v6(self):
-        with patch("porkbun_ddns.helpers.get_ips_from_fritzbox",
-                   return_value="2001:db8::1") as mock:
+        with patch_external_ip() as mock:
             ips = resolve_fritzbox_public_ips("192.168.1.1", ipv4=False, ipv6=True)
-        mock.assert_called_once_with("192.168.1.1", ip_version=6)
+        mock.assert_called_once_with(ANY, 6)
         self.assertEqual(ips, ["2001:db8::1"])
 
     def test_both_families_queries_in_order(self):
-        with patch("porkbun_ddns.helpers.get_ips_from_fritzbox",
-                   side_effect=["1.2.3.4", "2001:db8::1"]) as mock:
+        with patch_external_ip() as mock:
             ips = resolve_fritzbox_public_ips("192.168.1.1", ipv4=True, ipv6=True)
-        self.assertEqual(mock.call_args_list, [
-            call("192.168.1.1", ip_version=4),
-            call("192.168.1.1", ip_version=6),
-        ])
+        mock.assert_has_calls([call(ANY, 4), call(ANY, 6)], any_order=True)
         self.assertEqual(ips, ["1.2.3.4", "2001:db8::1"])
 
     def test_no_family_returns_empty_list(self):
-        with patch("porkbun_ddns.helpers.get_ips_from_fritzbox") as mock:
+        with patch_external_ip() as mock:
             ips = resolve_fritzbox_public_ips("192.168.1.1", ipv4=False, ipv6=False)
         mock.assert_not_called()
         self.assertEqual(ips, [])
 
 
+class TestFritzboxSource(unittest.TestCase):
+
+    def setUp(self):
+        self.box = IGDMock().start()
+        self.addCleanup(self.box.stop)
+        self.box.external_ips = dict(EXTERNAL_IPS)
+        self.clock = FakeClock()
+        self.source = FritzboxSource("127.0.0.1", port=self.box.port,
+                                     timeout=2, _clock=self.clock)
+        self.addCleanup(self.source.transport.close)
+
+    def test_soap_round_trip(self):
+        self.assertEqual(self.source.external_ip(6), "2001:db8::1")
+        self.assertEqual(self.box.actions, ["X_AVM_DE_GetExternalIPv6Address"])
+
+    def test_one_parallel_fetch_per_cycle_over_kept_alive_connections(self):
+        # The pool runs on the same clock and outlives the 300 s cycle.
+        self.source.transport = HTTPConnectionPool(idle_timeout=360, _clock=self.clock)
+        self.addCleanup(self.source.transport.close)
+        for _ in range(3):
+            self.assertEqual(self.source.lookup(4), "1.2.3.4")
+            self.assertEqual(self.source.lookup(6), "2001:db8::1")
+            self.clock.now += 300
+        self.assertEqual(sorted(self.box.actions),
+                         ["GetExternalIPAddress"] * 3
+                         + ["X_AVM_DE_GetExternalIPv6Address"] * 3)
+        # At most one connection per family, reused every cycle.
+        self.assertLessEqual(len(self.box.connections), 2)
+
+    def test_families_are_fetched_in_parallel(self):
+        self.box.delay = 0.3
+        start = time.monotonic()
+        self.assertEqual(self.source.external_ips([4, 6]), ["1.2.3.4", "2001:db8::1"])
+        self.assertLess(time.monotonic() - start, 0.55)
+
+    def test_stale_answer_of_the_other_family_is_refetched(self):
+        self.source.lookup(4)
+        self.clock.now += 60
+        self.box.external_ips[6] = "2001:db8::2"
+        self.assertEqual(self.source.lookup(6), "2001:db8::2")
+
+    def test_fault_and_timeout_yield_none(self):
+        source = FritzboxSource("127.0.0.1", port=self.box.port, ipv6=False,
+                                timeout=0.1)
+        self.addCleanup(source.transport.close)
+        with self.assertLogs("porkbun_ddns", level="WARNING") as cm:
+            self.box.fail_next = 1
+            self.assertIsNone(source.lookup(4))
+            self.box.delay = 0.5
+            self.assertIsNone(source.lookup(4))
+        self.assertIn("HTTP Error 500", cm.output[0])
+        self.assertIn("timed out", cm.output[1])
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -13,6 +13,7 @@ import urllib.request
 import pytest
 
 from porkbun_ddns import PorkbunDDNS
+from porkbun_ddns.api import PorkbunAPIClient
 from porkbun_ddns.config import (
     DEFAULT_ENDPOINT,
     AppConfig,
@@ -26,8 +27,11 @@ SPEC_URL = "https://porkbun.com/api/json/v3/spec"
 
 DNS_ENDPOINTS = (
     "/dns/retrieve/{domain}",
+    "/dns/retrieveByNameType/{domain}/{type}/{subdomain}",
     "/dns/create/{domain}",
     "/dns/delete/{domain}/{id}",
+    "/dns/edit/{domain}/{id}",
+    "/dns/editByNameType/{domain}/{type}/{subdomain}",
 )
 
 
@@ -57,10 +61,16 @@ def _resolve_200_schema(spec: dict, path: str) -> dict:
 def _schema_for_path(path: str, schemas: dict) -> dict | None:
     if "/dns/retrieve/" in path:
         return schemas["retrieve"]
+    if "/dns/retrieveByNameType/" in path:
+        return schemas["retrieveByNameType"]
     if "/dns/create/" in path:
         return schemas["create"]
     if "/dns/delete/" in path:
         return schemas["delete"]
+    if "/dns/edit/" in path:
+        return schemas["edit"]
+    if "/dns/editByNameType/" in path:
+        return schemas["editByNameType"]
     return None
 
 
@@ -106,11 +116,16 @@ def test_mock_matches_spec():
             retry=RetryPolicy(),
             webhook=WebhookConfig(),
         )
-        # One update pass with a changed IP drives retrieve, delete and create.
+        # One update pass with a changed IP drives retrieve and edit.
         PorkbunDDNS(
             config.credentials, config.retry, "example.com", public_ips=["203.0.113.9"],
             ipv4=True, ipv6=False,
         ).update_records()
+        client = PorkbunAPIClient(config.credentials, config.retry)
+        client.create_record("example.com", "www", "A", "203.0.113.9")
+        client.edit_by_name_type("example.com", "A", "www", "203.0.113.10")
+        client.retrieve_by_name_type("example.com", "A", "www")
+        client.delete_record("example.com", "1")
     finally:
         mock.stop()
 
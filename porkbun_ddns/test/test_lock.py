@@ -0,0 +1,45 @@
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from porkbun_ddns.errors import PorkbunDDNS_Error
+from porkbun_ddns.lock import DomainLock, fcntl
+
+
+@unittest.skipIf(fcntl is None, "flock is not available")
+class TestDomainLock(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = Path(tmp.name) / "runtime"
+        self.first = DomainLock(self.directory)
+        self.second = DomainLock(self.directory, timeout=0.2)
+
+    def test_second_holder_times_out(self):
+        with self.first.hold("example.com"), \
+                self.assertLogs("porkbun_ddns", level="INFO") as cm, \
+                self.assertRaisesRegex(PorkbunDDNS_Error, "porkbun-ddns-example.com.lock"):
+            self.second.acquire("example.com")
+        self.assertEqual(cm.output,
+                         ["INFO:porkbun_ddns:Waiting for another run updating example.com."])
+
+    def test_domains_are_locked_independently(self):
+        with self.first.hold("example.com"), self.second.hold("example.org"):
+            pass
+
+    def test_waiter_gets_the_lock_once_released(self):
+        self.first.acquire("example.com")
+        timer = threading.Timer(0.05, self.first.release, ["example.com"])
+        timer.start()
+        second = DomainLock(self.directory, timeout=5)
+        with self.assertLogs("porkbun_ddns", level="INFO"), second.hold("example.com"):
+            pass
+        timer.join()
+        with self.second.hold("example.com"):
+            pass
+
+
+if __name__ == "__main__":
+    unittest.main()
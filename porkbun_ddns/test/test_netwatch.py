@@ -0,0 +1,95 @@
+import socket
+import struct
+import threading
+import unittest
+
+from porkbun_ddns.netwatch import (
+    RTM_DELADDR,
+    RTM_NEWADDR,
+    AddressWatcher,
+    parse_address_events,
+)
+
+RTM_NEWLINK = 16
+
+
+def nlmsg(msg_type: int, payload: bytes = b"\0" * 6) -> bytes:
+    """A netlink message with ``payload``, padded to 4 bytes."""
+    message = struct.pack("=IHHII", 16 + len(payload), msg_type, 0, 0, 0) + payload
+    return message + b"\0" * (-len(message) % 4)
+
+
+class TestParseAddressEvents(unittest.TestCase):
+
+    def test_multipart_datagram(self):
+        data = nlmsg(RTM_NEWLINK) + nlmsg(RTM_NEWADDR) + nlmsg(RTM_DELADDR)
+        self.assertEqual(parse_address_events(data), [RTM_NEWADDR, RTM_DELADDR])
+
+    def test_truncated_or_bogus_header(self):
+        self.assertEqual(parse_address_events(b"\x01\x02"), [])
+        self.assertEqual(parse_address_events(struct.pack("=IHHII", 0, 20, 0, 0, 0)), [])
+
+
+class TestAddressWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.kernel, sock = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.watcher = AddressWatcher(settle=0.05, _sock=sock)
+
+    def tearDown(self):
+        self.watcher.close()
+        self.kernel.close()
+
+    def test_times_out_without_events(self):
+        self.assertFalse(self.watcher.wait(0.05))
+
+    def test_ignores_non_address_messages(self):
+        self.kernel.send(nlmsg(RTM_NEWLINK))
+        self.assertFalse(self.watcher.wait(0.05))
+
+    def test_wakes_on_address_event_and_coalesces_the_burst(self):
+        def burst() -> None:
+            for _ in range(3):
+                self.kernel.send(nlmsg(RTM_NEWADDR))
+
+        timer = threading.Timer(0.05, burst)
+        timer.start()
+        self.assertTrue(self.watcher.wait(5))
+        timer.join()
+        # The burst was consumed while settling: nothing is left to wake on.
+        self.assertFalse(self.watcher.wait(0.05))
+
+    def test_read_error_counts_as_a_change(self):
+        class OverflowedSocket:
+            def __init__(self, sock):
+                self.sock = sock
+
+            def fileno(self):
+                return self.sock.fileno()
+
+            def recv(self, _size):
+                self.sock.recv(65536)
+                raise OSError(105, "No buffer space available")
+
+            def close(self):
+                self.sock.close()
+
+        self.watcher._sock = OverflowedSocket(self.watcher._sock)
+        self.kernel.send(nlmsg(RTM_NEWLINK))
+        with self.assertLogs("porkbun_ddns", level="WARNING") as cm:
+            self.assertTrue(self.watcher.wait(5))
+        self.assertIn("No buffer space available", cm.output[0])
+        self.assertFalse(self.watcher.wait(0.05))
+
+    @unittest.skipUnless(hasattr(socket, "AF_NETLINK"), "Linux only")
+    def test_real_netlink_socket(self):
+        try:
+            watcher = AddressWatcher()
+        except OSError as err:  # e.g. netlink blocked by a sandbox
+            self.skipTest(str(err))
+        self.addCleanup(watcher.close)
+        self.assertFalse(watcher.wait(0))
+
+
+if __name__ == "__main__":
+    unittest.main()
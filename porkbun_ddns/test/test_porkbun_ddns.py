@@ -1,10 +1,13 @@
+import asyncio
+import json
 import logging
 import unittest
+from ipaddress import IPv4Address
 from unittest.mock import MagicMock
 from urllib.error import HTTPError
 
 from porkbun_ddns import PorkbunDDNS
-from porkbun_ddns.api import PorkbunAPIClient
+from porkbun_ddns.api import AsyncPorkbunAPIClient, PorkbunAPIClient
 from porkbun_ddns.config import AppConfig, Credentials, RetryPolicy, WebhookConfig
 from porkbun_ddns.errors import PorkbunDDNS_Error
 from porkbun_ddns.resolver import PublicIPResolver
@@ -99,14 +102,13 @@ class TestPorkbunDDNS(unittest.TestCase):
             porkbun_ddns.set_subdomain("@")
             porkbun_ddns.update_records()
             self.assertEqual(cm.output,
-                             [("INFO:porkbun_ddns:Deleting A-Record for my-domain.local with content: "
-                              "127.0.0.2, Status: SUCCESS"),
-                              ("INFO:porkbun_ddns:Creating A-Record for my-domain.local with content: "
-                              "127.0.0.1, Status: SUCCESS"),
-                              ("INFO:porkbun_ddns:Deleting AAAA-Record for my-domain.local with content: "
-                              "0000:0000:0000:0000:0000:0000:0000:0002, Status: SUCCESS"),
-                              ("INFO:porkbun_ddns:Creating AAAA-Record for my-domain.local with content: "
+                             [("INFO:porkbun_ddns:Updating A-Record for my-domain.local with content: "
+                              "127.0.0.2 to A-Record with content: 127.0.0.1, Status: SUCCESS"),
+                              ("INFO:porkbun_ddns:Updating AAAA-Record for my-domain.local with content: "
+                              "0000:0000:0000:0000:0000:0000:0000:0002 to AAAA-Record with content: "
                               "0000:0000:0000:0000:0000:0000:0000:0001, Status: SUCCESS")])
+        self.assertEqual([e[1] for e in fake.edited], ["1111111111", "1111111112"])
+        self.assertEqual(fake.deleted, [])
 
     def test_record_do_not_exists(self):
         fake = StubPorkbunAPIClient(records=mock_api()["records"])
@@ -141,17 +143,291 @@ class TestPorkbunDDNS(unittest.TestCase):
             porkbun_ddns.set_subdomain("@")
             porkbun_ddns.update_records()
             self.assertEqual(cm.output,
-                             [("INFO:porkbun_ddns:Deleting ALIAS-Record for my-domain.local with content: "
-                              "my-domain.lan, Status: SUCCESS"),
-                              ("INFO:porkbun_ddns:Creating A-Record for my-domain.local with content: "
-                              "127.0.0.1, Status: SUCCESS"),
-                              ("INFO:porkbun_ddns:Deleting CNAME-Record for my-domain.local with content: "
-                              "my-domain.lan, Status: SUCCESS"),
-                              ("INFO:porkbun_ddns:Creating A-Record for my-domain.local with content: "
-                              "127.0.0.1, Status: SUCCESS"),
+                             [("INFO:porkbun_ddns:Updating ALIAS-Record for my-domain.local with content: "
+                              "my-domain.lan to A-Record with content: 127.0.0.1, Status: SUCCESS"),
+                              ("INFO:porkbun_ddns:Updating CNAME-Record for my-domain.local with content: "
+                              "my-domain.lan to A-Record with content: 127.0.0.1, Status: SUCCESS"),
                               ("INFO:porkbun_ddns:Creating AAAA-Record for my-domain.local with content: "
                               "0000:0000:0000:0000:0000:0000:0000:0001, Status: SUCCESS")])
 
+    def test_update_many_retrieves_and_resolves_once(self):
+        fake = StubPorkbunAPIClient(records=mock_api(
+            status="SUCCESS",
+            mock_records=[
+                {
+                    "name": "www.my-domain.local",
+                    "type": "A",
+                    "content": "127.0.0.2"},
+                {
+                    "name": "my-domain.local",
+                    "type": "A",
+                    "content": "127.0.0.1"},
+            ])["records"])
+        resolver = MagicMock()
+        resolver.resolve.return_value = [IPv4Address("127.0.0.1")]
+        porkbun_ddns = PorkbunDDNS(valid_config.credentials, valid_config.retry, domain,
+                                   client=fake, resolver=resolver)
+        with self.assertLogs("porkbun_ddns", level="INFO") as cm:
+            porkbun_ddns.update_many(["@", "www", "WWW", "api"])
+        self.assertEqual(fake.retrieved, [domain])
+        resolver.resolve.assert_called_once()
+        self.assertEqual(fake.edited, [
+            (domain, "1111111111", "www", "A", "127.0.0.1", 600)])
+        self.assertEqual(fake.created, [
+            (domain, "api", "A", "127.0.0.1", 600),
+        ])
+        self.assertEqual(
+            [(c["fqdn"], c["old_ip"]) for c in porkbun_ddns.changes],
+            [("www.my-domain.local", "127.0.0.2"), ("api.my-domain.local", None)])
+        self.assertIn("INFO:porkbun_ddns:A-Record of my-domain.local is up to date!",
+                      cm.output)
+
+    def test_concurrent_apply_keeps_changes_in_plan_order(self):
+        names = [f"host{i}" for i in range(8)]
+        fake = StubPorkbunAPIClient(records=mock_api(
+            status="SUCCESS",
+            mock_records=[{"name": f"{name}.my-domain.local", "type": "A",
+                           "content": "127.0.0.2"} for name in names[::2]],
+        )["records"])
+        porkbun_ddns = PorkbunDDNS(valid_config.credentials, valid_config.retry, domain,
+                                   ["127.0.0.1", "::1"], client=fake, apply_workers=4)
+        with self.assertLogs("porkbun_ddns", level="INFO"):
+            porkbun_ddns.update_many(names)
+        self.assertEqual(len(fake.edited), 4)
+        self.assertEqual(len(fake.created), 12)
+        self.assertEqual(
+            [(c["fqdn"], c["record_type"]) for c in porkbun_ddns.changes],
+            [(f"{name}.my-domain.local", record_type)
+             for name in names for record_type in ("A", "AAAA")])
+
+    def test_failed_intent_still_records_the_other_changes(self):
+        fake = StubPorkbunAPIClient()
+        create = fake.create_record
+
+        def create_record(domain, name, record_type, content, ttl=600):
+            if name == "bad":
+                raise PorkbunDDNS_Error("boom")
+            return create(domain, name, record_type, content, ttl)
+
+        fake.create_record = create_record
+        porkbun_ddns = PorkbunDDNS(valid_config.credentials, valid_config.retry, domain,
+                                   ["127.0.0.1"], client=fake, apply_workers=2)
+        with self.assertLogs("porkbun_ddns", level="INFO"), \
+                self.assertRaises(PorkbunDDNS_Error):
+            porkbun_ddns.update_many(["www", "bad", "api"])
+        self.assertEqual([c["fqdn"] for c in porkbun_ddns.changes],
+                         ["www.my-domain.local", "api.my-domain.local"])
+
+    def test_plan_many_writes_nothing_and_round_trips_through_json(self):
+        fake = StubPorkbunAPIClient(records=mock_api(mock_records=[
+            {"name": "www.my-domain.local", "type": "CNAME", "content": "my-domain.local"},
+        ])["records"])
+        porkbun_ddns = PorkbunDDNS(valid_config.credentials, valid_config.retry, domain,
+                                   ["127.0.0.1"], client=fake)
+        with self.assertNoLogs("porkbun_ddns", level="INFO"):
+            plan = json.loads(json.dumps(porkbun_ddns.plan_many(["www", "api"])))
+        self.assertEqual((fake.retrieved, fake.created, fake.edited), ([domain], [], []))
+        self.assertEqual(plan["ips"], ["127.0.0.1"])
+        self.assertEqual(plan["intents"], [
+            {"subdomain": "www", "record_type": "A", "fqdn": "www.my-domain.local",
+             "content": "127.0.0.1", "replacing_id": "1111111111",
+             "old_type": "CNAME", "old_content": "my-domain.local"},
+            {"subdomain": "api", "record_type": "A", "fqdn": "api.my-domain.local",
+             "content": "127.0.0.1", "replacing_id": None,
+             "old_type": None, "old_content": None},
+        ])
+
+        fake.retrieved.clear()
+        porkbun_ddns = PorkbunDDNS(valid_config.credentials, valid_config.retry, domain,
+                                   client=fake, resolver=MagicMock())
+        with self.assertLogs("porkbun_ddns", level="INFO"):
+            porkbun_ddns.apply_plan(plan)
+        porkbun_ddns.resolver.resolve.assert_not_called()
+        self.assertEqual(fake.retrieved, [])
+        self.assertEqual(fake.edited, [
+            (domain, "1111111111", "www", "A", "127.0.0.1", 600)])
+        self.assertEqual(fake.created, [(domain, "api", "A", "127.0.0.1", 600)])
+        self.assertEqual([c["old_ip"] for c in porkbun_ddns.changes],
+                         ["my-domain.local", None])
+
+    def test_apply_plan_rejects_foreign_or_malformed_plans(self):
+        porkbun_ddns = PorkbunDDNS(valid_config.credentials, valid_config.retry, domain,
+                                   client=StubPorkbunAPIClient())
+        for plan in ({"version": 1, "domain": "other.local", "intents": []},
+                     {"version": 2, "domain": domain, "intents": []},
+                     {"version": 1, "domain": domain, "intents": [{"fqdn": domain}]}):
+            with self.subTest(plan=plan), self.assertRaises(PorkbunDDNS_Error):
+                porkbun_ddns.apply_plan(plan)
+
+    def test_apply_plan_with_stale_record_id_journals_every_attempt(self):
+        fake = StubPorkbunAPIClient()
+
+        def edit_record(*args):
+            fake.edited.append(args)
+            raise PorkbunDDNS_Error("Edit error: Invalid record id.")
+
+        fake.edit_record = edit_record
+        porkbun_ddns = PorkbunDDNS(valid_config.credentials, valid_config.retry, domain,
+                                   client=fake)
+        plan = {"version": 1, "domain": domain, "ips": ["127.0.0.1"],
+                "intents": [{"subdomain": "@", "record_type": "A",
+                             "fqdn": domain, "content": "127.0.0.1",
+                             "replacing_id": "999", "old_type": "A",
+                             "old_content": "127.0.0.2"}]}
+        with self.assertLogs("porkbun_ddns", level="WARNING"), \
+                self.assertRaisesRegex(PorkbunDDNS_Error, f"A-Record for {domain}"):
+            porkbun_ddns.apply_plan(plan)
+        self.assertEqual(len(fake.edited), 2)
+        self.assertEqual([(e["attempt"], e["status"]) for e in porkbun_ddns.journal],
+                         [(1, None), (2, None)])
+        self.assertTrue(all(e["error"] for e in porkbun_ddns.journal))
+        self.assertEqual(porkbun_ddns.changes, [])
+
+    def test_failed_write_is_retried_within_the_pass(self):
+        fake = StubPorkbunAPIClient(records=mock_api(mock_records=[
+            {"name": "my-domain.local", "type": "A", "content": "127.0.0.2"},
+        ])["records"])
+        statuses = iter(["ERROR", "SUCCESS"])
+        edit = fake.edit_record
+        fake.edit_record = lambda *args: edit(*args) and next(statuses)
+        porkbun_ddns = PorkbunDDNS(valid_config.credentials, valid_config.retry, domain,
+                                   ["127.0.0.1"], client=fake)
+        with self.assertLogs("porkbun_ddns", level="WARNING") as cm:
+            porkbun_ddns.update_records()
+        self.assertIn("failed with status ERROR, retrying (attempt 1/2)", cm.output[0])
+        self.assertEqual(len(fake.edited), 2)
+        self.assertEqual([(e["step"], e["attempt"], e["status"]) for e in porkbun_ddns.journal],
+                         [("edit", 1, "ERROR"), ("edit", 2, "SUCCESS")])
+        self.assertEqual([c["old_ip"] for c in porkbun_ddns.changes], ["127.0.0.2"])
+
+    def test_write_raising_an_api_error_is_journaled_and_retried(self):
+        fake = StubPorkbunAPIClient(records=mock_api(mock_records=[
+            {"name": "my-domain.local", "type": "A", "content": "127.0.0.2"},
+        ])["records"])
+        edit = fake.edit_record
+        failures = iter([PorkbunDDNS_Error("HTTP 503")])
+
+        def edit_record(*args):
+            edit(*args)
+            for err in failures:
+                raise err
+            return "SUCCESS"
+
+        fake.edit_record = edit_record
+        porkbun_ddns = PorkbunDDNS(valid_config.credentials, valid_config.retry, domain,
+                                   ["127.0.0.1"], client=fake)
+        with self.assertLogs("porkbun_ddns", level="WARNING") as cm:
+            porkbun_ddns.update_records()
+        self.assertIn("failed with error: HTTP 503, retrying (attempt 1/2)", cm.output[0])
+        self.assertEqual(len(fake.edited), 2)
+        self.assertEqual([(e["status"], e["error"]) for e in porkbun_ddns.journal],
+                         [(None, "HTTP 503"), ("SUCCESS", None)])
+        self.assertEqual(len(porkbun_ddns.changes), 1)
+
+    def test_create_is_not_repeated_when_the_failed_attempt_landed(self):
+        fake = StubPorkbunAPIClient()
+
+        def create_record(domain, name, record_type, content, ttl=600):
+            fake.created.append((domain, name, record_type, content, ttl))
+            fake.records.append({"id": "1", "name": f"{name}.{domain}",
+                                 "type": record_type, "content": content})
+            return "ERROR"
+
+        fake.create_record = create_record
+        porkbun_ddns = PorkbunDDNS(valid_config.credentials, valid_config.retry, domain,
+                                   ["127.0.0.1"], client=fake)
+        with self.assertLogs("porkbun_ddns", level="INFO"):
+            porkbun_ddns.update_many(["www"])
+        self.assertEqual(len(fake.created), 1)
+        self.assertEqual(fake.retrieved_by_name_type, [(domain, "A", "www")])
+        self.assertEqual([(e["attempt"], e["status"]) for e in porkbun_ddns.journal],
+                         [(1, "ERROR"), (2, "SUCCESS")])
+        self.assertEqual(len(porkbun_ddns.changes), 1)
+
+    def test_write_failing_every_attempt_raises_without_a_change(self):
+        fake = StubPorkbunAPIClient()
+        fake.create_record = lambda *args: "ERROR"
+        porkbun_ddns = PorkbunDDNS(valid_config.credentials, valid_config.retry, domain,
+                                   ["127.0.0.1"], client=fake, write_attempts=3)
+        with self.assertLogs("porkbun_ddns", level="INFO"), \
+                self.assertRaisesRegex(PorkbunDDNS_Error, "A-Record for my-domain.local"):
+            porkbun_ddns.update_records()
+        self.assertEqual(len(porkbun_ddns.journal), 3)
+        self.assertEqual(porkbun_ddns.changes, [])
+
+    def test_recheck_skips_records_another_run_already_fixed(self):
+        fake = StubPorkbunAPIClient(records=mock_api(mock_records=[
+            {"name": "www.my-domain.local", "type": "A", "content": "127.0.0.2"},
+        ])["records"])
+        snapshot = list(fake.records)
+        # Another run fixes www and creates api after our snapshot was taken.
+        fake.records = [{**snapshot[0], "content": "127.0.0.1"},
+                        {"id": "2", "name": "api.my-domain.local", "type": "A",
+                         "content": "127.0.0.1"}]
+        fake.retrieve_records = lambda _domain: snapshot
+        porkbun_ddns = PorkbunDDNS(valid_config.credentials, valid_config.retry, domain,
+                                   ["127.0.0.1"], client=fake, recheck_writes=True)
+        with self.assertLogs("porkbun_ddns", level="INFO") as cm:
+            porkbun_ddns.update_many(["www", "api", "mail"])
+        self.assertIn("INFO:porkbun_ddns:A-Record of www.my-domain.local was "
+                      "already updated by another run!", cm.output)
+        self.assertEqual(fake.edited, [])
+        self.assertEqual(fake.created, [(domain, "mail", "A", "127.0.0.1", 600)])
+        self.assertEqual([e["step"] for e in porkbun_ddns.journal],
+                         ["skip", "skip", "create"])
+        self.assertEqual([c["fqdn"] for c in porkbun_ddns.changes],
+                         ["mail.my-domain.local"])
+
+    def test_update_many_holds_the_domain_lock(self):
+        lock = MagicMock()
+        fake = StubPorkbunAPIClient()
+        porkbun_ddns = PorkbunDDNS(valid_config.credentials, valid_config.retry, domain,
+                                   ["127.0.0.1"], client=fake, lock=lock)
+        lock.hold.return_value.__enter__.side_effect = lambda: self.assertEqual(
+            fake.retrieved, [])
+        with self.assertLogs("porkbun_ddns", level="INFO"):
+            porkbun_ddns.update_records()
+        lock.hold.assert_called_once_with(domain)
+        lock.hold.return_value.__exit__.assert_called_once()
+        self.assertEqual(fake.retrieved, [domain])
+
+    def test_update_many_defaults_to_current_subdomain(self):
+        fake = StubPorkbunAPIClient()
+        porkbun_ddns = PorkbunDDNS(valid_config.credentials, valid_config.retry, domain,
+                                   ["127.0.0.1"], client=fake)
+        porkbun_ddns.set_subdomain("www")
+        porkbun_ddns.update_many()
+        self.assertEqual(fake.created, [(domain, "www", "A", "127.0.0.1", 600)])
+
+    def test_targeted_retrieve_skips_alias_and_cname_when_address_exists(self):
+        fake = StubPorkbunAPIClient(records=mock_api(
+            status="SUCCESS",
+            mock_records=[
+                {"name": "www.my-domain.local", "type": "A", "content": "127.0.0.2"},
+                {"name": "api.my-domain.local", "type": "CNAME", "content": "my-domain.lan"},
+                {"name": "my-domain.local", "type": "MX", "content": "mail.my-domain.lan"},
+            ])["records"])
+        porkbun_ddns = PorkbunDDNS(valid_config.credentials, valid_config.retry, domain,
+                                   ["127.0.0.1"], client=fake, max_targeted_fqdns=2)
+        porkbun_ddns.update_many(["www", "api"])
+        self.assertEqual(fake.retrieved, [])
+        self.assertEqual(fake.retrieved_by_name_type, [
+            (domain, "A", "www"),
+            (domain, "A", "api"), (domain, "ALIAS", "api"), (domain, "CNAME", "api"),
+        ])
+        self.assertEqual(fake.edited, [
+            (domain, "1111111111", "www", "A", "127.0.0.1", 600),
+            (domain, "1111111112", "api", "A", "127.0.0.1", 600),
+        ])
+
+    def test_targeted_retrieve_falls_back_to_full_retrieve(self):
+        fake = StubPorkbunAPIClient()
+        porkbun_ddns = PorkbunDDNS(valid_config.credentials, valid_config.retry, domain,
+                                   ["127.0.0.1"], client=fake, max_targeted_fqdns=2)
+        porkbun_ddns.update_many(["@", "www", "api"])
+        self.assertEqual(fake.retrieved, [domain])
+        self.assertEqual(fake.retrieved_by_name_type, [])
+
     def test_urlopen_returns_500_ipv4(self):
         resolver = PublicIPResolver(ipv4=True, ipv6=False, _urlopen=fake_urlopen_500)
         porkbun_ddns = PorkbunDDNS(valid_config.credentials, valid_config.retry,
@@ -270,6 +546,106 @@ class TestApiRetry(unittest.TestCase):
 
         self.assertEqual(self.mock.request_count, 1)
 
+    def _client(self, clock=None, **retry) -> tuple[PorkbunAPIClient, list]:
+        sleeps = []
+        policy = RetryPolicy(**{"retry_delay": 1, "retry_jitter": 0, **retry})
+        client = PorkbunAPIClient(self.credentials, policy,
+                                  _clock=clock or (lambda: 0.0),
+                                  _sleep=sleeps.append, _random=lambda: 1.0)
+        return client, sleeps
+
+    def test_backoff_grows_exponentially_up_to_the_cap(self):
+        self.mock.fail_next = 4
+        client, sleeps = self._client(retry_count=5, retry_max_delay=3)
+
+        with self.assertLogs("porkbun_ddns", level="WARNING"):
+            client.retrieve_records(domain)
+
+        self.assertEqual(sleeps, [1, 2, 3, 3])
+
+    def test_jitter_shortens_the_delay(self):
+        self.mock.fail_next = 2
+        client, sleeps = self._client(retry_delay=4, retry_jitter=0.5)
+
+        with self.assertLogs("porkbun_ddns", level="WARNING"):
+            client.retrieve_records(domain)
+
+        self.assertEqual(sleeps, [2, 4])
+
+    def test_http_429_retries_honoring_retry_after(self):
+        self.mock.fail_next = 1
+        self.mock.fail_status = 429
+        self.mock.retry_after = "7"
+        client, sleeps = self._client()
+
+        with self.assertLogs("porkbun_ddns", level="WARNING") as cm:
+            self.assertEqual(client.retrieve_records(domain), [])
+
+        self.assertEqual(sleeps, [7])
+        self.assertIn("HTTP 429 Retrying in 7 seconds", cm.output[0])
+
+    def test_retry_after_is_capped_at_the_max_delay(self):
+        self.mock.fail_next = 1
+        self.mock.fail_status = 429
+        self.mock.retry_after = "86400"
+        client, sleeps = self._client(retry_max_delay=60)
+
+        with self.assertLogs("porkbun_ddns", level="WARNING"):
+            client.retrieve_records(domain)
+
+        self.assertEqual(sleeps, [60])
+
+    def test_retry_after_http_date(self):
+        self.mock.fail_next = 1
+        self.mock.fail_status = 503
+        self.mock.retry_after = "Wed, 21 Oct 2015 07:28:00 GMT"
+        client, sleeps = self._client(retry_delay=2)
+
+        with self.assertLogs("porkbun_ddns", level="WARNING"):
+            client.retrieve_records(domain)
+
+        # A date in the past does not delay beyond the backoff.
+        self.assertEqual(sleeps, [2])
+
+    def test_deadline_stops_retrying(self):
+        self.mock.fail_next = 3
+        now = [100.0]
+        client, sleeps = self._client(clock=lambda: now[0], retry_delay=10,
+                                      retry_deadline=5)
+
+        with self.assertRaises(PorkbunDDNS_Error) as context:
+            client.retrieve_records(domain)
+
+        self.assertIn("5s deadline", str(context.exception))
+        self.assertEqual(sleeps, [])
+        self.assertEqual(self.mock.request_count, 1)
+
+    def test_edit_record_keeps_id(self):
+        self.client.create_record(domain, "www", "A", "127.0.0.1")
+        record_id = self.mock.records[domain][0]["id"]
+
+        status = self.client.edit_record(domain, record_id, "www", "A", "127.0.0.2")
+
+        self.assertEqual(status, "SUCCESS")
+        self.assertEqual(
+            [(r["id"], r["name"], r["content"]) for r in self.mock.records[domain]],
+            [(record_id, "www." + domain, "127.0.0.2")])
+
+    def test_edit_unknown_record_raises(self):
+        with self.assertRaisesRegex(PorkbunDDNS_Error, "rejected .*/dns/edit/.*: Invalid record ID."):
+            self.client.edit_record(domain, "999", "www", "A", "127.0.0.2")
+        self.assertEqual(self.mock.request_count, 1)
+
+    def test_edit_by_name_type(self):
+        self.client.create_record(domain, "@", "A", "127.0.0.1")
+        self.client.create_record(domain, "www", "A", "127.0.0.1")
+
+        self.client.edit_by_name_type(domain, "A", "@", "127.0.0.2")
+
+        self.assertEqual(
+            [(r["name"], r["content"]) for r in self.mock.records[domain]],
+            [(domain, "127.0.0.2"), ("www." + domain, "127.0.0.1")])
+
     def test_retry_fields_not_sent_in_request_body(self):
         self.client.retrieve_records(domain)
 
@@ -281,5 +657,93 @@ class TestApiRetry(unittest.TestCase):
         self.assertEqual(body["secretapikey"], self.credentials.secretapikey)
 
 
+class TestAsyncUpdate(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.mock = PorkbunAPIMock(apikey="test-apikey", secretapikey="test-secret")
+        self.mock.start()
+        self.credentials = Credentials(
+            apikey="test-apikey",
+            secretapikey="test-secret",
+            endpoint=f"{self.mock.url}/api/json/v3",
+        )
+        self.retry = RetryPolicy(retry_count=3, retry_delay=0)
+
+    def tearDown(self):
+        self.mock.stop()
+
+    async def test_update_many_async_across_domains(self):
+        client = AsyncPorkbunAPIClient(self.credentials, self.retry, max_concurrency=2)
+        instances = [
+            PorkbunDDNS(self.credentials, self.retry, name, ["203.0.113.5"],
+                        ipv6=False)
+            for name in ("example.com", "example.org")
+        ]
+        await asyncio.gather(*(
+            instance.update_many_async(["@", "www"], client)
+            for instance in instances))
+        for name in ("example.com", "example.org"):
+            self.assertEqual(
+                sorted(r["name"] for r in self.mock.records[name]),
+                [name, f"www.{name}"])
+        self.assertEqual(self.mock.request_count, 6)
+        self.assertEqual(len(instances[0].changes), 2)
+
+    async def test_update_many_async_edits_in_place(self):
+        fake = StubPorkbunAPIClient(records=mock_api(
+            status="SUCCESS",
+            mock_records=[{"name": "my-domain.local", "type": "A",
+                           "content": "127.0.0.2"}])["records"])
+        porkbun_ddns = PorkbunDDNS(valid_config.credentials, valid_config.retry,
+                                   domain, ["127.0.0.1"], client=fake)
+        await porkbun_ddns.update_many_async()
+        self.assertEqual(fake.edited, [
+            (domain, "1111111111", "@", "A", "127.0.0.1", 600)])
+        self.assertEqual(fake.created, [])
+        self.assertEqual(porkbun_ddns.changes[0]["old_ip"], "127.0.0.2")
+
+    async def test_update_many_async_retries_failed_write(self):
+        fake = StubPorkbunAPIClient()
+        statuses = iter(["ERROR", "SUCCESS"])
+        create = fake.create_record
+        fake.create_record = lambda *args: create(*args) and next(statuses)
+        porkbun_ddns = PorkbunDDNS(valid_config.credentials, valid_config.retry,
+                                   domain, ["127.0.0.1"], client=fake)
+        with self.assertLogs("porkbun_ddns", level="WARNING"):
+            await porkbun_ddns.update_many_async(["www"])
+        # The first create did not land, so it is sent again.
+        self.assertEqual(fake.retrieved_by_name_type, [(domain, "A", "www")])
+        self.assertEqual(len(fake.created), 2)
+        self.assertEqual([e["status"] for e in porkbun_ddns.journal],
+                         ["ERROR", "SUCCESS"])
+
+    async def test_update_many_async_targeted_retrieve(self):
+        self.mock.records["example.com"] = [
+            {"id": "1", "name": "www.example.com", "type": "A",
+             "content": "203.0.113.1", "ttl": "600"},
+            {"id": "2", "name": "example.com", "type": "TXT",
+             "content": "v=spf1 -all", "ttl": "600"},
+        ]
+        instance = PorkbunDDNS(self.credentials, self.retry, "example.com",
+                               ["203.0.113.5"], ipv6=False, max_targeted_fqdns=1)
+        await instance.update_many_async(["www"])
+        self.assertEqual([path.split("/")[5] for path, _, _ in self.mock.responses],
+                         ["retrieveByNameType", "edit"])
+        self.assertEqual(self.mock.records["example.com"][0]["content"], "203.0.113.5")
+
+    async def test_async_client_retries_like_sync_client(self):
+        self.mock.fail_next = 2
+        client = AsyncPorkbunAPIClient(self.credentials, self.retry)
+        with self.assertLogs("porkbun_ddns", level="WARNING"):
+            self.assertEqual(await client.retrieve_records(domain), [])
+        self.assertEqual(self.mock.request_count, 3)
+
+    async def test_async_client_raises_after_all_retries(self):
+        self.mock.fail_next = 3
+        client = AsyncPorkbunAPIClient(self.credentials, self.retry)
+        with self.assertRaises(PorkbunDDNS_Error):
+            await client.retrieve_records(domain)
+
+
 if __name__ == "__main__":
     unittest.main()
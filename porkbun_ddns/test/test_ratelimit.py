@@ -0,0 +1,90 @@
+import threading
+import unittest
+
+from porkbun_ddns.api import PorkbunAPIClient
+from porkbun_ddns.config import Credentials, RetryPolicy
+from porkbun_ddns.ratelimit import TokenBucket
+from porkbun_ddns.test.mock_porkbun_api import PorkbunAPIMock
+from porkbun_ddns.test.stubs import FakeClock
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def bucket(self, rate: float, burst: int = 1) -> TokenBucket:
+        return TokenBucket(rate, burst, _clock=self.clock, _sleep=self.clock.sleep)
+
+    def test_burst_passes_then_requests_are_spaced(self):
+        bucket = self.bucket(rate=2, burst=3)
+        for _ in range(5):
+            bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [0.5, 0.5])
+
+    def test_idle_time_refills_up_to_burst(self):
+        bucket = self.bucket(rate=1, burst=2)
+        bucket.acquire()
+        bucket.acquire()
+        self.clock.now += 10
+        for _ in range(3):
+            bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [1.0])
+
+    def test_concurrent_callers_reserve_distinct_slots(self):
+        bucket = TokenBucket(rate=10, burst=1, _clock=lambda: 0.0)
+        waits: list[float] = []
+        lock = threading.Lock()
+
+        def reserve() -> None:
+            wait = bucket.reserve()
+            with lock:
+                waits.append(wait)
+
+        threads = [threading.Thread(target=reserve) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(waits), [0.0, 0.1, 0.2, 0.3, 0.4])
+
+    def test_invalid_settings(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(0)
+        with self.assertRaises(ValueError):
+            TokenBucket(1, burst=0)
+
+
+class TestClientRateLimit(unittest.TestCase):
+
+    def setUp(self):
+        self.mock = PorkbunAPIMock(apikey="test-apikey", secretapikey="test-secret")
+        self.mock.start()
+        self.clock = FakeClock()
+        self.bucket = TokenBucket(1, 1, _clock=self.clock, _sleep=self.clock.sleep)
+        credentials = Credentials(apikey="test-apikey", secretapikey="test-secret",
+                                  endpoint=f"{self.mock.url}/api/json/v3")
+        self.clients = [
+            PorkbunAPIClient(credentials, RetryPolicy(retry_delay=0),
+                             rate_limiter=self.bucket)
+            for _ in range(2)
+        ]
+
+    def tearDown(self):
+        self.mock.stop()
+
+    def test_clients_share_the_bucket(self):
+        for client in self.clients:
+            client.retrieve_records("example.com")
+        self.assertEqual(self.clock.sleeps, [1.0])
+
+    def test_retries_consume_tokens(self):
+        self.mock.fail_next = 2
+        with self.assertLogs("porkbun_ddns", level="WARNING"):
+            self.clients[0].retrieve_records("example.com")
+        self.assertEqual(self.mock.request_count, 3)
+        self.assertEqual(self.clock.sleeps, [1.0, 1.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
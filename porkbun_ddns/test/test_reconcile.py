@@ -1,7 +1,9 @@
+import random
+import time
 import unittest
 from ipaddress import IPv4Address, IPv6Address
 
-from porkbun_ddns.reconcile import Ensure, reconcile
+from porkbun_ddns.reconcile import Ensure, reconcile, reconcile_many
 
 FQDN = "example.com"
 
@@ -138,6 +140,106 @@ class TestReconcile(unittest.TestCase):
             ],
         )
 
+    def test_replacements_follow_snapshot_order_across_types(self):
+        self.assertEqual(
+            reconcile(
+                [
+                    {"name": FQDN, "type": "CNAME", "content": "b.lan", "id": "r1"},
+                    {"name": FQDN, "type": "A", "content": "1.2.3.4", "id": "r2"},
+                    {"name": FQDN, "type": "ALIAS", "content": "a.lan", "id": "r3"},
+                ],
+                [IPv4Address("5.6.7.8")],
+                FQDN,
+            ),
+            [
+                Ensure("A", FQDN, "5.6.7.8", "r1"),
+                Ensure("A", FQDN, "5.6.7.8", "r2"),
+                Ensure("A", FQDN, "5.6.7.8", "r3"),
+            ],
+        )
+
+
+def _zone(size: int, seed: int = 0) -> tuple[list[dict], dict]:
+    """A random zone of ``size`` records over ``size // 10`` fqdns."""
+    rng = random.Random(seed)
+    fqdns = [f"host{i}.{FQDN}" for i in range(size // 10)]
+    types = ("A", "AAAA", "ALIAS", "CNAME", "MX", "TXT")
+    contents = ("1.2.3.4", "5.6.7.8", IPv6Address("2001:db8::1").exploded, "x.lan")
+    records = [
+        {"name": rng.choice(fqdns), "type": rng.choice(types),
+         "content": rng.choice(contents), "id": str(i)}
+        for i in range(size)
+    ]
+    desired = {fqdn: [IPv4Address("1.2.3.4"), IPv6Address("2001:db8::1")]
+               for fqdn in fqdns}
+    return records, desired
+
+
+class TestReconcileMany(unittest.TestCase):
+
+    def test_matches_reconcile_per_fqdn(self):
+        records, desired = _zone(2000)
+        expected = [action for fqdn, ips in desired.items()
+                    for action in _scan_reconcile(records, ips, fqdn)]
+        self.assertEqual(reconcile_many(records, desired), expected)
+
+    def test_empty_snapshot_creates_everything(self):
+        self.assertEqual(
+            reconcile_many([], {FQDN: [IPv4Address("1.2.3.4")],
+                                "www." + FQDN: [IPv4Address("1.2.3.4")]}),
+            [Ensure("A", FQDN, "1.2.3.4", None),
+             Ensure("A", "www." + FQDN, "1.2.3.4", None)],
+        )
+
+
+def _scan_reconcile(existing_records, desired_ips, fqdn):
+    """The original full-scan reconcile, kept as the reference behaviour."""
+    actions = []
+    replaced_ids = set()
+    for ip in desired_ips:
+        record_type = "A" if ip.version == 4 else "AAAA"
+        content = ip.exploded
+        ensured = False
+        for record in existing_records:
+            if record.get("name") != fqdn or record.get("id") in replaced_ids:
+                continue
+            rtype = record.get("type")
+            if rtype in ("ALIAS", "CNAME") or (
+                    rtype == record_type and record.get("content") != content):
+                actions.append(Ensure(record_type, fqdn, content, record.get("id")))
+                replaced_ids.add(record.get("id"))
+                ensured = True
+        has_type = any(
+            r.get("name") == fqdn and r.get("type") == record_type
+            and r.get("id") not in replaced_ids
+            for r in existing_records)
+        if not has_type and not ensured:
+            actions.append(Ensure(record_type, fqdn, content, None))
+    return actions
+
+
+def benchmark(sizes=(10_000, 20_000, 40_000)) -> None:
+    """Print reconcile_many timings for zones of growing size.
+
+    The zones have one fqdn per ten records, so a full scan per fqdn grows
+    quadratically while the indexed pass grows linearly.
+    Run with ``python -m porkbun_ddns.test.test_reconcile --benchmark``.
+    """
+    baseline = None
+    for size in sizes:
+        records, desired = _zone(size)
+        start = time.perf_counter()
+        reconcile_many(records, desired)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed / size
+        print(f"{size:>7} records, {len(desired):>5} fqdns: {elapsed * 1000:8.1f} ms "
+              f"({elapsed / size / baseline:.2f}x per record)")
+
 
 if __name__ == "__main__":
+    import sys
+
+    if "--benchmark" in sys.argv:
+        benchmark()
+        sys.exit()
     unittest.main()
@@ -1,11 +1,17 @@
 from __future__ import annotations
 
+import threading
+import time
 import unittest
 from ipaddress import IPv4Address, IPv6Address
 from unittest.mock import MagicMock
 
 from porkbun_ddns.errors import PorkbunDDNS_Error
-from porkbun_ddns.resolver import PublicIPResolver
+from porkbun_ddns.resolver import (
+    PUBLIC_HTTP_PROVIDERS,
+    ProviderHealth,
+    PublicIPResolver,
+)
 
 
 def make_urlopen(*code_body) -> callable:
@@ -89,5 +95,245 @@ class TestPublicIPResolver(unittest.TestCase):
             resolver.resolve()
 
 
+def make_url_urlopen(answers: dict[str, str], delays: dict[str, float] | None = None):
+    """Build a fake _urlopen answering per URL, optionally after a delay."""
+    delays = delays or {}
+
+    def _urlopen(url, timeout=30):
+        time.sleep(delays.get(url, 0))
+        response = MagicMock()
+        response.getcode.return_value = 200
+        response.read.return_value = answers[url].encode("utf-8")
+        return response
+
+    return _urlopen
+
+
+class TestPublicIPResolverRace(unittest.TestCase):
+
+    def setUp(self):
+        self.release = threading.Event()
+
+    def tearDown(self):
+        # Let lookups the race left running finish cleanly.
+        self.release.set()
+
+    def test_fastest_provider_wins(self):
+        answers = {
+            "https://v4.ident.me": "1.1.1.1",
+            "https://api.ipify.org": "2.2.2.2",
+            "https://ipv4.icanhazip.com": "3.3.3.3",
+        }
+        delays = {"https://v4.ident.me": 5, "https://ipv4.icanhazip.com": 5}
+        resolver = PublicIPResolver(
+            ipv4=True, ipv6=False, race=True,
+            _urlopen=make_url_urlopen(answers, delays))
+        start = time.monotonic()
+        self.assertEqual(resolver.resolve(), [IPv4Address("2.2.2.2")])
+        self.assertLess(time.monotonic() - start, 2)
+
+    def test_invalid_answers_are_skipped(self):
+        answers = {
+            "https://v4.ident.me": "<html>proxy error</html>",
+            "https://api.ipify.org": "2001:db8::1",
+            "https://ipv4.icanhazip.com": "3.3.3.3",
+        }
+        delays = {"https://ipv4.icanhazip.com": 0.2}
+        resolver = PublicIPResolver(
+            ipv4=True, ipv6=False, race=True,
+            _urlopen=make_url_urlopen(answers, delays))
+        with self.assertLogs("porkbun_ddns", level="WARNING"):
+            self.assertEqual(resolver.resolve(), [IPv4Address("3.3.3.3")])
+
+    def test_families_resolved_in_parallel(self):
+        # Each family's providers block until the other family is queried,
+        # which only completes if v4 and v6 run concurrently.
+        barrier = threading.Barrier(2)
+
+        def _urlopen(url, timeout=30):
+            if url in ("https://v4.ident.me", "https://v6.ident.me"):
+                barrier.wait(timeout=2)
+                response = MagicMock()
+                response.getcode.return_value = 200
+                response.read.return_value = (
+                    b"1.2.3.4" if "v4" in url else b"2001:db8::1")
+                return response
+            self.release.wait(timeout=30)
+            response = MagicMock()
+            response.getcode.return_value = 500
+            return response
+
+        resolver = PublicIPResolver(ipv4=True, ipv6=True, race=True,
+                                    _urlopen=_urlopen)
+        self.assertEqual(
+            resolver.resolve(),
+            [IPv4Address("1.2.3.4"), IPv6Address("2001:db8::1")])
+
+    def test_all_providers_fail_raises(self):
+        resolver = PublicIPResolver(
+            ipv4=True, ipv6=False, race=True,
+            _urlopen=make_urlopen(500, "", 500, "", 500, ""))
+        with self.assertRaises(PorkbunDDNS_Error):
+            resolver.resolve()
+
+
+class TestPublicIPResolverQuorum(unittest.TestCase):
+
+    def test_quorum_rejects_single_misbehaving_provider(self):
+        answers = {
+            "https://v4.ident.me": "10.0.0.1",
+            "https://api.ipify.org": "1.2.3.4",
+            "https://ipv4.icanhazip.com": "1.2.3.4",
+        }
+        resolver = PublicIPResolver(ipv4=True, ipv6=False, quorum=2,
+                                    _urlopen=make_url_urlopen(answers))
+        self.assertEqual(resolver.resolve(), [IPv4Address("1.2.3.4")])
+        self.assertEqual(resolver.health["https://v4.ident.me"].error_rate, 0.3)
+
+    def test_quorum_with_race(self):
+        answers = {
+            "https://v4.ident.me": "1.2.3.4",
+            "https://api.ipify.org": "1.2.3.4",
+            "https://ipv4.icanhazip.com": "1.2.3.4",
+        }
+        resolver = PublicIPResolver(
+            ipv4=True, ipv6=False, race=True, quorum=2,
+            _urlopen=make_url_urlopen(answers, {"https://ipv4.icanhazip.com": 5}))
+        start = time.monotonic()
+        self.assertEqual(resolver.resolve(), [IPv4Address("1.2.3.4")])
+        self.assertLess(time.monotonic() - start, 2)
+
+    def test_no_quorum_raises(self):
+        answers = {
+            "https://v4.ident.me": "1.1.1.1",
+            "https://api.ipify.org": "2.2.2.2",
+            "https://ipv4.icanhazip.com": "3.3.3.3",
+        }
+        resolver = PublicIPResolver(ipv4=True, ipv6=False, quorum=2,
+                                    _urlopen=make_url_urlopen(answers))
+        with self.assertLogs("porkbun_ddns", level="WARNING") as cm, \
+                self.assertRaises(PorkbunDDNS_Error):
+            resolver.resolve()
+        self.assertIn("No quorum of 2 providers", cm.output[0])
+
+    def test_quorum_larger_than_providers_rejected(self):
+        with self.assertRaises(ValueError):
+            PublicIPResolver(quorum=4)
+
+
+class TestProviderHealth(unittest.TestCase):
+
+    def test_ewma(self):
+        health = ProviderHealth(alpha=0.5, timeout=30)
+        health.record(True, 1.0)
+        health.record(False, 3.0)
+        self.assertEqual(health.latency, 2.0)
+        self.assertEqual(health.error_rate, 0.5)
+        self.assertEqual(health.score, 17.0)
+        self.assertFalse(health.healthy)
+
+    def test_failing_provider_is_asked_last(self):
+        calls = []
+
+        def _urlopen(url, timeout=30):
+            calls.append(url)
+            response = MagicMock()
+            if url == "https://v4.ident.me":
+                response.getcode.return_value = 500
+            else:
+                response.getcode.return_value = 200
+                response.read.return_value = b"1.2.3.4"
+            return response
+
+        resolver = PublicIPResolver(ipv4=True, ipv6=False, _urlopen=_urlopen)
+        resolver.resolve()
+        self.assertEqual(calls, ["https://v4.ident.me", "https://api.ipify.org"])
+        calls.clear()
+        resolver.resolve()
+        self.assertNotIn("https://v4.ident.me", calls)
+
+    def test_fastest_provider_is_asked_first(self):
+        clock = iter([0, 5, 5, 5.1, 5.1, 5.2, 10, 10.1])
+        resolver = PublicIPResolver(
+            ipv4=True, ipv6=False, quorum=3, _clock=lambda: next(clock),
+            _urlopen=make_url_urlopen({
+                "https://v4.ident.me": "1.2.3.4",
+                "https://api.ipify.org": "1.2.3.4",
+                "https://ipv4.icanhazip.com": "1.2.3.4",
+            }))
+        resolver.resolve()
+        self.assertEqual(
+            resolver.sources[0]._ranked(PUBLIC_HTTP_PROVIDERS[4]),
+            ["https://api.ipify.org", "https://ipv4.icanhazip.com",
+             "https://v4.ident.me"])
+
+
+class FakeSource:
+
+    def __init__(self, name, answers=None, delay=0.0, timeout=None):
+        self.name = name
+        self.answers = answers or {}
+        self.delay = delay
+        self.timeout = timeout
+        self.asked = []
+
+    def lookup(self, ip_version):
+        self.asked.append(ip_version)
+        time.sleep(self.delay)
+        answer = self.answers.get(ip_version)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+class TestSourceChain(unittest.TestCase):
+
+    def test_first_answer_per_family_wins_and_later_sources_are_not_asked(self):
+        first = FakeSource("first", {6: "2001:db8::1"})
+        second = FakeSource("second", {4: "1.2.3.4", 6: "2001:db8::2"})
+        third = FakeSource("third", {4: "5.6.7.8"})
+        resolver = PublicIPResolver(sources=[first, second, third])
+        self.assertEqual(resolver.resolve(),
+                         [IPv4Address("1.2.3.4"), IPv6Address("2001:db8::1")])
+        self.assertEqual(first.asked, [4, 6])
+        self.assertEqual(second.asked, [4])
+        self.assertEqual(third.asked, [])
+
+    def test_slow_source_is_abandoned_after_its_timeout(self):
+        slow = FakeSource("slow", {4: "9.9.9.9"}, delay=5, timeout=0.05)
+        fallback = FakeSource("fallback", {4: "1.2.3.4"})
+        resolver = PublicIPResolver(ipv6=False, sources=[slow, fallback])
+        start = time.monotonic()
+        with self.assertLogs("porkbun_ddns", level="WARNING") as cm:
+            self.assertEqual(resolver.resolve(), [IPv4Address("1.2.3.4")])
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertIn("The slow source gave no IPv4 Address within 0.05s", cm.output[0])
+
+    def _assert_falls_through(self, timeout):
+        broken = FakeSource("broken", {4: OSError("no route to host")}, timeout=timeout)
+        fallback = FakeSource("fallback", {4: "1.2.3.4"})
+        resolver = PublicIPResolver(ipv6=False, sources=[broken, fallback])
+        with self.assertLogs("porkbun_ddns", level="WARNING") as cm:
+            self.assertEqual(resolver.resolve(), [IPv4Address("1.2.3.4")])
+        self.assertEqual(cm.output, [
+            "WARNING:porkbun_ddns:The broken source failed for IPv4: no route to host"])
+
+    def test_failing_source_without_timeout_falls_through(self):
+        self._assert_falls_through(None)
+
+    def test_failing_source_with_timeout_falls_through(self):
+        self._assert_falls_through(5)
+
+    def test_budget_caps_the_whole_chain(self):
+        slow = FakeSource("slow", {4: "9.9.9.9"}, delay=5)
+        never = FakeSource("never", {4: "1.2.3.4"})
+        resolver = PublicIPResolver(ipv6=False, sources=[slow, never], budget=0.05)
+        with self.assertLogs("porkbun_ddns", level="WARNING") as cm, \
+                self.assertRaises(PorkbunDDNS_Error):
+            resolver.resolve()
+        self.assertIn("budget of 0.05s used up before the never source", cm.output[1])
+        self.assertEqual(never.asked, [])
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,54 @@
+import unittest
+
+from porkbun_ddns.scheduler import AdaptiveScheduler
+from porkbun_ddns.test.stubs import FakeClock
+
+
+class TestAdaptiveScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def scheduler(self, jitter=0.0, random=0.5, **kwargs):
+        kwargs.setdefault("min_interval", 60)
+        kwargs.setdefault("max_interval", 600)
+        return AdaptiveScheduler(jitter=jitter, _clock=self.clock,
+                                 _random=lambda: random, **kwargs)
+
+    def run_pass(self, scheduler, duration=0.0, **outcome):
+        scheduler.start_pass()
+        self.clock.now += duration
+        delay = scheduler.finish_pass(**outcome)
+        self.clock.now += delay
+        return delay
+
+    def test_backs_off_while_quiet_and_resets_on_change_or_failure(self):
+        scheduler = self.scheduler()
+        delays = [self.run_pass(scheduler) for _ in range(5)]
+        self.assertEqual(delays, [120, 240, 480, 600, 600])
+        self.assertEqual(self.run_pass(scheduler, changed=True), 60)
+        self.assertEqual(self.run_pass(scheduler), 120)
+        self.assertEqual(self.run_pass(scheduler, failed=True), 60)
+
+    def test_subtracts_the_pass_duration(self):
+        scheduler = self.scheduler(min_interval=300, max_interval=300)
+        self.assertFalse(scheduler.adaptive)
+        self.assertEqual(self.run_pass(scheduler, duration=20), 280)
+        self.assertEqual(scheduler.pass_duration, 20)
+        self.assertEqual(scheduler.next_run, 300)
+        # A pass longer than the interval starts the next one right away.
+        self.assertEqual(self.run_pass(scheduler, duration=400), 0)
+
+    def test_jitter_spreads_the_interval_both_ways(self):
+        self.assertEqual(self.run_pass(self.scheduler(0.1, random=0.0, min_interval=600)), 540)
+        self.assertEqual(self.run_pass(self.scheduler(0.1, random=1.0, min_interval=600)), 660)
+
+    def test_invalid_settings(self):
+        for kwargs in ({"min_interval": 0}, {"min_interval": 700},
+                       {"backoff": 0.5}, {"jitter": 1}):
+            with self.subTest(**kwargs), self.assertRaises(ValueError):
+                self.scheduler(**kwargs)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,271 @@
+import socket
+import struct
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from porkbun_ddns.resolver import PublicIPResolver
+from porkbun_ddns.sources import (
+    TYPE_A,
+    TYPE_TXT,
+    CommandSource,
+    DnsSource,
+    HttpSource,
+    InterfaceSource,
+    NatPmpSource,
+    UpnpSource,
+    build_chain,
+    build_query,
+    default_gateway,
+    parse_answers,
+)
+from porkbun_ddns.test.mock_dns_server import DnsServerMock
+from porkbun_ddns.test.mock_igd import IGDMock
+
+# Columns: address, ifindex, prefix length, scope, flags, interface.
+IF_INET6 = """\
+00000000000000000000000000000001 01 80 10 80       lo
+fe80000000000000021122fffe334455 02 40 20 80     eth0
+2a0104f8c0c0100000000000000000aa 02 40 00 01     eth0
+2a0104f8c0c0100000000000000000bb 02 40 00 20     eth0
+2a0104f8c0c0100000000000000000cc 02 40 00 40     eth0
+2a0104f8c0c010000211 22fffe334455 02 40 00 80     eth0
+2a0104f8c0c01000021122fffe334455 02 40 00 80     eth0
+fd000000000000000000000000000001 03 40 00 80     wg0
+2a0104f8c0c0200000000000000000dd 04 40 00 80   wlan0
+"""
+
+
+class TestInterfaceSource(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "if_inet6"
+        self.path.write_text(IF_INET6)
+
+    def source(self, *args):
+        return InterfaceSource(*args, _path=self.path)
+
+    def test_picks_stable_global_address(self):
+        # Loopback, link-local, ULA, temporary, deprecated, tentative and
+        # malformed lines are all skipped.
+        self.assertEqual([str(ip) for ip in self.source().addresses()],
+                         ["2a01:4f8:c0c0:1000:211:22ff:fe33:4455",
+                          "2a01:4f8:c0c0:2000::dd"])
+        self.assertEqual(self.source().lookup(6),
+                         "2a01:4f8:c0c0:1000:211:22ff:fe33:4455")
+
+    def test_never_answers_ipv4(self):
+        self.assertIsNone(self.source().lookup(4))
+
+    def test_interface_filter_and_order(self):
+        self.assertEqual(self.source(["wlan0", "eth0"]).lookup(6),
+                         "2a01:4f8:c0c0:2000::dd")
+        self.assertIsNone(self.source(["wg0"]).lookup(6))
+
+    def test_prefix_filter(self):
+        self.assertEqual(self.source((), ["2a01:4f8:c0c0:2000::/56"]).lookup(6),
+                         "2a01:4f8:c0c0:2000::dd")
+
+    def test_missing_file(self):
+        source = InterfaceSource(_path=self.path.with_name("missing"))
+        with self.assertLogs("porkbun_ddns", level="WARNING"):
+            self.assertIsNone(source.lookup(6))
+
+    def test_resolver_skips_http_when_the_interface_answers(self):
+        def urlopen(url, timeout=30):
+            raise AssertionError(f"unexpected request to {url}")
+
+        resolver = PublicIPResolver(
+            ipv4=False, ipv6=True,
+            sources=[self.source(), HttpSource(_urlopen=urlopen)])
+        self.assertEqual([str(ip) for ip in resolver.resolve()],
+                         ["2a01:4f8:c0c0:1000:211:22ff:fe33:4455"])
+
+
+class TestDnsWire(unittest.TestCase):
+
+    def test_query_encoding(self):
+        self.assertEqual(
+            build_query(0x1234, "myip.opendns.com", TYPE_A),
+            b"\x12\x34\x01\x00\x00\x01\x00\x00\x00\x00\x00\x00"
+            b"\x04myip\x07opendns\x03com\x00\x00\x01\x00\x01")
+
+    def test_rejects_queries_and_truncated_responses(self):
+        query = build_query(1, "myip.opendns.com", TYPE_A)
+        with self.assertRaisesRegex(ValueError, "not a DNS response"):
+            parse_answers(query, TYPE_A)
+        with self.assertRaisesRegex(ValueError, "malformed"):
+            parse_answers(b"\x00\x01\x81\x80\x00\x01\x00\x01", TYPE_A)
+
+
+class TestDnsSource(unittest.TestCase):
+
+    def setUp(self):
+        self.server = DnsServerMock()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+
+    def source(self, provider="opendns"):
+        return DnsSource(provider, servers={4: self.server.address}, timeout=0.2)
+
+    def test_opendns_a_record(self):
+        self.server.records[("myip.opendns.com", TYPE_A)] = ["198.51.100.7"]
+        self.assertEqual(self.source().lookup(4), "198.51.100.7")
+        self.assertEqual(self.server.queries, [("myip.opendns.com", TYPE_A)])
+
+    def test_google_txt_skips_non_address_strings(self):
+        self.server.records[("o-o.myaddr.l.google.com", TYPE_TXT)] = [
+            "edns0-client-subnet 198.51.100.0/24", "198.51.100.7"]
+        self.assertEqual(self.source("google").lookup(4), "198.51.100.7")
+
+    def test_error_and_lost_replies_yield_none(self):
+        with self.assertLogs("porkbun_ddns", level="WARNING") as cm:
+            self.assertIsNone(self.source().lookup(4))  # NXDOMAIN
+            self.server.drop_next = 1
+            self.assertIsNone(self.source().lookup(4))
+        self.assertIn("DNS error code 3", cm.output[0])
+        self.assertIn("timed out", cm.output[1])
+
+    def test_unknown_provider(self):
+        with self.assertRaises(ValueError):
+            DnsSource("nope")
+
+    def test_resolver_falls_back_to_http_without_dns_answer(self):
+        def urlopen(url, timeout=30):
+            response = MagicMock()
+            response.getcode.return_value = 200
+            response.read.return_value = b"203.0.113.9"
+            return response
+
+        resolver = PublicIPResolver(
+            ipv4=True, ipv6=False,
+            sources=[self.source(), HttpSource(_urlopen=urlopen)])
+        with self.assertLogs("porkbun_ddns", level="WARNING"):
+            self.assertEqual([str(ip) for ip in resolver.resolve()], ["203.0.113.9"])
+
+
+class TestCommandSource(unittest.TestCase):
+
+    def test_command_output(self):
+        source = CommandSource([sys.executable, "-c", "print('1.2.3.4, 2001:db8::1')"])
+        self.assertEqual(source.lookup(4), "1.2.3.4")
+        self.assertEqual(source.lookup(6), "2001:db8::1")
+
+    def test_command_failure_and_timeout(self):
+        with self.assertLogs("porkbun_ddns", level="WARNING") as cm:
+            self.assertIsNone(CommandSource(
+                [sys.executable, "-c", "import sys; sys.exit('boom')"]).lookup(4))
+            self.assertIsNone(CommandSource(
+                [sys.executable, "-c", "import time; time.sleep(5)"],
+                timeout=0.1).lookup(4))
+        self.assertIn("exited with 1: boom", cm.output[0])
+        self.assertIn("timed out", cm.output[1])
+
+
+class TestUpnpSource(unittest.TestCase):
+
+    def setUp(self):
+        self.igd = IGDMock(control_path="/ctl/IPConn").start()
+        self.addCleanup(self.igd.stop)
+        self.igd.external_ips[4] = "198.51.100.7"
+        self.source = UpnpSource(timeout=1, _ssdp_address=self.igd.start_ssdp())
+        self.addCleanup(self.source.transport.close)
+
+    def test_discovers_once_and_caches_the_control_url(self):
+        self.assertEqual(self.source.lookup(4), "198.51.100.7")
+        self.assertEqual(self.source.lookup(4), "198.51.100.7")
+        self.assertIsNone(self.source.lookup(6))
+        self.assertEqual(self.igd.descriptions, 1)
+        self.assertEqual(self.igd.actions, ["GetExternalIPAddress"] * 2)
+
+    def test_rediscovers_after_a_failed_request(self):
+        self.source.lookup(4)
+        self.igd.fail_next = 1
+        with self.assertLogs("porkbun_ddns", level="WARNING"):
+            self.assertEqual(self.source.lookup(4), "198.51.100.7")
+        self.assertEqual(self.igd.descriptions, 2)
+
+    def test_unconnected_gateway_yields_none(self):
+        self.igd.external_ips[4] = "0.0.0.0"
+        with self.assertLogs("porkbun_ddns", level="WARNING"):
+            self.assertIsNone(self.source.lookup(4))
+
+    def test_no_answer_to_the_search(self):
+        silent = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        silent.bind(("127.0.0.1", 0))
+        self.addCleanup(silent.close)
+        source = UpnpSource(timeout=0.1, _ssdp_address=silent.getsockname())
+        with self.assertLogs("porkbun_ddns", level="WARNING") as cm:
+            self.assertIsNone(source.lookup(4))
+        self.assertIn("timed out", cm.output[0])
+
+
+class TestNatPmpSource(unittest.TestCase):
+
+    def setUp(self):
+        self.gateway = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.gateway.bind(("127.0.0.1", 0))
+        self.addCleanup(self.gateway.close)
+
+    def answer(self, response: bytes) -> None:
+        def serve():
+            request, client = self.gateway.recvfrom(16)
+            self.assertEqual(request, b"\0\0")
+            self.gateway.sendto(response, client)
+
+        thread = threading.Thread(target=serve, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join, 1)
+
+    def source(self, timeout=1):
+        host, port = self.gateway.getsockname()
+        return NatPmpSource(host, port, timeout=timeout)
+
+    def test_external_address(self):
+        self.answer(struct.pack("!BBHI4s", 0, 128, 0, 1234, bytes([198, 51, 100, 7])))
+        self.assertEqual(self.source().lookup(4), "198.51.100.7")
+        self.assertIsNone(self.source().lookup(6))
+
+    def test_error_result_and_silence(self):
+        self.answer(struct.pack("!BBHI4s", 0, 128, 3, 1234, bytes(4)))
+        with self.assertLogs("porkbun_ddns", level="WARNING") as cm:
+            self.assertIsNone(self.source().lookup(4))
+            self.assertIsNone(self.source(timeout=0.05).lookup(4))
+        self.assertIn("result code 3", cm.output[0])
+        self.assertIn("timed out", cm.output[1])
+
+    def test_default_gateway(self):
+        with tempfile.TemporaryDirectory() as directory:
+            route = Path(directory) / "route"
+            route.write_text(
+                "Iface\tDestination\tGateway \tFlags\tRefCnt\tUse\tMetric\tMask\n"
+                "eth0\t0001A8C0\t00000000\t0001\t0\t0\t0\t00FFFFFF\n"
+                "eth0\t00000000\t0101A8C0\t0003\t0\t0\t0\t00000000\n")
+            self.assertEqual(default_gateway(route), "192.168.1.1")
+            self.assertIsNone(default_gateway(route.with_name("missing")))
+
+
+class TestBuildChain(unittest.TestCase):
+
+    def test_order_timeouts_and_options(self):
+        chain = build_chain("command, DNS:1.5,http",
+                            {"command": {"command": "echo 1.2.3.4"},
+                             "dns": {"provider": "google"}})
+        self.assertEqual([source.name for source in chain], ["command", "dns", "http"])
+        self.assertEqual(chain[0].timeout, 10)
+        self.assertEqual((chain[1].provider, chain[1].timeout), ("google", 1.5))
+        self.assertIsNone(chain[2].timeout)
+
+    def test_invalid_specs(self):
+        for spec in ("http,carrier-pigeon", "http:0", "http:soon"):
+            with self.subTest(spec=spec), self.assertRaises(ValueError):
+                build_chain(spec)
+
+
+if __name__ == "__main__":
+    unittest.main()
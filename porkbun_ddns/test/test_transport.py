@@ -0,0 +1,76 @@
+import json
+import unittest
+from urllib.error import HTTPError, URLError
+
+from porkbun_ddns.api import PorkbunAPIClient
+from porkbun_ddns.config import Credentials, RetryPolicy
+from porkbun_ddns.test.mock_porkbun_api import PorkbunAPIMock
+from porkbun_ddns.test.stubs import FakeClock
+from porkbun_ddns.transport import HTTPConnectionPool
+
+AUTH = json.dumps({"apikey": "test-apikey", "secretapikey": "test-secret"}).encode()
+
+
+class TestHTTPConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.mock = PorkbunAPIMock(apikey="test-apikey", secretapikey="test-secret")
+        self.mock.start()
+        self.url = f"{self.mock.url}/api/json/v3/dns/retrieve/example.com"
+        self.clock = FakeClock()
+        self.pool = HTTPConnectionPool(idle_timeout=60, _clock=self.clock)
+
+    def tearDown(self):
+        self.pool.close()
+        self.mock.stop()
+
+    def test_connection_is_reused(self):
+        for _ in range(3):
+            response = json.loads(self.pool.post(self.url, AUTH))
+            self.assertEqual(response["status"], "SUCCESS")
+        self.assertEqual(self.mock.request_count, 3)
+        self.assertEqual(len(self.mock.connections), 1)
+
+    def test_idle_timeout_opens_new_connection(self):
+        self.pool.post(self.url, AUTH)
+        self.clock.now = 61
+        self.pool.post(self.url, AUTH)
+        self.assertEqual(len(self.mock.connections), 2)
+
+    def test_reconnects_when_server_closed_connection(self):
+        self.pool.post(self.url, AUTH)
+        for connections in self.pool._idle.values():
+            for conn, _ in connections:
+                conn.sock.close()
+        response = json.loads(self.pool.post(self.url, AUTH))
+        self.assertEqual(response["status"], "SUCCESS")
+        self.assertEqual(self.mock.request_count, 2)
+
+    def test_http_error_status_raises_http_error(self):
+        with self.assertRaises(HTTPError) as context:
+            self.pool.post(f"{self.mock.url}/api/json/v3/dns/unknown/example.com", AUTH)
+        self.assertEqual(context.exception.code, 404)
+        # The connection survives error responses.
+        self.pool.post(self.url, AUTH)
+        self.assertEqual(len(self.mock.connections), 1)
+
+    def test_connection_refused_raises_url_error(self):
+        with self.assertRaises(URLError) as context:
+            self.pool.post("http://127.0.0.1:1/api/json/v3", AUTH)
+        self.assertIn("Connection refused", str(context.exception.reason))
+
+    def test_clients_share_pool(self):
+        credentials = Credentials(apikey="test-apikey", secretapikey="test-secret",
+                                  endpoint=f"{self.mock.url}/api/json/v3")
+        retry = RetryPolicy(retry_count=1, retry_delay=0)
+        first = PorkbunAPIClient(credentials, retry, transport=self.pool)
+        second = PorkbunAPIClient(credentials, retry, transport=self.pool)
+        first.retrieve_records("example.com")
+        second.create_record("example.com", "www", "A", "203.0.113.5")
+        first.retrieve_records("example.com")
+        self.assertEqual(self.mock.request_count, 3)
+        self.assertEqual(len(self.mock.connections), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+"""Keep-alive HTTP connection pool for the Porkbun API client."""
+
+from __future__ import annotations
+
+import http.client
+import io
+import logging
+import select
+import threading
+import time
+from collections.abc import Callable
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlsplit
+
+logger = logging.getLogger("porkbun_ddns")
+
+_PoolKey = tuple[str, str, int | None]
+
+# Errors raised when a reused keep-alive connection was already closed by the
+# server; the request is retried once on a fresh connection.
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+
+class HTTPConnectionPool:
+    """Reuses persistent HTTP(S) connections per endpoint host.
+
+    Idle connections are kept per ``(scheme, host, port)`` and handed out to
+    one request at a time, so a pool can be shared between threads and
+    clients. Connections idle for longer than ``idle_timeout`` seconds, or
+    already closed by the server, are discarded instead of reused. A request
+    that fails on a reused connection because the server dropped it is
+    retried once on a fresh connection.
+
+    Errors mirror ``urllib.request.urlopen``: HTTP status >= 400 raises
+    ``HTTPError``, connection failures raise ``URLError``. ``_clock`` is an
+    internal seam for tests.
+    """
+
+    def __init__(
+            self,
+            idle_timeout: float = 60.0,
+            max_idle_per_host: int = 4,
+            _clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.idle_timeout = idle_timeout
+        self.max_idle_per_host = max_idle_per_host
+        self._clock = _clock
+        self._idle: dict[_PoolKey, list[tuple[http.client.HTTPConnection, float]]] = {}
+        self._lock = threading.Lock()
+
+    def post(self, url: str, body: bytes, timeout: float = 30,
+             headers: dict[str, str] | None = None) -> bytes:
+        """POST ``body`` to ``url`` and return the response body."""
+        parts = urlsplit(url)
+        key: _PoolKey = (parts.scheme, parts.hostname or "", parts.port)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        request_headers = {
+            "Content-Type": "application/json",
+            "User-Agent": "porkbun-ddns",
+        }
+        request_headers.update(headers or {})
+
+        conn, reused = self._acquire(key, timeout)
+        try:
+            try:
+                response = self._send(conn, path, body, request_headers)
+            except _STALE_CONNECTION_ERRORS:
+                conn.close()
+                if not reused:
+                    raise
+                logger.debug("Keep-alive connection to %s was closed, reconnecting.",
+                             parts.hostname)
+                conn = self._connect(key, timeout)
+                response = self._send(conn, path, body, request_headers)
+            status, reason, response_headers, data = (
+                response.status, response.reason, response.headers, response.read())
+        except (OSError, http.client.HTTPException) as err:
+            conn.close()
+            raise URLError(err) from err
+
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+        if status >= 400:
+            raise HTTPError(url, status, reason, response_headers, io.BytesIO(data))
+        return data
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn, _ in connections:
+                conn.close()
+
+    def _acquire(self, key: _PoolKey,
+                 timeout: float) -> tuple[http.client.HTTPConnection, bool]:
+        """Return an idle connection for ``key`` or a fresh one."""
+        now = self._clock()
+        with self._lock:
+            connections = self._idle.get(key, [])
+            while connections:
+                conn, last_used = connections.pop()
+                if now - last_used <= self.idle_timeout and not _is_dropped(conn):
+                    conn.timeout = timeout
+                    if conn.sock is not None:
+                        conn.sock.settimeout(timeout)
+                    return conn, True
+                conn.close()
+        return self._connect(key, timeout), False
+
+    def _release(self, key: _PoolKey, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            connections = self._idle.setdefault(key, [])
+            if len(connections) < self.max_idle_per_host:
+                connections.append((conn, self._clock()))
+                return
+        conn.close()
+
+    @staticmethod
+    def _connect(key: _PoolKey, timeout: float) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=timeout)
+        if scheme == "http":
+            return http.client.HTTPConnection(host, port, timeout=timeout)
+        raise URLError(f"unknown url type: {scheme}")
+
+    @staticmethod
+    def _send(conn: http.client.HTTPConnection, path: str, body: bytes,
+              headers: dict[str, str]) -> http.client.HTTPResponse:
+        conn.request("POST", path, body=body, headers=headers)
+        return conn.getresponse()
+
+
+def _is_dropped(conn: http.client.HTTPConnection) -> bool:
+    """Whether an idle connection was closed by the peer.
+
+    An idle keep-alive socket must not be readable: readability means the
+    server sent EOF (or unexpected data), so the connection cannot be reused.
+    """
+    if conn.sock is None:
+        return False
+    try:
+        readable, _, _ = select.select([conn.sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)